@@ -0,0 +1,215 @@
+#  Copyright (c) 2024 by Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Reading bytecode files straight out of zip archives: wheels, eggs,
+zipapps and plain zip files.
+
+A bytecode file inside an archive is named the way zipimport names
+it: the archive path followed by the member name, for example
+"dist/foo-1.0-py3-none-any.whl/foo/__pycache__/bar.cpython-38.pyc".
+The functions input_exists(), input_stat() and read_input() accept
+either such a name or an ordinary file path.
+
+Members that are stored uncompressed are read from a memory map of the
+archive, which avoids going through zipfile's decompression stream.
+"""
+
+import mmap
+import os
+import os.path as osp
+import re
+import struct
+import time
+import zipfile
+from typing import List, Optional, Tuple
+
+ARCHIVE_EXTENSIONS = (".egg", ".pyz", ".whl", ".zip")
+BYTECODE_EXTENSIONS = (".pyc", ".pyo")
+
+ARCHIVE_IN_PATH = re.compile(
+    "(%s)%s"
+    % ("|".join(re.escape(ext) for ext in ARCHIVE_EXTENSIONS), re.escape(os.sep))
+)
+
+# Fixed part of a zip local file header, and the offsets of the
+# file-name and extra-field lengths in it.
+LOCAL_HEADER_SIZE = 30
+LOCAL_HEADER_NAME_LENGTHS = struct.Struct("<HH")
+LOCAL_HEADER_NAME_LENGTHS_OFFSET = 26
+
+
+def is_archive(path: str) -> bool:
+    """Return True if `path` is a zip archive we can read bytecode from."""
+    return (
+        path.endswith(ARCHIVE_EXTENSIONS)
+        and osp.isfile(path)
+        and zipfile.is_zipfile(path)
+    )
+
+
+def is_safe_member(member: str) -> bool:
+    """
+    Return True if archive member name `member` is relative and has no
+    ".." part. Output paths are made from member names, so a member
+    that isn't could have its source written outside the output
+    directory. zipfile.ZipFile.extract() guards against the same thing.
+    """
+    parts = member.replace("\\", "/").split("/")
+    return not (member.startswith(("/", "\\")) or ":" in parts[0] or ".." in parts)
+
+
+def split_archive_path(path: str) -> Tuple[Optional[str], str]:
+    """
+    Split `path` into the path of the archive it names a member of, and
+    the member name. If `path` is not inside an archive, or the member
+    name is not safe (see is_safe_member()), return (None, path).
+    """
+    for match in ARCHIVE_IN_PATH.finditer(path):
+        archive_path = path[: match.end(1)]
+        if osp.isfile(archive_path):
+            member = path[match.end() :].replace(os.sep, "/")
+            if not is_safe_member(member):
+                break
+            return archive_path, member
+    return None, path
+
+
+class ArchiveReader:
+    """
+    An open zip archive. Stored (uncompressed) members are read from a
+    memory map of the archive file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.zipfile = zipfile.ZipFile(path)
+        self.file = open(path, "rb")
+        try:
+            self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # For example, an empty file, or a system without mmap.
+            self.mmap = None
+
+    def close(self):
+        if self.mmap is not None:
+            self.mmap.close()
+        self.file.close()
+        self.zipfile.close()
+
+    def bytecode_members(self) -> List[str]:
+        """
+        Return the names of the bytecode files in the archive. Members
+        whose names are not safe (see is_safe_member()) are left out.
+        """
+        return [
+            info.filename
+            for info in self.zipfile.infolist()
+            if not info.is_dir()
+            and info.filename.endswith(BYTECODE_EXTENSIONS)
+            and is_safe_member(info.filename)
+        ]
+
+    def getinfo(self, member: str) -> zipfile.ZipInfo:
+        return self.zipfile.getinfo(member)
+
+    def read(self, member: str) -> bytes:
+        info = self.zipfile.getinfo(member)
+        if (
+            self.mmap is None
+            or info.compress_type != zipfile.ZIP_STORED
+            or info.flag_bits & 0x1  # encrypted
+        ):
+            return self.zipfile.read(info)
+
+        # The data follows the local header, whose file-name and extra
+        # field lengths can differ from those in the central directory.
+        offset = info.header_offset
+        name_length, extra_length = LOCAL_HEADER_NAME_LENGTHS.unpack_from(
+            self.mmap, offset + LOCAL_HEADER_NAME_LENGTHS_OFFSET
+        )
+        start = offset + LOCAL_HEADER_SIZE + name_length + extra_length
+        return self.mmap[start : start + info.file_size]
+
+
+# Files taken from an archive are handed out in order, so keeping the
+# last archive used open saves us from rereading its directory for each
+# member. A process forked from ours, such as a --jobs worker, shares
+# the file offset of the archive we have open, so each process has its
+# own; the key is the process id.
+_last_reader: Tuple[int, Optional[ArchiveReader]] = (0, None)
+
+
+def open_archive(path: str) -> ArchiveReader:
+    """Return an ArchiveReader for `path`, reusing the last one if we can."""
+    global _last_reader
+    pid, reader = _last_reader
+    if pid != os.getpid():
+        # Whatever we have came from the process we were forked from,
+        # and is still in use there; leave it alone.
+        reader = None
+    if reader is None or reader.path != path:
+        if reader is not None:
+            reader.close()
+        reader = ArchiveReader(path)
+        _last_reader = (os.getpid(), reader)
+    return reader
+
+
+def expand_archive(path: str) -> List[str]:
+    """Return the names of the bytecode files inside archive `path`."""
+    return [
+        osp.join(path, *member.split("/"))
+        for member in open_archive(path).bytecode_members()
+    ]
+
+
+def input_exists(path: str) -> bool:
+    """Return True if `path`, a file or archive member, exists."""
+    archive_path, member = split_archive_path(path)
+    if archive_path is None:
+        return osp.exists(path)
+    try:
+        open_archive(archive_path).getinfo(member)
+    except KeyError:
+        return False
+    return True
+
+
+def input_stat(path: str) -> Tuple[int, float]:
+    """Return the size and modification time of a file or archive member."""
+    archive_path, member = split_archive_path(path)
+    if archive_path is None:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime
+    info = open_archive(archive_path).getinfo(member)
+    return info.file_size, time.mktime(info.date_time + (0, 0, -1))
+
+
+def read_input(path: str) -> bytes:
+    """Return the contents of a file or archive member."""
+    archive_path, member = split_archive_path(path)
+    if archive_path is None:
+        with open(path, "rb") as f:
+            return f.read()
+    return open_archive(archive_path).read(member)
+
+
+def write_archive(out_dir: str, archive_path: str):
+    """Pack the files below `out_dir` into a new zip archive `archive_path`."""
+    with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for root, _, files in os.walk(out_dir):
+            for name in sorted(files):
+                path = osp.join(root, name)
+                zf.write(path, osp.relpath(path, out_dir))
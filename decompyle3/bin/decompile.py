@@ -6,13 +6,27 @@
 #
 
 import os
+import queue
+import shutil
 import sys
-from typing import List
+import tempfile
+import traceback
+from typing import List, Optional
 
 import click
 from xdis.version_info import version_tuple_to_str
 
-from decompyle3.main import main, status_msg
+from decompyle3.archive import (
+    expand_archive,
+    is_archive,
+    split_archive_path,
+    write_archive,
+)
+from decompyle3.cache import DEFAULT_CACHE_SIZE
+from decompyle3.main import main, open_caches, status_msg
+from decompyle3.manifest import MANIFEST_NAME, Manifest
+from decompyle3.report import RunReport
+from decompyle3.server import DEFAULT_REQUEST_TIMEOUT
 from decompyle3.version import __version__
 
 case_sensitive = {"case_sensitive": False}
@@ -20,10 +34,100 @@ program = "decompyle3"
 
 
 def usage():
-    print(__doc__)
+    print(click.get_current_context().get_help())
     sys.exit(1)
 
 
+def process_func(
+    fqueue,
+    rqueue,
+    src_base: str,
+    out_base: str,
+    main_kwargs: dict,
+    record_manifest: bool,
+):
+    """
+    Worker for --jobs: decompile file names taken from `fqueue` until a
+    None sentinel is seen, and put the tuple of totals that main()
+    returns on `rqueue`, along with the manifest entries recorded if
+    `record_manifest` is set. The parent waits for these, so they are
+    put there however we finish.
+
+    The caches and the report are opened once here and shared by all of
+    this process's files, rather than reopened by main() for each one.
+    """
+    tot_files = okay_files = failed_files = verify_failed_files = 0
+    manifest = Manifest() if record_manifest else None
+    report = None
+    try:
+        cache, tree_cache = open_caches(
+            main_kwargs["cache_dir"],
+            main_kwargs["cache_size"],
+            main_kwargs["parse_cache"],
+        )
+        if main_kwargs["report_path"]:
+            report = RunReport(main_kwargs["report_path"])
+        for filename in iter(fqueue.get, None):
+            # main() lets errors it doesn't expect out, so that a single
+            # file shows the traceback. Here that would lose the totals
+            # for the rest of this process's files, so we give main()
+            # one file at a time.
+            try:
+                t, o, f, v = main(
+                    src_base,
+                    out_base,
+                    [filename],
+                    [],
+                    manifest=manifest,
+                    cache=cache,
+                    tree_cache=tree_cache,
+                    report=report,
+                    **main_kwargs,
+                )
+            except Exception:
+                traceback.print_exc()
+                t, o, f, v = 1, 0, 1, 0
+                if manifest is not None:
+                    manifest.record(
+                        os.path.join(src_base, filename),
+                        "failed",
+                        traceback.format_exc().splitlines()[-1],
+                    )
+            tot_files += t
+            okay_files += o
+            failed_files += f
+            verify_failed_files += v
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if report is not None:
+            report.close()
+        rqueue.put(
+            (
+                (tot_files, okay_files, failed_files, verify_failed_files),
+                manifest.entries if manifest else None,
+            )
+        )
+        rqueue.close()
+
+
+def wait_for_result(rqueue, procs, poll_interval: float = 1.0):
+    """
+    Return the next result put on `rqueue` by one of the --jobs worker
+    processes `procs`. queue.Empty is raised once none of them is left
+    to put one there.
+    """
+    while True:
+        try:
+            return rqueue.get(timeout=poll_interval)
+        except queue.Empty:
+            if not any(p.is_alive() for p in procs):
+                # A process flushes what it put on the queue before it
+                # exits, so a result from one that has just exited is
+                # already there.
+                return rqueue.get(timeout=poll_interval)
+
+
 @click.command()
 @click.option(
     "--asm++/--no-asm++",
@@ -83,7 +187,125 @@ def usage():
     help="stop decomplation when seeing an offset greater or equal to this; default is "
     "-1 which indicates no stopping point.",
 )
-@click.argument("files", nargs=-1, type=click.Path(readable=True), required=True)
+@click.option(
+    "--jobs",
+    "-j",
+    "jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    help="number of processes to decompile files in; default is 1. "
+    "Files are handed out one at a time to each process.",
+)
+@click.option(
+    "--timeout",
+    "timeout",
+    type=click.FloatRange(min=0),
+    default=None,
+    help="give up decompiling a file after this many seconds.",
+)
+@click.option(
+    "--max-memory",
+    "max_memory",
+    type=click.IntRange(min=1),
+    default=None,
+    help="give up decompiling a file when it needs more than this many "
+    "additional megabytes of memory.",
+)
+@click.option(
+    "--cache-dir",
+    "cache_dir",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True),
+    default=None,
+    help="directory of decompilation results to reuse for unchanged bytecode "
+    "files and to add new results to.",
+)
+@click.option(
+    "--cache-size",
+    "cache_size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_CACHE_SIZE // (1024 * 1024),
+    show_default=True,
+    help="maximum size in megabytes of the --cache-dir directory; "
+    "least-recently used results are removed first.",
+)
+@click.option(
+    "--parse-cache/--no-parse-cache",
+    "parse_cache",
+    default=False,
+    help="parse code objects identical to ones already seen, such as "
+    "generated methods and vendored copies of modules, only once. With "
+    "--cache-dir, the parse trees of functions without nested functions are "
+    "kept there for later runs too.",
+)
+@click.option(
+    "--incremental/--no-incremental",
+    "incremental",
+    default=False,
+    help="only decompile files that are new or changed since the last run "
+    f"into the same output directory, as recorded in its {MANIFEST_NAME} file. "
+    "Output for files that have since been deleted is removed.",
+)
+@click.option(
+    "--output-archive",
+    "output_archive",
+    type=click.Path(dir_okay=False, writable=True, resolve_path=True),
+    default=None,
+    help="write the decompiled files into this new zip archive instead of "
+    "a directory.",
+)
+@click.option(
+    "--report",
+    "report_path",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="write a JSON Lines record for each input file to this file, giving "
+    "its bytecode version, outcome, and time spent in each phase.",
+)
+@click.option(
+    "--profile-grammar",
+    "profile_grammar_path",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="write a tab-separated table to this file giving, for each grammar "
+    "rule, how often it was predicted, completed and rejected, and the time "
+    "spent checking it; and a table of the work done in each parse to this "
+    "file with .parses added. Parsing runs in one process, and much slower.",
+)
+@click.option(
+    "--segments/--no-segments",
+    "segments",
+    default=False,
+    help="parse long runs of statements, such as the module code of generated "
+    "files, a few statements at a time. Runs are cut only between statements "
+    "that no jump or stack value crosses. This is much faster on such files.",
+)
+@click.option(
+    "--serve",
+    "serve",
+    is_flag=True,
+    default=False,
+    help="run as a server that reads JSON decompilation requests, one per "
+    "line, from standard input or the --socket Unix socket, and writes a "
+    "JSON response for each. Up to --jobs requests are decompiled at the "
+    "same time.",
+)
+@click.option(
+    "--request-timeout",
+    "request_timeout",
+    type=click.FloatRange(min=0),
+    default=DEFAULT_REQUEST_TIMEOUT,
+    show_default=True,
+    help="with --serve, answer a request as failed if it has no answer this "
+    "many seconds after it was read.",
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="with --serve, listen on this Unix socket.",
+)
+@click.argument("files", nargs=-1, type=click.Path(readable=True))
 def main_bin(
     asm_plus: bool,
     asm: bool,
@@ -96,6 +318,20 @@ def main_bin(
     outfile,
     start_offset: int,
     stop_offset: int,
+    jobs: int,
+    timeout: Optional[float],
+    max_memory: Optional[int],
+    cache_dir: Optional[str],
+    cache_size: int,
+    parse_cache: bool,
+    incremental: bool,
+    output_archive: Optional[str],
+    report_path: Optional[str],
+    profile_grammar_path: Optional[str],
+    segments: bool,
+    serve: bool,
+    request_timeout: float,
+    socket_path: Optional[str],
     files: List[str],
 ):
     """
@@ -109,6 +345,24 @@ def main_bin(
         )
         sys.exit(-1)
 
+    if serve:
+        from decompyle3.server import serve as serve_requests
+
+        try:
+            serve_requests(
+                socket_path,
+                jobs,
+                cache_dir,
+                cache_size * 1024 * 1024,
+                request_timeout,
+            )
+        except FileExistsError as e:
+            print(f"--socket {e.filename} {e.strerror}", file=sys.stderr)
+            sys.exit(1)
+        return
+    if not files:
+        raise click.UsageError("FILES are needed unless --serve is given")
+
     out_base = None
     source_paths: List[str] = []
     # timestamp = False
@@ -125,14 +379,30 @@ def main_bin(
                     for df in dir_files:
                         if df.endswith(".pyc") or df.endswith(".pyo"):
                             expanded_files.append(os.path.join(root, df))
+            elif is_archive(f):
+                expanded_files.append(f)
         pyc_paths = expanded_files
 
+    # Bytecode files inside zip archives (wheels, eggs, ...) are read
+    # from the archive directly rather than extracted first.
+    expanded_files = []
+    for f in pyc_paths:
+        if is_archive(f):
+            expanded_files.extend(expand_archive(f))
+        else:
+            expanded_files.append(f)
+    pyc_paths = expanded_files
+
     # argl, commonprefix works on strings, not on path parts,
     # thus we must handle the case with files in 'some/classes'
     # and 'some/cmds'
     src_base = os.path.commonprefix(pyc_paths)
     if src_base[-1:] != os.sep:
         src_base = os.path.dirname(src_base)
+    archive_path, _ = split_archive_path(src_base)
+    if archive_path is not None:
+        # Mirror the layout inside the archive.
+        src_base = archive_path
     if src_base:
         sb_len = len(os.path.join(src_base, ""))
         pyc_paths = [f[sb_len:] for f in pyc_paths]
@@ -141,6 +411,13 @@ def main_bin(
         print("No input files given to decompile", file=sys.stderr)
         usage()
 
+    if output_archive:
+        if outfile:
+            print("--output-archive and --output can't both be given", file=sys.stderr)
+            sys.exit(1)
+        # Decompile into a scratch directory and pack that up at the end.
+        outfile = tempfile.mkdtemp(prefix="decompyle3-")
+
     if outfile == "-":
         outfile = None  # use stdout
     elif outfile and os.path.isdir(outfile):
@@ -168,9 +445,66 @@ def main_bin(
         "dups": False,
     }
 
-    numproc = 1
+    show_ast = {"before": tree or tree_plus, "after": tree_plus}
+    main_kwargs = {
+        "showasm": asm_opt,
+        "showgrammar": show_grammar,
+        "showast": show_ast,
+        "do_verify": verify,
+        "do_linemaps": linemaps,
+        "start_offset": start_offset,
+        "stop_offset": stop_offset,
+        "timeout": timeout,
+        "max_memory": max_memory,
+        "cache_dir": cache_dir,
+        "cache_size": cache_size * 1024 * 1024,
+        "report_path": report_path,
+        "parse_cache": parse_cache,
+        "profile_grammar_path": profile_grammar_path,
+        "segments": segments,
+    }
+    if report_path:
+        # Start afresh; each worker process appends its records.
+        open(report_path, "w").close()
+
+    manifest = None
+    if incremental:
+        if out_base is None:
+            print("--incremental needs an output directory (-o)", file=sys.stderr)
+            sys.exit(1)
+        manifest = Manifest.load(out_base)
+        for path in manifest.remove_deleted():
+            print(f"# {path} was deleted; removed its output")
+        pyc_paths, unchanged_paths = manifest.partition(src_base, pyc_paths)
+        unchanged_failures = manifest.failures(src_base, unchanged_paths)
+        for filename, message in unchanged_failures:
+            infile = os.path.join(src_base, filename)
+            sys.stderr.write(f"\n# file {infile} (unchanged)\n# {message}\n")
+        if unchanged_paths:
+            print(
+                f"# {len(unchanged_paths)} files unchanged: "
+                f"{len(unchanged_paths) - len(unchanged_failures)} okay, "
+                f"{len(unchanged_failures)} failed"
+            )
+
+    # Output for several processes going to a single stream would get
+    # interleaved, so we only fan out when each input gets its own
+    # output file below out_base.
+    numproc = min(jobs, len(pyc_paths))
+    if numproc > 1 and out_base is None:
+        print(
+            "# --jobs needs an output directory (-o); decompiling in one process",
+            file=sys.stderr,
+        )
+        numproc = 1
+    if numproc > 1 and profile_grammar_path:
+        print(
+            "# --profile-grammar needs a single process; decompiling in one process",
+            file=sys.stderr,
+        )
+        numproc = 1
+
     if numproc <= 1:
-        show_ast = {"before": tree or tree_plus, "after": tree_plus}
         try:
             result = main(
                 src_base,
@@ -178,13 +512,8 @@ def main_bin(
                 pyc_paths,
                 source_paths,
                 outfile,
-                showasm=asm_opt,
-                showgrammar=show_grammar,
-                showast=show_ast,
-                do_verify=verify,
-                do_linemaps=linemaps,
-                start_offset=start_offset,
-                stop_offset=stop_offset,
+                manifest=manifest,
+                **main_kwargs,
             )
 
             if len(pyc_paths) > 1:
@@ -198,7 +527,6 @@ def main_bin(
             pass
     else:
         from multiprocessing import Process, Queue
-        from queue import Empty
 
         fqueue = Queue(len(pyc_paths) + numproc)
         for f in pyc_paths:
@@ -208,56 +536,66 @@ def main_bin(
 
         rqueue = Queue(numproc)
 
-        def process_func():
-            (tot_files, okay_files, failed_files, verify_failed_files) = (
-                0,
-                0,
-                0,
-                0,
-            )
-            try:
-                while True:
-                    f = fqueue.get()
-                    if f is None:
-                        break
-                    (t, o, f, v) = main(src_base, out_base, [f], [], outfile)
-                    tot_files += t
-                    okay_files += o
-                    failed_files += f
-                    verify_failed_files += v
-            except (Empty, KeyboardInterrupt):
-                pass
-            rqueue.put((tot_files, okay_files, failed_files, verify_failed_files))
-            rqueue.close()
-
+        procs = []
         try:
-            procs = [Process(target=process_func) for _ in range(numproc)]
+            procs = [
+                Process(
+                    target=process_func,
+                    args=(
+                        fqueue,
+                        rqueue,
+                        src_base,
+                        out_base,
+                        main_kwargs,
+                        manifest is not None,
+                    ),
+                )
+                for _ in range(numproc)
+            ]
             for p in procs:
                 p.start()
+
+            # Read results before joining: a child process that has
+            # put something on a queue does not exit until it has been
+            # consumed.
+            tot_files = okay_files = failed_files = verify_failed_files = 0
+            for _ in procs:
+                try:
+                    (t, o, f, v), entries = wait_for_result(rqueue, procs)
+                except queue.Empty:
+                    # A process was killed, say for running out of
+                    # memory, before it could hand back its results.
+                    print(
+                        "# a decompiling process exited without its results; "
+                        "the totals below are missing its files",
+                        file=sys.stderr,
+                    )
+                    break
+                if manifest is not None:
+                    manifest.entries.update(entries)
+                tot_files += t
+                okay_files += o
+                failed_files += f
+                verify_failed_files += v
             for p in procs:
                 p.join()
-            (tot_files, okay_files, failed_files, verify_failed_files) = (
-                0,
-                0,
-                0,
-                0,
-            )
-            try:
-                while True:
-                    (t, o, f, v) = rqueue.get(False)
-                    tot_files += t
-                    okay_files += o
-                    failed_files += f
-                    verify_failed_files += v
-            except Empty:
-                pass
-            print(
-                "# decompiled %i files: %i okay, %i failed, %i verify failed"
-                % (tot_files, okay_files, failed_files, verify_failed_files)
+
+            mess = status_msg(
+                verify, tot_files, okay_files, failed_files, verify_failed_files
             )
+            print("# " + mess)
         except (KeyboardInterrupt, OSError):
+            for p in procs:
+                p.terminate()
             pass
 
+    if manifest is not None:
+        manifest.save()
+
+    if output_archive:
+        write_archive(out_base, output_archive)
+        shutil.rmtree(out_base, ignore_errors=True)
+
     # if timestamp:
     #     print(time.strftime(timestampfmt))
 
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+#
+#  Copyright (c) 2024 by Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Command-line interface to grammar pruning: prune the grammars to the
+rules that decompiling a corpus uses, and report the parse time and
+memory use with and without the pruned grammars.
+See decompyle3.parsers.grammar_prune.
+"""
+
+import hashlib
+import io
+import json
+import os
+import os.path as osp
+import subprocess
+import sys
+from contextlib import redirect_stdout
+from typing import Dict, List, Optional
+
+import click
+
+from decompyle3.main import decompile_file
+from decompyle3.parsers.grammar_prune import PRUNED_GRAMMAR_ENV, prune_grammars
+from decompyle3.parsers.profile import GrammarProfile, profiling_grammar
+from decompyle3.timing import timed_phases
+
+
+def corpus_files(paths: List[str]) -> List[str]:
+    """Return the bytecode files in `paths`, looking in directories."""
+    files = []
+    for path in paths:
+        if osp.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(
+                    osp.join(root, name)
+                    for name in sorted(names)
+                    if name.endswith((".pyc", ".pyo"))
+                )
+        else:
+            files.append(path)
+    return files
+
+
+def decompile_corpus(files: List[str]) -> Dict[str, str]:
+    """
+    Decompile `files`, returning a digest of the source written for
+    each, or "failed". The parser's error reports are dropped.
+    """
+    digests = {}
+    for path in files:
+        out = io.StringIO()
+        with redirect_stdout(io.StringIO()):
+            try:
+                decompile_file(path, out)
+            except Exception:
+                digests[path] = "failed"
+                continue
+        digests[path] = hashlib.sha256(out.getvalue().encode()).hexdigest()
+    return digests
+
+
+def measure(files: List[str]) -> dict:
+    """
+    Decompile `files` and return the time spent parsing, the peak
+    memory use of this process, and digests of the source written.
+    """
+    # resource is Unix-only.
+    import resource
+
+    with timed_phases() as timer:
+        digests = decompile_corpus(files)
+    return {
+        "parse_seconds": timer.times["parse"],
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "digests": digests,
+    }
+
+
+def measure_in_subprocess(files: List[str], grammar_dir: Optional[str]) -> dict:
+    """Run measure() on `files` in a new process, using `grammar_dir`."""
+    env = dict(os.environ)
+    env.pop(PRUNED_GRAMMAR_ENV, None)
+    if grammar_dir is not None:
+        env[PRUNED_GRAMMAR_ENV] = grammar_dir
+    result = subprocess.run(
+        [sys.executable, "-m", "decompyle3.bin.prune_grammar", "--measure"] + files,
+        env=env,
+        stdout=subprocess.PIPE,
+        check=True,
+    )
+    return json.loads(result.stdout.decode().splitlines()[-1])
+
+
+@click.command()
+@click.option(
+    "--measure",
+    "measure_only",
+    is_flag=True,
+    default=False,
+    hidden=True,
+    help="decompile PATH... and print the parse time, memory use and "
+    "digests of the source as JSON. Used for the runs this command makes.",
+)
+@click.argument(
+    "paths", nargs=-1, metavar="OUT_DIR PATH...", type=click.Path(readable=True)
+)
+def main_bin(measure_only: bool, paths: List[str]):
+    """
+    Decompile the bytecode files in PATH..., write grammars pruned to the
+    rules used to OUT_DIR, then decompile the files again with and without
+    the pruned grammars and report the parse time and memory use of each.
+    Set DECOMPYLE3_PRUNED_GRAMMARS=OUT_DIR to use the pruned grammars.
+    """
+    if measure_only:
+        print(json.dumps(measure(list(paths))))
+        return
+    if len(paths) < 2:
+        raise click.UsageError("an OUT_DIR and at least one PATH are needed")
+
+    grammar_dir, files = paths[0], corpus_files(list(paths[1:]))
+    # Coverage has to be of the full grammars.
+    os.environ.pop(PRUNED_GRAMMAR_ENV, None)
+    profile = GrammarProfile()
+    with profiling_grammar(profile):
+        decompile_corpus(files)
+    for name, (kept, total) in sorted(prune_grammars(profile, grammar_dir).items()):
+        print(f"{name}: kept {kept} of {total} rules")
+
+    full = measure_in_subprocess(files, None)
+    pruned = measure_in_subprocess(files, grammar_dir)
+    changed = [
+        path for path in files if full["digests"][path] != pruned["digests"][path]
+    ]
+    for label, key in (
+        ("parse seconds", "parse_seconds"),
+        ("max RSS KiB", "max_rss_kb"),
+    ):
+        before, after = full[key], pruned[key]
+        gain = 100.0 * (before - after) / before if before else 0.0
+        print(f"{label}: {before:.2f} full, {after:.2f} pruned ({gain:.1f}% less)")
+    print(f"{len(files)} files, {len(changed)} decompiled differently when pruned")
+    for path in changed:
+        print(f"  {path}")
+
+
+if __name__ == "__main__":
+    main_bin()
@@ -0,0 +1,153 @@
+#  Copyright (c) 2024 by Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Per-file time and memory budgets for batch decompilation.
+
+A pathological code object can keep the Earley parser busy for many
+minutes or have it use gigabytes of memory. When decompiling lots of
+files, we would rather give up on such a file and move on to the next.
+
+Time is limited with an interval timer (SIGALRM), and memory by
+lowering the address-space resource limit while a file is decompiled.
+Both need a Unix-like system; elsewhere the limits are ignored with a
+warning.
+"""
+
+import signal
+import sys
+import traceback
+from contextlib import contextmanager
+from typing import Optional
+
+from xdis import iscode
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class BudgetExceeded(BaseException):
+    """
+    Raised when decompiling a file goes over its time or memory budget.
+
+    This derives from BaseException, like KeyboardInterrupt, so that the
+    "except Exception" clauses found in the parser and semantic actions
+    do not swallow it.
+    """
+
+    def __init__(self, kind: str, limit, code=None):
+        self.kind = kind  # "time" or "memory"
+        self.limit = limit
+        # The innermost code object we were working on, if we know it.
+        self.code = code
+
+    def __str__(self) -> str:
+        units = "seconds" if self.kind == "time" else "MB"
+        mess = f"budget exceeded: {self.kind} limit of {self.limit} {units}"
+        co = self.code
+        if co is not None:
+            mess += (
+                f" while working on code object {co.co_name}"
+                f" ({co.co_filename}, line {co.co_firstlineno})"
+            )
+        return mess
+
+
+def code_from_frames(frames) -> Optional[object]:
+    """
+    Return the first code object found in a local variable named "co"
+    or "code" of `frames`. These are the names the scanner and the
+    deparsing routines use for the code object they are handling.
+    """
+    for frame in frames:
+        f_locals = frame.f_locals
+        for name in ("co", "code"):
+            co = f_locals.get(name)
+            if iscode(co):
+                return co
+    return None
+
+
+def _address_space_size() -> Optional[int]:
+    """Return the size of our address space in bytes, or None if we can't tell."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@contextmanager
+def file_budget(timeout: Optional[float] = None, max_memory: Optional[int] = None):
+    """
+    Run the body of a "with" statement allowing at most `timeout`
+    seconds of wall-clock time and `max_memory` MB more memory than we
+    are using on entry. Going over either raises BudgetExceeded.
+    A value of None means no limit.
+    """
+
+    def alarm_handler(signum, frame):
+        innermost_first = [f for f, _ in traceback.walk_stack(frame)]
+        raise BudgetExceeded("time", timeout, code_from_frames(innermost_first))
+
+    if timeout and not hasattr(signal, "setitimer"):
+        print("# --timeout is not supported on this system; ignored", file=sys.stderr)
+        timeout = None
+
+    old_rlimit = None
+    if max_memory:
+        in_use = _address_space_size() if resource is not None else None
+        if in_use is None:
+            print(
+                "# --max-memory is not supported on this system; ignored",
+                file=sys.stderr,
+            )
+            max_memory = None
+        else:
+            old_rlimit = resource.getrlimit(resource.RLIMIT_AS)
+            soft, hard = old_rlimit
+            limit = in_use + max_memory * 1024 * 1024
+            if hard != resource.RLIM_INFINITY:
+                limit = min(limit, hard)
+            resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+    old_handler = None
+    if timeout:
+        old_handler = signal.signal(signal.SIGALRM, alarm_handler)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    exceeded = None
+    try:
+        yield
+    except MemoryError as e:
+        if not max_memory:
+            raise
+        # Walking the traceback keeps its frames, and with that the
+        # parser state, alive. So pull out just the code object and
+        # raise our exception outside of this handler.
+        outermost_first = [f for f, _ in traceback.walk_tb(e.__traceback__)]
+        exceeded = BudgetExceeded(
+            "memory", max_memory, code_from_frames(reversed(outermost_first))
+        )
+    finally:
+        if timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, old_handler)
+        if old_rlimit is not None:
+            resource.setrlimit(resource.RLIMIT_AS, old_rlimit)
+
+    if exceeded is not None:
+        raise exceeded
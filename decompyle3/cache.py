@@ -0,0 +1,209 @@
+#  Copyright (c) 2024 by Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+A content-addressed, on-disk cache of decompilation results.
+
+Entries are keyed by a hash of the bytecode file's contents, the
+decompyle3 version, the Python we are running under (it shows up in the
+output header), the options that change the output, and the layout of
+entries. An entry holds the text written to the output stream, the text
+written to the line-map stream, whether decompilation succeeded, and the
+bytecode version of each object decompiled.
+
+The cache is bounded in size. Reading an entry updates its modification
+time, and when the cache grows past its limit the least-recently used
+entries are removed.
+"""
+
+import hashlib
+import json
+import os
+import os.path as osp
+import sys
+import tempfile
+
+from decompyle3.version import __version__
+
+# Default maximum size of the cache directory in bytes.
+DEFAULT_CACHE_SIZE = 1024 * 1024 * 1024
+
+# When we evict, we go down to this fraction of the maximum size, so
+# that we don't have to evict again on the very next store.
+EVICT_TO_FRACTION = 0.9
+
+# Goes into the keys, so that entries laid out some other way are not
+# read. Change it when what an entry holds changes.
+ENTRY_FORMAT = 2
+
+
+class CachedDecompileError(Exception):
+    """
+    Raised when the cache records that decompiling a file failed.
+    `error_class` is the name of the exception seen at the time.
+    """
+
+    def __init__(self, error_class: str, message: str):
+        self.error_class = error_class
+        self.message = message
+
+    def __str__(self) -> str:
+        return self.message
+
+
+class CachedDeparse:
+    """
+    Stands in for a deparsed object (a SourceWalker) when results come
+    from the cache. Only the attributes that main() uses are provided.
+    """
+
+    def __init__(self, f, version: tuple, text: str):
+        self.f = f
+        self.version = version
+        self.text = text
+
+
+class RecordingStream:
+    """
+    Wraps an output stream, passing writes through to it while
+    recording what was written.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.parts = []
+
+    def write(self, s: str):
+        self.parts.append(s)
+        return self.stream.write(s)
+
+    def getvalue(self) -> str:
+        return "".join(self.parts)
+
+    def __getattr__(self, name: str):
+        return getattr(self.stream, name)
+
+
+class DecompileCache:
+    """
+    An on-disk cache of decompilation results stored below `cache_dir`.
+    `max_size` is the size in bytes the cache may grow to.
+
+    Entries are stored as JSON. Subclasses can store them some other
+    way by changing `suffix`, encode() and decode().
+    """
+
+    # File name suffix of the entries.
+    suffix = ".json"
+
+    def __init__(self, cache_dir: str, max_size: int = DEFAULT_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        os.makedirs(cache_dir, exist_ok=True)
+        self.total_size = sum(size for _, size, _ in self._entries())
+
+    def key(self, bytecode: bytes, options: dict) -> str:
+        """
+        Return the cache key for a bytecode file with contents `bytecode`
+        decompiled using `options`.
+        """
+        h = hashlib.sha256(bytecode)
+        h.update(__version__.encode())
+        h.update(sys.version.encode())
+        h.update(b"format %d" % ENTRY_FORMAT)
+        h.update(json.dumps(options, sort_keys=True).encode())
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return osp.join(self.cache_dir, key[:2], key[2:] + self.suffix)
+
+    def encode(self, entry) -> bytes:
+        """Return the bytes that `entry` is stored as."""
+        return json.dumps(entry).encode("utf-8")
+
+    def decode(self, data: bytes):
+        """
+        Return the entry stored as `data`. A ValueError is raised if
+        `data` doesn't hold one.
+        """
+        return json.loads(data.decode("utf-8"))
+
+    def get(self, key: str):
+        """Return the entry stored under `key`, or None if there isn't one."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = self.decode(f.read())
+        except (OSError, ValueError):
+            return None
+        try:
+            # Mark the entry as recently used.
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, entry):
+        """Store `entry` under `key`, evicting old entries if we need room."""
+        path = self._path(key)
+        data = self.encode(entry)
+        os.makedirs(osp.dirname(path), exist_ok=True)
+        try:
+            # An entry we replace no longer counts.
+            old_size = os.stat(path).st_size
+        except OSError:
+            old_size = 0
+
+        # Write to a temporary file and rename so that a reader, possibly
+        # in another process, never sees a partially-written entry.
+        fd, tmp_path = tempfile.mkstemp(dir=osp.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if osp.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.total_size += len(data) - old_size
+        if self.total_size > self.max_size:
+            self.evict()
+
+    def _entries(self):
+        """Yield (path, size, mtime) for each entry in the cache."""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(self.suffix):
+                    continue
+                path = osp.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def evict(self):
+        """Remove least-recently used entries until we are under our limit."""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total_size = sum(size for _, size, _ in entries)
+        target_size = self.max_size * EVICT_TO_FRACTION
+        for path, size, _ in entries:
+            if total_size <= target_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+        self.total_size = total_size
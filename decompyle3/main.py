@@ -21,17 +21,34 @@ import py_compile
 import subprocess
 import sys
 import tempfile
+from contextlib import nullcontext
+from io import BytesIO
 from typing import Any, Optional, TextIO, Tuple
 
-from xdis import iscode, load_module
+from xdis import iscode, load_module, load_module_from_file_object
 from xdis.version_info import IS_PYPY, PYTHON_VERSION_TRIPLE, version_tuple_to_str
 
+from decompyle3.archive import input_exists, read_input, split_archive_path
+from decompyle3.budget import BudgetExceeded, file_budget
+from decompyle3.cache import (
+    DEFAULT_CACHE_SIZE,
+    CachedDecompileError,
+    CachedDeparse,
+    DecompileCache,
+    RecordingStream,
+)
 from decompyle3.disas import check_object_path
+from decompyle3.manifest import Manifest
+from decompyle3.parse_cache import ParseCache, using_parse_cache
 from decompyle3.parsers.parse_heads import ParserError
+from decompyle3.parsers.profile import GrammarProfile, profiling_grammar
+from decompyle3.parsers.segment import segmenting, using_segments
+from decompyle3.report import RunReport
 from decompyle3.semantics import pysource
 from decompyle3.semantics.fragments import code_deparse as code_deparse_fragments
 from decompyle3.semantics.linemap import deparse_code_with_map
 from decompyle3.semantics.pysource import PARSER_DEFAULT_DEBUG, code_deparse
+from decompyle3.timing import phase, timed_phases
 from decompyle3.version import __version__
 
 # from decompyle3.linenumbers import line_number_mapping
@@ -60,6 +77,15 @@ def syntax_check(filename: str) -> bool:
     return valid
 
 
+def last_line(e: BaseException) -> str:
+    """
+    Return the last non-blank line of the message for `e`. For a parse
+    error this is the summary that follows the listing of tokens.
+    """
+    lines = [line for line in str(e).split("\n") if line.strip()]
+    return lines[-1] if lines else type(e).__name__
+
+
 def decompile(
     co,
     bytecode_version: Tuple[int] = PYTHON_VERSION_TRIPLE,
@@ -186,6 +212,21 @@ def compile_file(source_path: str) -> str:
     return bytecode_path
 
 
+def _shows_debug_output(showasm, showast, showgrammar) -> bool:
+    """
+    Return True if any of the debug options would write something
+    besides the decompiled source.
+    """
+    return bool(
+        showasm
+        or any(showast.values())
+        or (
+            isinstance(showgrammar, dict)
+            and any(showgrammar.get(opt) for opt in ("reduce", "rules", "transition"))
+        )
+    )
+
+
 def decompile_file(
     filename: str,
     outstream: Optional[TextIO] = None,
@@ -197,17 +238,135 @@ def decompile_file(
     do_fragments=False,
     start_offset=0,
     stop_offset=-1,
+    cache: Optional[DecompileCache] = None,
 ) -> Any:
     """
     decompile Python byte-code file (.pyc). Return objects to
-    all of the deparsed objects found in `filename`.
+    all of the deparsed objects found in `filename`. `filename` can
+    also name a bytecode file inside a zip archive such as a wheel or
+    egg; see decompyle3.archive.
+
+    If `cache` is given, results are looked up there first and, on a
+    hit, the stored source and line map are written without scanning or
+    parsing anything. The objects returned are then CachedDeparse
+    objects rather than deparsed objects. Debug output and fragments
+    are never cached.
     """
 
     filename = check_object_path(filename)
-    code_objects = {}
-    version, timestamp, magic_int, co, is_pypy, source_size, _ = load_module(
-        filename, code_objects
+
+    if (
+        cache is None
+        or do_fragments
+        or _shows_debug_output(showasm, showast, showgrammar)
+    ):
+        return _decompile_file(
+            filename,
+            outstream,
+            showasm,
+            showast,
+            showgrammar,
+            source_encoding,
+            mapstream,
+            do_fragments,
+            start_offset,
+            stop_offset,
+        )
+
+    key = cache.key(
+        read_input(filename),
+        {
+            "source_encoding": source_encoding,
+            "linemaps": bool(mapstream),
+            "start_offset": start_offset,
+            "stop_offset": stop_offset,
+            "segments": segmenting(),
+        },
+    )
+
+    if isinstance(mapstream, str):
+        mapstream = _get_outstream(mapstream)
+    real_out = outstream or sys.stdout
+
+    entry = cache.get(key)
+    if entry is not None:
+        real_out.write(entry["source"])
+        if mapstream:
+            mapstream.write(entry["linemap"])
+        if entry["status"] != "ok":
+            raise CachedDecompileError(entry["error_class"], entry["message"])
+        # As many objects as decompiling gave, so that main() counts the
+        # same whether or not the cache is warm.
+        return [
+            CachedDeparse(outstream, tuple(version), entry["source"])
+            for version in entry["versions"]
+        ]
+
+    out = RecordingStream(real_out)
+    linemap_out = RecordingStream(mapstream) if mapstream else None
+    try:
+        deparsed = _decompile_file(
+            filename,
+            out,
+            showasm,
+            showast,
+            showgrammar,
+            source_encoding,
+            linemap_out,
+            do_fragments,
+            start_offset,
+            stop_offset,
+        )
+    except (ParserError, pysource.SourceWalkerError) as e:
+        cache.put(
+            key,
+            {
+                "status": "failed",
+                "error_class": type(e).__name__,
+                "message": str(e),
+                "source": out.getvalue(),
+                "linemap": linemap_out.getvalue() if linemap_out else "",
+            },
+        )
+        raise
+
+    cache.put(
+        key,
+        {
+            "status": "ok",
+            "versions": [list(d.version) for d in deparsed],
+            "source": out.getvalue(),
+            "linemap": linemap_out.getvalue() if linemap_out else "",
+        },
     )
+    return deparsed
+
+
+def _decompile_file(
+    filename: str,
+    outstream: Optional[TextIO] = None,
+    showasm: Optional[str] = None,
+    showast={},
+    showgrammar=dict(PARSER_DEFAULT_DEBUG),
+    source_encoding=None,
+    mapstream=None,
+    do_fragments=False,
+    start_offset=0,
+    stop_offset=-1,
+) -> Any:
+    """
+    The uncached part of decompile_file().
+    """
+    code_objects = {}
+    archive_path, _ = split_archive_path(filename)
+    with phase("load"):
+        if archive_path is None:
+            loaded = load_module(filename, code_objects)
+        else:
+            loaded = load_module_from_file_object(
+                BytesIO(read_input(filename)), filename, code_objects
+            )
+    version, timestamp, magic_int, co, is_pypy, source_size, _ = loaded
 
     if isinstance(co, list):
         deparsed = []
@@ -255,6 +414,23 @@ def decompile_file(
     return deparsed
 
 
+def open_caches(
+    cache_dir: Optional[str], cache_size: int, parse_cache: bool
+) -> Tuple[Optional[DecompileCache], Optional[ParseCache]]:
+    """
+    Return the result cache and the parse cache that main() uses for
+    these options. Either is None when it is not asked for.
+    """
+    cache = DecompileCache(cache_dir, cache_size) if cache_dir else None
+    tree_cache = None
+    if parse_cache:
+        tree_cache = ParseCache(
+            cache_dir=osp.join(cache_dir, "trees") if cache_dir else None,
+            max_size=cache_size,
+        )
+    return cache, tree_cache
+
+
 # FIXME: combine into an options parameter
 def main(
     in_base: str,
@@ -271,12 +447,40 @@ def main(
     do_fragments=False,
     start_offset: int = 0,
     stop_offset: int = -1,
+    timeout: Optional[float] = None,
+    max_memory: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+    cache_size: int = DEFAULT_CACHE_SIZE,
+    manifest: Optional[Manifest] = None,
+    report_path: Optional[str] = None,
+    parse_cache: bool = False,
+    profile_grammar_path: Optional[str] = None,
+    segments: bool = False,
+    cache: Optional[DecompileCache] = None,
+    tree_cache: Optional[ParseCache] = None,
+    report: Optional[RunReport] = None,
 ) -> Tuple[int, int, int, int]:
     """
     in_base	base directory for input files
     out_base	base directory for output files (ignored when
     files	list of filenames to be uncompyled (relative to in_base)
     outfile	write output to this filename (overwrites out_base)
+    timeout	give up on a file after this many seconds
+    max_memory	give up on a file when it needs this many more MB of memory
+    cache_dir	directory of cached results to reuse and add to
+    cache_size	maximum size in bytes of cache_dir
+    manifest	if given, the outcome of each file is recorded here
+    report_path	if given, append a JSON Lines record for each file here
+    parse_cache	reuse the parse trees of code objects identical to ones
+                already parsed; with cache_dir, some are kept there too
+    profile_grammar_path	if given, write a profile of the grammar rules
+                used in parsing here; see decompyle3.parsers.profile
+    segments	parse long statement sequences a segment at a time; see
+                decompyle3.parsers.segment
+    cache, tree_cache, report	the result cache, parse cache and report
+                to use; by default they are made from cache_dir, parse_cache
+                and report_path. Pass them in to share them over several
+                calls.
 
     For redirecting output to
     - <filename>		outfile=<filename> (out_base is ignored)
@@ -287,6 +491,12 @@ def main(
     verify_failed_files = 0 if do_verify else 0
     current_outfile = outfile
     linemap_stream = None
+    if cache is None and tree_cache is None:
+        cache, tree_cache = open_caches(cache_dir, cache_size, parse_cache)
+    own_report = report is None and report_path is not None
+    if own_report:
+        report = RunReport(report_path)
+    grammar_profile = GrammarProfile() if profile_grammar_path else None
 
     for source_path in source_files:
         compiled_files.append(compile_file(source_path))
@@ -294,12 +504,17 @@ def main(
     for filename in compiled_files:
         infile = osp.join(in_base, filename)
         # print("XXX", infile)
-        if not osp.exists(infile):
+        if not input_exists(infile):
             sys.stderr.write(f"File '{infile}' doesn't exist. Skipped\n")
             continue
 
         if do_linemaps:
-            linemap_stream = infile + ".pymap"
+            if split_archive_path(infile)[0] is None:
+                linemap_stream = infile + ".pymap"
+            else:
+                # We can't write into the archive, so put the line map
+                # where the output goes.
+                linemap_stream = osp.join(out_base or ".", filename) + ".pymap"
             pass
 
         # print (infile, file=sys.stderr)
@@ -328,19 +543,27 @@ def main(
         # print(current_outfile, file=sys.stderr)
 
         # Try to decompile the input file.
+        timer = None
+        verify_failed_before = verify_failed_files
+        if grammar_profile is not None:
+            grammar_profile.filename = infile
         try:
-            deparsed_objects = decompile_file(
-                infile,
-                outstream,
-                showasm,
-                showast,
-                showgrammar,
-                source_encoding,
-                linemap_stream,
-                do_fragments,
-                start_offset,
-                stop_offset,
-            )
+            with file_budget(timeout, max_memory), using_parse_cache(tree_cache), (
+                timed_phases() if report is not None else nullcontext()
+            ) as timer, profiling_grammar(grammar_profile), using_segments(segments):
+                deparsed_objects = decompile_file(
+                    infile,
+                    outstream,
+                    showasm,
+                    showast,
+                    showgrammar,
+                    source_encoding,
+                    linemap_stream,
+                    do_fragments,
+                    start_offset,
+                    stop_offset,
+                    cache,
+                )
             if do_fragments:
                 for deparsed_object in deparsed_objects:
                     last_mod = None
@@ -397,11 +620,25 @@ def main(
                     # sys.stderr.write(f"Ran {deparsed_object.f.name}\n")
                 pass
             tot_files += 1
-        except (ValueError, SyntaxError, ParserError, pysource.SourceWalkerError) as e:
+        except (
+            BudgetExceeded,
+            CachedDecompileError,
+            ValueError,
+            SyntaxError,
+            ParserError,
+            pysource.SourceWalkerError,
+        ) as e:
             sys.stdout.write("\n")
             sys.stderr.write(f"\n# file {infile}\n# {e}\n")
             failed_files += 1
             tot_files += 1
+            if manifest is not None:
+                manifest.record(infile, "failed", last_line(e), current_outfile)
+            if report is not None:
+                status = (
+                    "budget exceeded" if isinstance(e, BudgetExceeded) else "failed"
+                )
+                report.write(infile, status, e, current_outfile, timer and timer.times)
         except KeyboardInterrupt:
             if outfile:
                 outstream.close()
@@ -414,6 +651,12 @@ def main(
             if str(e).startswith("Unsupported Python"):
                 sys.stdout.write("\n")
                 sys.stderr.write(f"\n# Unsupported bytecode in file {infile}\n# {e}\n")
+                if manifest is not None:
+                    manifest.record(infile, "failed", last_line(e), current_outfile)
+                if report is not None:
+                    report.write(
+                        infile, "unsupported", e, current_outfile, timer and timer.times
+                    )
             else:
                 if outfile:
                     outstream.close()
@@ -431,6 +674,17 @@ def main(
         #         sys.stderr.write("\n# %s" % sys.exc_info()[1])
         #         sys.stderr.write("\n# Can't uncompile %s\n" % infile)
         else:  # uncompile successful
+            if manifest is not None:
+                manifest.record(infile, "ok", output=current_outfile)
+            if report is not None:
+                status = (
+                    "verify failed"
+                    if verify_failed_files > verify_failed_before
+                    else "ok"
+                )
+                report.write(
+                    infile, status, output=current_outfile, times=timer and timer.times
+                )
             if current_outfile:
                 outstream.close()
                 okay_files += 1
@@ -467,6 +721,10 @@ def main(
         except Exception:
             pass
         pass
+    if own_report:
+        report.close()
+    if grammar_profile is not None:
+        grammar_profile.write(profile_grammar_path)
     return tot_files, okay_files, failed_files, verify_failed_files
 
 
@@ -0,0 +1,154 @@
+#  Copyright (c) 2024 by Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+A manifest of the files decompiled into an output directory, so that
+later runs over the same inputs need only decompile what has changed.
+
+For each input file, keyed by its absolute path, we record its size,
+modification time, and a hash of its contents, along with the
+outcome of decompiling it and the output file written. Input files can
+be bytecode files inside archives; see decompyle3.archive.
+"""
+
+import hashlib
+import json
+import os
+import os.path as osp
+from typing import Dict, List, Optional, Tuple
+
+from decompyle3.archive import input_exists, input_stat, read_input
+from decompyle3.version import __version__
+
+MANIFEST_NAME = "decompyle3-manifest.json"
+
+
+def file_hash(path: str) -> str:
+    """Return a SHA-256 hex digest of the contents of `path`."""
+    return hashlib.sha256(read_input(path)).hexdigest()
+
+
+class Manifest:
+    """
+    The inputs decompiled into `out_base` and their outcomes.
+
+    `entries` maps the absolute path of an input file to a dictionary
+    with keys "size", "mtime", "sha256", "status" ("ok" or "failed"),
+    "message" (the error for a failure) and "output" (the path of the
+    decompiled file, if any).
+    """
+
+    def __init__(self, out_base: Optional[str] = None):
+        self.out_base = out_base
+        self.entries: Dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, out_base: str) -> "Manifest":
+        """
+        Read the manifest in `out_base`. A missing or unreadable manifest,
+        or one written by a different decompyle3 version, gives an empty
+        manifest, and so everything is decompiled again.
+        """
+        manifest = cls(out_base)
+        try:
+            with open(osp.join(out_base, MANIFEST_NAME), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+        if data.get("version") == __version__:
+            manifest.entries = data.get("files", {})
+        return manifest
+
+    def save(self):
+        path = osp.join(self.out_base, MANIFEST_NAME)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": __version__, "files": self.entries},
+                f,
+                indent=1,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, path)
+
+    def is_unchanged(self, path: str) -> bool:
+        """
+        Return True if the input file `path` is the same as when it was
+        recorded. The size and modification time are checked first; only
+        when those differ do we read the file and compare hashes.
+        """
+        entry = self.entries.get(osp.abspath(path))
+        if entry is None:
+            return False
+        size, mtime = input_stat(path)
+        if size != entry["size"]:
+            return False
+        if mtime == entry["mtime"]:
+            return True
+        if file_hash(path) != entry["sha256"]:
+            return False
+        # Touched but not changed; remember the new time.
+        entry["mtime"] = mtime
+        return True
+
+    def record(
+        self, path: str, status: str, message: str = "", output: Optional[str] = None
+    ):
+        """Record the outcome of decompiling input file `path`."""
+        size, mtime = input_stat(path)
+        self.entries[osp.abspath(path)] = {
+            "size": size,
+            "mtime": mtime,
+            "sha256": file_hash(path),
+            "status": status,
+            "message": message,
+            "output": output and osp.abspath(output),
+        }
+
+    def partition(self, in_base: str, files: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Split `files`, which are relative to `in_base`, into those that
+        need decompiling and those that are unchanged since the last run.
+        """
+        changed, unchanged = [], []
+        for filename in files:
+            if self.is_unchanged(osp.join(in_base, filename)):
+                unchanged.append(filename)
+            else:
+                changed.append(filename)
+        return changed, unchanged
+
+    def remove_deleted(self) -> List[str]:
+        """
+        Forget inputs that no longer exist, and remove the output files
+        written for them. The list of removed inputs is returned.
+        """
+        deleted = [path for path in self.entries if not input_exists(path)]
+        for path in deleted:
+            output = self.entries.pop(path)["output"]
+            if output and osp.exists(output):
+                os.remove(output)
+        return deleted
+
+    def failures(self, in_base: str, files: List[str]) -> List[Tuple[str, str]]:
+        """
+        Return (file, message) for each of `files` that failed when it
+        was recorded.
+        """
+        result = []
+        for filename in files:
+            entry = self.entries[osp.abspath(osp.join(in_base, filename))]
+            if entry["status"] != "ok":
+                result.append((filename, entry["message"]))
+        return result
@@ -0,0 +1,240 @@
+#  Copyright (c) 2024 by Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+A cache of the transformed parse trees of code objects, shared across
+the modules decompiled in a run.
+
+Large code bases have many byte-identical code objects: generated
+__init__ and __repr__ methods, vendored copies of a library, protobuf
+_pb2 modules, and so on. Parsing is the slowest part of decompiling,
+so we parse each distinct code object only once.
+
+Code objects are identified by a fingerprint of their bytecode,
+constants, names, variable names and line-number table. The line
+numbers are in there because the source we write out depends on them.
+The fingerprint of a code object includes those of the code objects in
+its constants.
+
+Trees are kept in memory. Given a directory, the trees of code objects
+without nested code objects are also stored there so that later runs
+can use them. Other trees refer to code objects, which we can't
+pickle.
+
+The walker looks up the cache in use, if any, with
+current_parse_cache(). Code run in the body of
+
+    with using_parse_cache(cache):
+        ...
+
+uses `cache`.
+"""
+
+import hashlib
+import pickle
+import sys
+from collections import OrderedDict
+from contextlib import contextmanager
+from copy import copy
+from typing import Optional, Tuple
+
+from xdis import iscode
+
+from decompyle3.cache import DEFAULT_CACHE_SIZE, DecompileCache
+from decompyle3.parsers.treenode import SyntaxTree
+from decompyle3.version import __version__
+
+# The most trees kept in memory.
+DEFAULT_PARSE_CACHE_ENTRIES = 10000
+
+# Goes into the keys, so that trees pickled from some other layout of
+# tokens and tree nodes are not read. Change it when those change.
+TREE_FORMAT = 2
+
+# Code-object attributes that go into a fingerprint, besides co_consts.
+FINGERPRINT_ATTRS = (
+    "co_code",
+    "co_names",
+    "co_varnames",
+    "co_freevars",
+    "co_cellvars",
+    "co_argcount",
+    "co_posonlyargcount",
+    "co_kwonlyargcount",
+    "co_flags",
+    "co_name",
+    "co_firstlineno",
+    "co_lnotab",
+)
+
+
+def const_repr(const) -> str:
+    """
+    Return a string for constant `const` that is the same from run to
+    run, which isn't so for the repr() of a frozenset of strings. The
+    type name keeps 1, 1.0 and True apart.
+    """
+    if isinstance(const, tuple):
+        inner = ", ".join(const_repr(c) for c in const)
+    elif isinstance(const, frozenset):
+        inner = ", ".join(sorted(const_repr(c) for c in const))
+    else:
+        inner = repr(const)
+    return f"{type(const).__name__}({inner})"
+
+
+def update_fingerprint(h, co):
+    """Add the fingerprint of code object `co` to hash `h`."""
+    for name in FINGERPRINT_ATTRS:
+        value = getattr(co, name, None)
+        if not isinstance(value, bytes):
+            value = repr(value).encode("utf-8", "backslashreplace")
+        h.update(b"%d:" % len(value))
+        h.update(value)
+    consts = co.co_consts
+    h.update(b"%d consts:" % len(consts))
+    for const in consts:
+        if iscode(const):
+            h.update(b"code:")
+            update_fingerprint(h, const)
+        else:
+            data = const_repr(const).encode("utf-8", "backslashreplace")
+            h.update(b"%d:" % len(data))
+            h.update(data)
+
+
+def has_nested_code(co) -> bool:
+    """Return True if code object `co` has code objects in its constants."""
+    return any(iscode(const) for const in co.co_consts)
+
+
+def copy_tree(node):
+    """
+    Return a copy of parse tree `node` that can be changed without
+    changing `node`. The walker deletes and replaces nodes, and changes
+    token kinds, as it writes out source.
+    """
+    if isinstance(node, SyntaxTree):
+        node_copy = copy(node)
+        node_copy.data = [copy_tree(child) for child in node.data]
+        return node_copy
+    return copy(node)
+
+
+class TreeCache(DecompileCache):
+    """
+    An on-disk cache of pickled (tree, customize) pairs, evicted in the
+    same way as decompilation results.
+    """
+
+    suffix = ".pickle"
+
+    def encode(self, entry) -> bytes:
+        return pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, data: bytes):
+        try:
+            return pickle.loads(data)
+        except MemoryError:
+            raise
+        except Exception as e:
+            # A cache left by some other version of us, or a damaged file.
+            raise ValueError(str(e))
+
+
+class ParseCache:
+    """
+    Transformed parse trees, and the customizations that parsing made,
+    keyed by code-object fingerprint. At most `max_entries` are kept in
+    memory. If `cache_dir` is given, trees of code objects without
+    nested code objects are also stored there, up to `max_size` bytes.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_PARSE_CACHE_ENTRIES,
+        cache_dir: Optional[str] = None,
+        max_size: int = DEFAULT_CACHE_SIZE,
+    ):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.disk_cache = TreeCache(cache_dir, max_size) if cache_dir else None
+        self.hits = self.misses = 0
+
+    def key(self, co, options: tuple) -> str:
+        """
+        Return the cache key for parsing code object `co` with `options`.
+        `options` holds whatever else the tree depends on, such as the
+        bytecode version and compile mode.
+        """
+        h = hashlib.sha256()
+        h.update(repr((__version__, TREE_FORMAT, sys.version, options)).encode("utf-8"))
+        update_fingerprint(h, co)
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[SyntaxTree, dict]]:
+        """
+        Return a copy of the tree stored under `key`, and the
+        customizations, or None if there isn't one.
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        elif self.disk_cache is not None:
+            entry = self.disk_cache.get(key)
+            if entry is not None:
+                self._remember(key, entry)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        tree, customize = entry
+        return copy_tree(tree), dict(customize)
+
+    def put(self, key: str, co, tree: SyntaxTree, customize: dict):
+        """Store `tree` and `customize` for code object `co` under `key`."""
+        entry = (copy_tree(tree), dict(customize))
+        self._remember(key, entry)
+        if self.disk_cache is not None and not has_nested_code(co):
+            try:
+                self.disk_cache.put(key, entry)
+            except (pickle.PicklingError, AttributeError, TypeError):
+                # Some constant we can't pickle; keep the tree in memory only.
+                pass
+
+    def _remember(self, key: str, entry: tuple):
+        self.entries[key] = entry
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+# The cache in use, or None if we are not caching.
+_parse_cache: Optional[ParseCache] = None
+
+
+def current_parse_cache() -> Optional[ParseCache]:
+    """Return the parse cache in use, or None."""
+    return _parse_cache
+
+
+@contextmanager
+def using_parse_cache(cache: Optional[ParseCache]):
+    """Use `cache` for the code run in the body of a "with" statement."""
+    global _parse_cache
+    outer_cache = _parse_cache
+    _parse_cache = cache
+    try:
+        yield cache
+    finally:
+        _parse_cache = outer_cache
@@ -0,0 +1,161 @@
+#  Copyright (c) 2024 by Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Grammars pruned to the rules that a corpus of bytecode uses.
+
+A parser starts out with every rule in the p_* docstrings of its
+classes: the Python 3.7 rules, the 3.8 changes to them, and the rules
+shared with the lambda and expression grammars. For a given bytecode
+version and compile mode many of these are never used, but the Earley
+parser still predicts them, and makes states for them.
+
+prune_grammars() takes a GrammarProfile of decompiling a corpus and
+writes, for each parser class used, a "pruned grammar": the docstring
+rules that were completed in some parse. There is a parser class for
+each bytecode version, compile mode, and PyPy or not. Rules that can
+derive the empty string are always kept, since spark derives those
+without completing them.
+
+If environment variable DECOMPYLE3_PRUNED_GRAMMARS names a directory of
+pruned grammars, parsers drop the docstring rules that aren't in the
+pruned grammar for their class. This is done once, when the parser is
+made. Code like that of the corpus parses to the same trees as before.
+Code that needs a rule the corpus didn't use no longer parses, so the
+corpus should cover the code to be decompiled.
+
+A pruned grammar records the key of the grammar it was pruned from (see
+grammar_snapshot.grammar_key()) and is ignored once that grammar
+changes.
+
+To prune on a corpus and report the parse time and memory use with and
+without pruning, run:
+
+    python -m decompyle3.bin.prune_grammar OUT_DIR PATH...
+"""
+
+import os
+import os.path as osp
+from typing import Dict, Optional, Set, Tuple
+
+from spark_parser import DEFAULT_DEBUG as PARSER_DEFAULT_DEBUG
+from spark_parser.spark import rule2str
+
+from decompyle3.parsers.grammar_snapshot import grammar_key
+
+PRUNED_GRAMMAR_ENV = "DECOMPYLE3_PRUNED_GRAMMARS"
+
+# Pruned grammars loaded in this process: parser class -> rules to keep,
+# or None if there is no pruned grammar for the class.
+_pruned: Dict[type, Optional[Set[tuple]]] = {}
+
+
+def pruned_grammar_dir() -> Optional[str]:
+    """Return the directory of pruned grammars in use, or None."""
+    return os.environ.get(PRUNED_GRAMMAR_ENV) or None
+
+
+def pruned_grammar_path(grammar_dir: str, cls: type) -> str:
+    return osp.join(grammar_dir, f"{cls.__name__}.grammar")
+
+
+def str2rule(rule_str: str) -> tuple:
+    """The inverse of spark's rule2str()."""
+    lhs, rhs = rule_str.split("::=")
+    return lhs.strip(), tuple(rhs.split())
+
+
+def read_pruned_grammar(path: str) -> Tuple[str, Set[tuple]]:
+    """Return the grammar key and the rules of the pruned grammar in `path`."""
+    key = ""
+    rules = set()
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("# key "):
+                key = line[len("# key ") :]
+            elif line and not line.startswith("#"):
+                rules.add(str2rule(line))
+    return key, rules
+
+
+def write_pruned_grammar(path: str, key: str, rules: Set[tuple], total: int):
+    """Write pruned grammar `rules`, kept out of `total` rules, to `path`."""
+    with open(path, "w") as f:
+        f.write(f"# key {key}\n")
+        f.write(f"# {len(rules)} of {total} rules\n")
+        for rule_str in sorted(rule2str(rule) for rule in rules):
+            f.write(rule_str + "\n")
+
+
+def load_pruned_grammar(parser) -> Optional[Set[tuple]]:
+    """
+    Return the rules of the pruned grammar for the class of `parser`,
+    or None if no pruned grammar is in use for it.
+    """
+    grammar_dir = pruned_grammar_dir()
+    if grammar_dir is None:
+        return None
+    cls = type(parser)
+    if cls not in _pruned:
+        try:
+            key, rules = read_pruned_grammar(pruned_grammar_path(grammar_dir, cls))
+        except (OSError, ValueError):
+            key, rules = "", None
+        _pruned[cls] = rules if key == grammar_key(parser) else None
+    return _pruned[cls]
+
+
+def prune_rules(parser, keep: Set[tuple]):
+    """Remove the rules of `parser` that are not in `keep`."""
+    for lhs, rules in list(parser.rules.items()):
+        pruned = [rule for rule in rules if rule in keep]
+        if len(pruned) < len(rules):
+            for rule in rules:
+                if rule not in keep:
+                    del parser.rule2func[rule]
+                    del parser.rule2name[rule]
+            # A nonterminal can lose all of its rules here and get
+            # some back from grammar customization. Until then, spark
+            # needs it to not be in `rules` at all.
+            if pruned:
+                parser.rules[lhs] = pruned
+            else:
+                del parser.rules[lhs]
+            parser.ruleschanged = True
+
+
+def prune_grammars(profile, grammar_dir: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Write a pruned grammar to `grammar_dir` for each parser class that
+    parsed in grammar profile `profile`. Return, for each class name,
+    the number of rules kept and the number there were.
+    """
+    os.makedirs(grammar_dir, exist_ok=True)
+    counts = {}
+    for cls, completed in profile.completed_rules.items():
+        # A parser of the class as it is made, before customization.
+        p = cls(debug_parser=PARSER_DEFAULT_DEBUG)
+        p.computeNull()
+        rules = {rule for rules in p.rules.values() for rule in rules}
+        keep = {
+            rule
+            for rule in rules
+            if rule in completed or all(p.nullable.get(sym) for sym in rule[1])
+        }
+        write_pruned_grammar(
+            pruned_grammar_path(grammar_dir, cls), grammar_key(p), keep, len(rules)
+        )
+        counts[cls.__name__] = (len(keep), len(rules))
+    return counts
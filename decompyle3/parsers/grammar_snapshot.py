@@ -0,0 +1,172 @@
+#  Copyright (c) 2024 by Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Snapshots of the grammar rules collected from a parser class's p_*
+method docstrings.
+
+Each parser object we create starts by parsing several hundred rules
+out of docstrings. The result depends only on the parser class, so we
+keep it, in memory for the rest of the run and on disk for later runs,
+and hand new parsers a copy.
+
+A snapshot is keyed by a hash of the decompyle3 and spark-parser
+versions, the parser class, and the text of all of its p_* docstrings.
+So any change to the grammar gives a new key and the old snapshot is
+no longer used.
+
+Snapshots are stored in the directory named by environment variable
+DECOMPYLE3_GRAMMAR_CACHE, or else in decompyle3/grammars under the
+user's cache directory. Setting DECOMPYLE3_GRAMMAR_CACHE to the empty
+string keeps snapshots in memory only. Within that directory, each
+pair of decompyle3 and spark-parser versions has a subdirectory of its
+own, so that installs of different versions sharing a cache don't
+remove each other's snapshots.
+"""
+
+import hashlib
+import os
+import os.path as osp
+import pickle
+import tempfile
+from typing import Dict, Optional, Tuple
+
+import spark_parser
+
+from decompyle3.version import __version__
+
+GRAMMAR_CACHE_ENV = "DECOMPYLE3_GRAMMAR_CACHE"
+
+# Snapshots loaded or taken in this process: parser class -> (key, snapshot)
+_snapshots: Dict[type, Tuple[str, dict]] = {}
+
+
+def grammar_cache_dir() -> Optional[str]:
+    """Return the directory snapshots are stored in, or None."""
+    cache_dir = os.environ.get(GRAMMAR_CACHE_ENV)
+    if cache_dir is None:
+        xdg_cache = os.environ.get("XDG_CACHE_HOME") or osp.expanduser("~/.cache")
+        cache_dir = osp.join(xdg_cache, "decompyle3", "grammars")
+    return cache_dir or None
+
+
+def grammar_key(parser) -> str:
+    """Return the snapshot key for the class of `parser`."""
+    cls = type(parser)
+    h = hashlib.sha256()
+    h.update(__version__.encode())
+    h.update(spark_parser.__version__.encode())
+    h.update(f"{cls.__module__}.{cls.__qualname__}".encode())
+    for name in sorted(dir(cls)):
+        if name.startswith("p_"):
+            h.update(name.encode())
+            h.update((getattr(cls, name).__doc__ or "").encode())
+    return h.hexdigest()
+
+
+def _version_dir(cache_dir: str) -> str:
+    return osp.join(cache_dir, f"{__version__}-spark-{spark_parser.__version__}")
+
+
+def _snapshot_path(cache_dir: str, cls: type, key: str) -> str:
+    return osp.join(_version_dir(cache_dir), f"{cls.__name__}-{key[:16]}.pickle")
+
+
+def take_snapshot(parser) -> dict:
+    """Return the rules `parser` has collected, in snapshot form."""
+    return {
+        "rules": parser.rules,
+        "rule2name": parser.rule2name,
+        "list_like_nt": parser.list_like_nt,
+        "optional_nt": parser.optional_nt,
+    }
+
+
+def restore_snapshot(parser, snapshot: dict):
+    """
+    Give `parser` its own copy of the rules in `snapshot`. Rules get
+    added to and removed from later, so nothing may be shared.
+    """
+    parser.rules = {lhs: list(rules) for lhs, rules in snapshot["rules"].items()}
+    parser.rule2name = dict(snapshot["rule2name"])
+    parser.list_like_nt = set(snapshot["list_like_nt"])
+    parser.optional_nt = set(snapshot["optional_nt"])
+    # Rule functions are closures over the parser, so they can't be
+    # kept; preprocess() makes them just as addRule() would have.
+    parser.rule2func = {
+        rule: parser.preprocess(rule, None)[1]
+        for rules in parser.rules.values()
+        for rule in rules
+    }
+    parser.ruleschanged = True
+
+
+def load_grammar_snapshot(parser) -> bool:
+    """
+    Fill in the rules of `parser` from a snapshot if there is one for
+    its class. Return True if that was done.
+    """
+    cls = type(parser)
+    key = grammar_key(parser)
+    cached = _snapshots.get(cls)
+    if cached is not None and cached[0] == key:
+        restore_snapshot(parser, cached[1])
+        return True
+
+    cache_dir = grammar_cache_dir()
+    if cache_dir is None:
+        return False
+    try:
+        with open(_snapshot_path(cache_dir, cls, key), "rb") as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return False
+    _snapshots[cls] = (key, snapshot)
+    restore_snapshot(parser, snapshot)
+    return True
+
+
+def save_grammar_snapshot(parser):
+    """Save a snapshot of the rules `parser` has just collected."""
+    cls = type(parser)
+    key = grammar_key(parser)
+    snapshot = take_snapshot(parser)
+    # Copy, since the parser goes on to change its rules.
+    _snapshots[cls] = (key, pickle.loads(pickle.dumps(snapshot, -1)))
+
+    cache_dir = grammar_cache_dir()
+    if cache_dir is None:
+        return
+    path = _snapshot_path(cache_dir, cls, key)
+    version_dir = osp.dirname(path)
+    try:
+        os.makedirs(version_dir, exist_ok=True)
+        # Write to a temporary file and rename so that another process
+        # never reads a partial snapshot.
+        fd, tmp_path = tempfile.mkstemp(dir=version_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(snapshot, f, -1)
+        os.replace(tmp_path, path)
+    except OSError:
+        return
+
+    # Remove snapshots for earlier edits of this grammar. Those of other
+    # versions are in other directories, and are left alone.
+    prefix = cls.__name__ + "-"
+    for name in os.listdir(version_dir):
+        if name.startswith(prefix) and osp.join(version_dir, name) != path:
+            try:
+                os.remove(osp.join(version_dir, name))
+            except OSError:
+                pass
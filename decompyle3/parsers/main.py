@@ -22,42 +22,84 @@ you'll usually import a call something here, such as:
 """
 
 import sys
+from importlib import import_module
+from typing import Dict, List
 
 from spark_parser import DEFAULT_DEBUG as PARSER_DEFAULT_DEBUG
 from xdis import iscode
 from xdis.version_info import IS_PYPY, PYTHON_VERSION_TRIPLE, version_tuple_to_str
 
-from decompyle3.parsers.p37.heads import (
-    Python37ParserEval,
-    Python37ParserExec,
-    Python37ParserExpr,
-    Python37ParserLambda,
-    Python37ParserSingle,
-)
-from decompyle3.parsers.p38.heads import (
-    Python38ParserEval,
-    Python38ParserExec,
-    Python38ParserExpr,
-    Python38ParserLambda,
-    Python38ParserSingle,
-)
-from decompyle3.parsers.p38pypy.heads import (
-    Python38PyPyParserEval,
-    Python38PyPyParserExec,
-    Python38PyPyParserExpr,
-    Python38PyPyParserLambda,
-    Python38PyPyParserSingle,
-)
+from decompyle3.parsers.segment import parse_segments
 from decompyle3.parsers.treenode import SyntaxTree
 from decompyle3.show import maybe_show_asm
+from decompyle3.timing import phase
+
+# The module holding the parser classes for each (version, is_pypy)
+# pair, and the prefix of their class names. Parser modules are
+# imported only when a parser from them is first asked for, so that
+# decompiling 3.8 bytecode, say, doesn't pay for importing the
+# PyPy grammars.
+PARSER_MODULES = {
+    ((3, 7), False): ("decompyle3.parsers.p37.heads", "Python37"),
+    ((3, 8), False): ("decompyle3.parsers.p38.heads", "Python38"),
+    ((3, 8), True): ("decompyle3.parsers.p38pypy.heads", "Python38PyPy"),
+}
+
+# Suffix of the parser class name for each compile mode.
+COMPILE_MODE_CLASS_SUFFIX = {
+    "exec": "ParserExec",
+    "single": "ParserSingle",
+    "lambda": "ParserLambda",
+    "eval": "ParserEval",
+    "expr": "ParserExpr",
+}
+
+# Parser classes found so far, keyed by (version, compile_mode, is_pypy).
+_parser_classes = {}
+
+
+def get_parser_class(version: tuple, compile_mode: str = "exec", is_pypy=False):
+    """
+    Return the parser class for bytecode `version` and `compile_mode`,
+    importing the module it is in if that hasn't been done yet.
+    An unknown compile mode gives the "single" parser.
+    """
+    version = version[:2]
+    key = (version, compile_mode, is_pypy)
+    parser_class = _parser_classes.get(key)
+    if parser_class is None:
+        if version < (3, 7):
+            raise RuntimeError(f"Unsupported Python version {version}")
+        # We have no separate PyPy 3.7 grammar.
+        module_info = PARSER_MODULES.get((version, is_pypy)) or PARSER_MODULES.get(
+            (version, False)
+        )
+        if module_info is None:
+            raise RuntimeError(
+                f"""Version {version_tuple_to_str(version)} is not supported."""
+            )
+        module_name, class_prefix = module_info
+        suffix = COMPILE_MODE_CLASS_SUFFIX.get(compile_mode, "ParserSingle")
+        parser_class = getattr(import_module(module_name), class_prefix + suffix)
+        _parser_classes[key] = parser_class
+    return parser_class
 
 
 def parse(p, tokens, customize, is_lambda: bool) -> SyntaxTree:
-    was_lambda = p.is_lambda
-    p.is_lambda = is_lambda
-    p.customize_grammar_rules(tokens, customize)
-    tree = p.parse(tokens)
-    p.is_lambda = was_lambda
+    with phase("parse"):
+        was_lambda = p.is_lambda
+        p.is_lambda = is_lambda
+        # Rules added here stay in the parser for the rest of the module;
+        # code objects nested in this one can need them. Spark breaks ties
+        # between customized rules by the order they were added in, so a
+        # parse can depend on what was parsed earlier in the module. It
+        # can't depend on other modules: release_parser() drops the rules.
+        p.customize_grammar_rules(tokens, customize)
+        # Long statement sequences are parsed a segment at a time.
+        tree = None if is_lambda else parse_segments(p, tokens)
+        if tree is None:
+            tree = p.parse(tokens)
+        p.is_lambda = was_lambda
     #  p.cleanup()
     return tree
 
@@ -82,69 +124,56 @@ def get_python_parser(
     explanation of the different modes.
     """
 
-    # FIXME: there has to be a better way...
-    # We could do this as a table lookup, but that would force us
-    # in import all of the parsers all of the time. Perhaps there is
-    # a lazy way of doing the import?
-
     version = version[:2]
-    if version < (3, 7):
-        raise RuntimeError(f"Unsupported Python version {version}")
-    elif version == (3, 7):
-        if compile_mode == "exec":
-            p = Python37ParserExec(debug_parser=debug_parser)
-        elif compile_mode == "single":
-            p = Python37ParserSingle(debug_parser=debug_parser)
-        elif compile_mode == "lambda":
-            p = Python37ParserLambda(debug_parser=debug_parser)
-        elif compile_mode == "eval":
-            p = Python37ParserEval(debug_parser=debug_parser)
-        elif compile_mode == "expr":
-            p = Python37ParserExpr(debug_parser=debug_parser)
-        else:
-            p = Python37ParserSingle(debug_parser)
-    elif version == (3, 8):
-        if compile_mode == "exec":
-            if is_pypy:
-                p = Python38PyPyParserExec(debug_parser=debug_parser)
-            else:
-                p = Python38ParserExec(debug_parser=debug_parser)
-
-        elif compile_mode == "single":
-            if is_pypy:
-                p = Python38PyPyParserSingle(debug_parser=debug_parser)
-            else:
-                p = Python38ParserSingle(debug_parser=debug_parser)
-        elif compile_mode == "lambda":
-            if is_pypy:
-                p = Python38PyPyParserLambda(debug_parser=debug_parser)
-            else:
-                p = Python38ParserLambda(debug_parser=debug_parser)
-        elif compile_mode == "eval":
-            if is_pypy:
-                p = Python38PyPyParserEval(debug_parser=debug_parser)
-            else:
-                p = Python38ParserEval(debug_parser=debug_parser)
-        elif compile_mode == "expr":
-            if is_pypy:
-                p = Python38PyPyParserExpr(debug_parser=debug_parser)
-            else:
-                p = Python38ParserExpr(debug_parser=debug_parser)
-        elif is_pypy:
-            p = Python38PyPyParserSingle(debug_parser)
-        else:
-            p = Python38ParserSingle(debug_parser)
-
-    elif version > (3, 8):
-        raise RuntimeError(
-            f"""Version {version_tuple_to_str(version)} is not supported."""
-        )
-
+    p = get_parser_class(version, compile_mode, is_pypy)(debug_parser=debug_parser)
     p.version = version
     # p.dump_grammar() # debug
     return p
 
 
+# Parsers handed back with release_parser() for reuse, keyed by
+# (version, compile_mode, is_pypy).
+_parser_pool: Dict[tuple, List] = {}
+
+# The most parsers of one kind that we keep for reuse.
+PARSER_POOL_SIZE = 4
+
+
+def acquire_parser(
+    version, debug_parser=PARSER_DEFAULT_DEBUG, compile_mode="exec", is_pypy=False
+):
+    """
+    Return a parser as get_python_parser() does, reusing one handed back
+    with release_parser() if there is one.
+    """
+    key = (version[:2], compile_mode, is_pypy)
+    pooled = _parser_pool.get(key)
+    if pooled:
+        p = pooled.pop()
+    else:
+        p = get_python_parser(version, debug_parser, compile_mode, is_pypy)
+        p.pool_key = key
+        p.pristine_state = p.copy_state()
+    p.debug = debug_parser
+    return p
+
+
+def release_parser(p):
+    """
+    Hand back parser `p`, gotten from acquire_parser(), for reuse. Its
+    attributes go back to what they were when it was made, which drops
+    grammar customizations and the instructions and lambda setting of
+    the last parse.
+    """
+    state = p.pristine_state
+    pooled = _parser_pool.setdefault(p.pool_key, [])
+    if len(pooled) >= PARSER_POOL_SIZE or any(q is p for q in pooled):
+        return
+    p.restore_state(state)
+    p.pristine_state = p.copy_state()
+    pooled.append(p)
+
+
 def python_parser(
     co,
     version: tuple = PYTHON_VERSION_TRIPLE,
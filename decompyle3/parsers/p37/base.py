@@ -18,13 +18,14 @@ Python 3.7 base code. We keep non-custom-generated grammar rules out of this fil
 """
 
 from spark_parser import DEFAULT_DEBUG as PARSER_DEFAULT_DEBUG
-from spark_parser.spark import rule2str
 
-from decompyle3.parsers.parse_heads import ParserError, PythonBaseParser, nop_func
+from decompyle3.parsers.parse_heads import PythonBaseParser, nop_func
 from decompyle3.parsers.reduce_check import (
     and_cond_check,
     and_invalid,
     and_not_check,
+    annotate_tuple_invalid,
+    aug_assign_invalid,
     c_tryelsestmt,
     if_and_elsestmt,
     if_and_stmt,
@@ -32,6 +33,7 @@ from decompyle3.parsers.reduce_check import (
     iflaststmt,
     ifstmt,
     ifstmts_jump_invalid,
+    import_from37_invalid,
     lastc_stmt,
     list_if_not,
     not_or_check,
@@ -1130,6 +1132,9 @@ class Python37BaseParser(PythonBaseParser):
             "and": and_invalid,
             "and_cond": and_cond_check,
             "and_not": and_not_check,
+            "annotate_tuple": annotate_tuple_invalid,
+            "aug_assign1": aug_assign_invalid,
+            "aug_assign2": aug_assign_invalid,
             "if_and_stmt": if_and_stmt,
             "if_and_elsestmtc": if_and_elsestmt,
             "ifelsestmt": ifelsestmt,
@@ -1137,6 +1142,7 @@ class Python37BaseParser(PythonBaseParser):
             "iflaststmt": iflaststmt,
             "iflaststmtc": iflaststmt,
             "if_not_stmtc": ifstmt,
+            "import_from37": import_from37_invalid,
             "ifstmt": ifstmt,
             "ifstmtc": ifstmt,
             "lastc_stmt": lastc_stmt,
@@ -1265,42 +1271,3 @@ class Python37BaseParser(PythonBaseParser):
                         args_pos,
                     )
                     self.add_unique_rule(rule, token.kind, uniq_param, customize)
-
-    def reduce_is_invalid(self, rule, ast, tokens, first, last):
-        lhs = rule[0]
-        n = len(tokens)
-        last = min(last, n - 1)
-        fn = self.reduce_check_table.get(lhs, None)
-        try:
-            if fn:
-                return fn(self, lhs, n, rule, ast, tokens, first, last)
-        except Exception:
-            import sys
-            import traceback
-
-            print(
-                f"Exception in {fn.__name__} {sys.exc_info()[1]}\n"
-                + f"rule: {rule2str(rule)}\n"
-                + f"offsets {tokens[first].offset} .. {tokens[last].offset}"
-            )
-            print(traceback.print_tb(sys.exc_info()[2], -1))
-            raise ParserError(tokens[last], tokens[last].off2int(), self.debug["rules"])
-
-        if lhs in ("aug_assign1", "aug_assign2") and ast[0][0] == "and":
-            return True
-        elif lhs == "annotate_tuple":
-            return not isinstance(tokens[first].attr, tuple)
-        elif lhs == "import_from37":
-            importlist37 = ast[3]
-            alias37 = importlist37[0]
-            if importlist37 == "importlist37" and alias37 == "alias37":
-                store = alias37[1]
-                assert store == "store"
-                return alias37[0].attr != store[0].attr
-            return False
-        elif lhs == "import_as37":
-            return tokens[first + 1].pattr is not None
-        elif lhs == "import_from_as37":
-            return tokens[first + 1].pattr is None
-
-        return False
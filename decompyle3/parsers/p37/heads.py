@@ -21,12 +21,12 @@ from decompyle3.parsers.parse_heads import (
     # PythonParserSimpleStmt
     # PythonParserStmt
 )
-from decompyle3.scanners.tok import Token
+from decompyle3.parsers.reduce_check import call_kw_invalid
 
 
 # Make sure to list Python37... classes first so we prefer to inherit methods from that first.
-# In particular methods like reduce_is_invalid() need to come from there rather than
-# a more generic place.
+# In particular methods like customize_grammar_rules() need to come from there rather
+# than a more generic place.
 
 
 class Python37ParserEval(Python37LambdaParser, PythonParserEval):
@@ -48,17 +48,10 @@ class Python37ParserLambda(Python37LambdaParser, PythonParserLambda):
     def __init__(self, debug_parser):
         PythonParserLambda.__init__(self, debug_parser)
 
-    def reduce_is_invalid(self, rule, ast, tokens, first, last):
-        if rule[0] == "call_kw":
-            # Make sure we don't derive call_kw
-            nt = ast[0]
-            while not isinstance(nt, Token):
-                if nt[0] == "call_kw":
-                    return True
-                nt = nt[0]
-                pass
-            pass
-        return False
+    def customize_grammar_rules(self, tokens, customize):
+        super().customize_grammar_rules(tokens, customize)
+        # This is the only reduction we check in 3.7 lambda expressions.
+        self.reduce_check_table = {"call_kw": call_kw_invalid}
 
 
 # These classes are here just to get parser doc-strings for the
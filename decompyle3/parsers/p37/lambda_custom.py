@@ -18,6 +18,10 @@ Grammar Customization rules for Python 3.7's Lambda expression grammar.
 
 from decompyle3.parsers.p37.base import Python37BaseParser
 from decompyle3.parsers.parse_heads import nop_func
+from decompyle3.parsers.reduce_check import (
+    import_as37_invalid,
+    import_from_as37_invalid,
+)
 
 
 class Python37LambdaCustom(Python37BaseParser):
@@ -28,6 +32,9 @@ class Python37LambdaCustom(Python37BaseParser):
     def customize_grammar_rules_lambda37(self, tokens, customize):
         Python37BaseParser.customize_grammar_rules37(self, tokens, customize)
         self.check_reduce["call_kw"] = "AST"
+        # Unlike 3.8, 3.7 checks these import statements.
+        self.reduce_check_table["import_as37"] = import_as37_invalid
+        self.reduce_check_table["import_from_as37"] = import_from_as37_invalid
 
         # For a rough break out on the first word. This may
         # include instructions that don't need customization,
@@ -563,7 +570,6 @@ class Python37LambdaCustom(Python37BaseParser):
             pass
 
     def custom_classfunc_rule(self, opname, token, customize, next_token):
-
         args_pos, args_kw = self.get_pos_kw(token)
 
         # Additional exprs for * and ** args:
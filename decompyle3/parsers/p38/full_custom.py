@@ -19,6 +19,7 @@ from decompyle3.parsers.p38.lambda_custom import Python38LambdaCustom
 from decompyle3.parsers.parse_heads import PythonBaseParser, nop_func
 from decompyle3.parsers.reduce_check import (  # joined_str_check,
     break_invalid,
+    call_kw_invalid,
     for38_invalid,
     forelse38_invalid,
     if_not_stmtc_invalid,
@@ -48,6 +49,10 @@ class Python38FullCustom(Python38LambdaCustom, PythonBaseParser):
         else:
             return f"{token.kind}_0"
 
+    def remove_unused_rules(self):
+        self.remove_rules_38()
+        super().remove_unused_rules()
+
     def remove_rules_38(self):
         self.remove_rules(
             """
@@ -207,7 +212,6 @@ class Python38FullCustom(Python38LambdaCustom, PythonBaseParser):
 
         self.customize_grammar_rules_lambda38(tokens, customize)
         self.customize_reduce_checks_full38(tokens, customize)
-        self.remove_rules_38()
 
         # include instructions that don't need customization,
         # but we'll do a finer check after the rough breakout.
@@ -761,8 +765,6 @@ class Python38FullCustom(Python38LambdaCustom, PythonBaseParser):
 
         Reductions here are extended from those used in the lambda grammar
         """
-        self.remove_rules_38()
-
         self.check_reduce["and"] = "AST"
         self.check_reduce["and_cond"] = "AST"
         self.check_reduce["and_not"] = "AST"
@@ -809,6 +811,7 @@ class Python38FullCustom(Python38LambdaCustom, PythonBaseParser):
         self.check_reduce["try_elsestmtl38"] = "AST"
 
         self.reduce_check_table["break"] = break_invalid
+        self.reduce_check_table["call_kw"] = call_kw_invalid
         self.reduce_check_table["if_not_stmtc"] = if_not_stmtc_invalid
         self.reduce_check_table["for38"] = for38_invalid
         self.reduce_check_table["c_forelsestmt38"] = forelse38_invalid
@@ -20,7 +20,7 @@ from decompyle3.parsers.parse_heads import (  # FIXME: add; PythonParserSimpleSt
 )
 
 # Make sure to list Python38... classes first so we prefer to inherit methods from that first.
-# In particular methods like reduce_is_invalid() need to come from there rather than
+# In particular methods like customize_grammar_rules() need to come from there rather than
 # a more generic place.
 
 
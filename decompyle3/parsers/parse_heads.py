@@ -22,13 +22,24 @@ However at the top-level they are all the same and share the same start symbol
 and start-symbol grammar rule.
 
 """
+
 # The below adds a special "start" rule for the kind of thing that we want to
 # decompile
 
+import sys
+import traceback
 from typing import Union
 
 from spark_parser import GenericASTBuilder
-
+from spark_parser.spark import rule2str
+
+from decompyle3.parsers.grammar_prune import load_pruned_grammar, prune_rules
+from decompyle3.parsers.grammar_snapshot import (
+    load_grammar_snapshot,
+    save_grammar_snapshot,
+)
+from decompyle3.parsers.profile import current_grammar_profile
+from decompyle3.parsers.token_check import TokenSets
 from decompyle3.parsers.treenode import SyntaxTree
 
 
@@ -49,9 +60,44 @@ class ParserError(Exception):
         )
 
 
+# Parser attributes holding saved parser states rather than describing
+# the grammar. copy_state() leaves these out and restore_state() keeps them.
+SAVED_STATES = ("pristine_state",)
+
+# Tables derived from the grammar when parsing. They are replaced, not
+# changed, when the grammar changes, and are otherwise only added to, so
+# copies of a parser's state can share them.
+PARSE_TABLES = (
+    "cores",
+    "edges",
+    "new2old",
+    "newrules",
+    "nullable",
+    "states",
+    "token_sets",
+)
+
+
+def copy_parser_state(attrs: dict) -> dict:
+    """
+    Return a copy of parser attributes `attrs`, deep enough that changes
+    to the grammar afterwards don't show up in it.
+    """
+    state = {
+        name: (
+            value.copy()
+            if isinstance(value, (dict, list, set)) and name not in PARSE_TABLES
+            else value
+        )
+        for name, value in attrs.items()
+        if name not in SAVED_STATES
+    }
+    state["rules"] = {lhs: list(rules) for lhs, rules in attrs["rules"].items()}
+    return state
+
+
 class PythonBaseParser(GenericASTBuilder):
     def __init__(self, debug_parser, start_symbol, is_lambda=False):
-
         # Note: order of debug_parser, and start_symbol is reverse from above.
         # This is because (at least at one time), start_symbol can be defaulted
         # in the setup, while debug_parser could have been but wasn't.
@@ -109,6 +155,166 @@ class PythonBaseParser(GenericASTBuilder):
         # Placeholder for Python version tuple
         self.version = (None, None)
 
+        # Instructions filled in from scanner
+        self.offset2inst_index = {}
+        self.opc = None
+
+        # Nonterminal -> function checking reductions to it. Grammar
+        # customization fills this in; see reduce_is_invalid().
+        self.reduce_check_table = {}
+
+        # (rule, first, last) -> what reduce_is_invalid() said about the
+        # reduction, for the parse in progress, for "tokens" checks.
+        self.reduce_checks_done = {}
+
+        # While parse_segments() parses a segment of a token stream, the
+        # whole stream and the index in it of the segment's first token.
+        self.segment = None
+
+        # FIRST and FOLLOW sets of the grammar, used to check token
+        # streams before parsing them; see check_tokens(). Those of
+        # customized grammars are worked out from these.
+        self.token_sets = TokenSets(self.rules, start_symbol)
+        # Whether the rules changed in a parse that didn't check tokens.
+        self.token_sets_behind = False
+
+    def copy_state(self) -> dict:
+        """
+        Return a copy of our attributes, deep enough that changes to
+        the grammar afterwards don't show up in it.
+        """
+        return copy_parser_state(self.__dict__)
+
+    def restore_state(self, state: dict):
+        """Set our attributes back to those in `state`, from copy_state()."""
+        saved = {
+            name: getattr(self, name) for name in SAVED_STATES if hasattr(self, name)
+        }
+        self.__dict__ = state
+        self.__dict__.update(saved)
+
+    def collectRules(self):
+        """
+        Collect grammar rules from the p_* method docstrings, reusing a
+        snapshot of an earlier collection for this class when there is
+        one. See decompyle3.parsers.grammar_snapshot.
+        """
+        # Grammar coverage and duplicate-rule reporting both need to see
+        # each rule as it is added. Callers can pass a bool for debug.
+        if self.profile_info is not None or (
+            isinstance(self.debug, dict) and self.debug.get("dups")
+        ):
+            super().collectRules()
+        elif not load_grammar_snapshot(self):
+            super().collectRules()
+            save_grammar_snapshot(self)
+        self.remove_unused_rules()
+
+    def remove_unused_rules(self):
+        """
+        Remove rules just collected that this parser doesn't use.
+        Subclasses add to this. When a pruned grammar is in use, rules
+        not in it are removed; see decompyle3.parsers.grammar_prune.
+        """
+        keep = load_pruned_grammar(self)
+        if keep is not None:
+            prune_rules(self, keep)
+
+    def parse(self, tokens, debug=None):
+        """
+        Parse `tokens`, recording what the parser does when a grammar
+        profile is in use. See decompyle3.parsers.profile.
+        """
+        self.reduce_checks_done = {}
+        try:
+            self.check_tokens(tokens)
+            profile = current_grammar_profile()
+            if profile is None:
+                return super().parse(tokens, debug)
+            with profile.parsing(self, tokens):
+                return super().parse(tokens, debug)
+        finally:
+            self.reduce_checks_done = {}
+
+    def check_tokens(self, tokens):
+        """
+        Raise a ParserError at the first token in `tokens` that can't
+        come where it is in anything the grammar derives. This is much
+        quicker than a parse that fails. No error stacks are shown for
+        it, since those come from a parse. When reductions are shown,
+        the parser finds the error instead, so that they all are.
+        See decompyle3.parsers.token_check.
+        """
+        if self.debug["reduce"]:
+            self.token_sets_behind |= self.ruleschanged
+            return
+        # The sets only need working out again when the rules have
+        # changed since the last check; parsing clears ruleschanged.
+        if self.ruleschanged or self.token_sets_behind:
+            self.token_sets = self.token_sets.updated(self.rules)
+            self.token_sets_behind = False
+        i = self.token_sets.first_invalid_token(tokens)
+        if i is not None:
+            self.error(tokens, i)
+
+    def reduce_is_invalid(self, rule, ast, tokens, first: int, last: int) -> bool:
+        """
+        Return True if the reduction by `rule` of the tokens from
+        `first` to `last` should not be made. `ast` is the tree for the
+        reduction if the rule is checked on its tree.
+
+        The function in reduce_check_table for the rule's nonterminal
+        decides. The parser can ask about the same reduction many times
+        in a parse, so we remember the answers of checks that look only
+        at tokens until the parse is done. Checks on a tree aren't
+        remembered: another derivation of the same tokens can give a
+        different answer.
+        """
+        lhs = rule[0]
+        remember = self.check_reduce.get(lhs) == "tokens"
+        if remember:
+            key = (rule, first, last)
+            invalid = self.reduce_checks_done.get(key)
+            if invalid is not None:
+                return invalid
+        fn = self.reduce_check_table.get(lhs)
+        if fn is None:
+            invalid = False
+        else:
+            if self.segment is not None:
+                # Checks look at the tokens around a reduction, so they
+                # get the whole stream rather than the segment.
+                tokens, start = self.segment
+                first += start
+                last += start
+            n = len(tokens)
+            last = min(last, n - 1)
+            try:
+                invalid = bool(fn(self, lhs, n, rule, ast, tokens, first, last))
+            except MemoryError:
+                # Not a bug in the check: we are over the --max-memory
+                # budget, which file_budget() reports.
+                raise
+            except Exception:
+                print(
+                    f"Exception in {fn.__name__} {sys.exc_info()[1]}\n"
+                    + f"rule: {rule2str(rule)}\n"
+                    + f"offsets {tokens[first].offset} .. {tokens[last].offset}"
+                )
+                traceback.print_tb(sys.exc_info()[2], -1)
+                raise ParserError(
+                    tokens[last], tokens[last].inst_offset, self.debug["rules"]
+                )
+        if remember:
+            self.reduce_checks_done[key] = invalid
+        return invalid
+
+    def makeSet(self, tokens, sets, i):
+        super().makeSet(tokens, sets, i)
+        profile = current_grammar_profile()
+        if profile is not None:
+            profile.count_set(self, sets, i)
+
     def ast_first_offset(self, ast) -> Union[int, str]:
         return ast.offset if hasattr(ast, "offset") else self.ast_first_offset(ast[0])
 
@@ -206,13 +412,14 @@ class PythonBaseParser(GenericASTBuilder):
             pass
         if start >= 0:
             err_token = instructions[index]
-            print("Instruction context:")
-            for i in range(start, finish):
-                if i != index:
-                    indent = "   "
-                else:
-                    indent = "-> "
-                print("%s%s" % (indent, instructions[i]))
+            if self.debug.get("context"):
+                print("Instruction context:")
+                for i in range(start, finish):
+                    if i != index:
+                        indent = "   "
+                    else:
+                        indent = "-> "
+                    print("%s%s" % (indent, instructions[i]))
             raise ParserError(err_token, err_token.offset, self.debug["reduce"])
         else:
             raise ParserError(None, -1, self.debug["reduce"])
@@ -265,7 +472,7 @@ class PythonBaseParser(GenericASTBuilder):
         """
         Return the corresponding instruction for this token
         """
-        offset = token.off2int(prefer_last=False)
+        offset = token.first_offset
         return self.insts[self.offset2inst_index[offset]]
 
     def __ambiguity(self, children):
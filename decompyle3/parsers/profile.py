@@ -0,0 +1,290 @@
+#  Copyright (c) 2024 by Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Grammar-level profiling: which rules the Earley parser spends its
+effort on.
+
+When a file is slow to decompile, the time is nearly always in parsing,
+and it is driven by a handful of rules that are predicted or completed
+far more often than the rest, or by a reduction check that is slow or
+called very often. While a GrammarProfile is in use, parsers record:
+
+  * for each parse, the number of Earley items in the chart at each
+    token position, and the number of parser states;
+  * for each rule, how many times it was predicted and completed, and
+    how many completions reduce_is_invalid() rejected;
+  * the time spent checking reductions, charged to the rule checked
+    and to the reduction-check function that checked it.
+
+Code run in the body of
+
+    with profiling_grammar(profile):
+        ...
+
+is profiled into `profile`. Profiling slows parsing down a lot, and
+costs nothing when it is off.
+
+GrammarProfile.write() writes two tab-separated tables with a header
+line, which can be sorted with sort(1) or loaded into a spreadsheet:
+one row per rule, and one row per parse.
+"""
+
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, List, Optional, Set
+
+from spark_parser.spark import rule2str
+
+# Columns of the rule table.
+RULE_COLUMNS = (
+    "rule",
+    "predicted",
+    "completed",
+    "rejected",
+    "check",
+    "check_calls",
+    "check_seconds",
+    "ast_seconds",
+)
+
+# Columns of the parse table. "items_per_token" lists the number of
+# Earley items at each token position, separated by commas.
+PARSE_COLUMNS = (
+    "file",
+    "parser",
+    "start_symbol",
+    "first_offset",
+    "tokens",
+    "items",
+    "max_items",
+    "max_items_offset",
+    "states",
+    "new_states",
+    "seconds",
+    "status",
+    "items_per_token",
+)
+
+
+class RuleCounts:
+    """What happened to one grammar rule in the parses profiled."""
+
+    __slots__ = (
+        "predicted",
+        "completed",
+        "rejected",
+        "check",
+        "check_calls",
+        "check_seconds",
+        "ast_seconds",
+    )
+
+    def __init__(self):
+        self.predicted = self.completed = self.rejected = 0
+        self.check = ""
+        self.check_calls = 0
+        self.check_seconds = self.ast_seconds = 0.0
+
+
+class GrammarProfile:
+    """Counts of parser work, per parse and summed over all parses."""
+
+    def __init__(self):
+        # The input file being decompiled, for the parse table.
+        self.filename = ""
+        # One dictionary per parse, with the keys in PARSE_COLUMNS.
+        self.parses: List[dict] = []
+        # Rule string -> RuleCounts
+        self.rules: Dict[str, RuleCounts] = {}
+        # The parse in progress
+        self.parse_record: Optional[dict] = None
+        # Parser class -> the rules completed in its parses. See
+        # decompyle3.parsers.grammar_prune.
+        self.completed_rules: Dict[type, Set[tuple]] = {}
+
+    def rule_counts(self, p, rule: tuple) -> RuleCounts:
+        """
+        Return the counts for `rule` of parser `p`. The parser works on
+        rules rewritten to remove nullable symbols; we count them under
+        the rule they came from.
+        """
+        name = rule2str(p.new2old.get(rule, rule))
+        counts = self.rules.get(name)
+        if counts is None:
+            counts = self.rules[name] = RuleCounts()
+        return counts
+
+    @contextmanager
+    def parsing(self, p, tokens):
+        """
+        Record what parser `p` does while it parses `tokens` in the
+        body of a "with" statement.
+        """
+        start_states = len(getattr(p, "states", ()))
+        record = {
+            "file": self.filename,
+            "parser": type(p).__name__,
+            "start_symbol": p.start_symbol,
+            "first_offset": tokens[0].offset if tokens else "",
+            "tokens": len(tokens),
+            "items_per_token": [],
+            "status": "failed",
+        }
+        outer_record, self.parse_record = self.parse_record, record
+        # spark calls these for each completion of a rule that has a
+        # reduction check, so timing them times the checks.
+        p.reduce_is_invalid = self.timed_reduce_check(p, p.reduce_is_invalid)
+        p.reduce_ast = self.timed_reduce_ast(p, p.reduce_ast)
+        start = perf_counter()
+        try:
+            yield record
+            record["status"] = "ok"
+        finally:
+            record["seconds"] = perf_counter() - start
+            del p.reduce_is_invalid
+            del p.reduce_ast
+            self.parse_record = outer_record
+            items = record["items_per_token"]
+            record["items"] = sum(items)
+            record["max_items"] = max(items, default=0)
+            record["max_items_offset"] = ""
+            if items:
+                position = items.index(record["max_items"])
+                if position < len(tokens):
+                    record["max_items_offset"] = tokens[position].offset
+            record["states"] = len(getattr(p, "states", ()))
+            record["new_states"] = record["states"] - start_states
+            self.parses.append(record)
+
+    def count_set(self, p, sets: list, i: int):
+        """
+        Record Earley item set sets[i] of parser `p`, which is complete
+        once the parser has made set i + 1 from it.
+        """
+        items = sets[i]
+        self.parse_record["items_per_token"].append(len(items))
+        states = p.states
+        completed = self.completed_rules.setdefault(type(p), set())
+        for state, parent in items:
+            state = states[state]
+            for rule, pos in state.items:
+                if pos == 0:
+                    self.rule_counts(p, rule).predicted += 1
+            if parent != i:
+                for rule in state.complete:
+                    self.rule_counts(p, rule).completed += 1
+                    completed.add(p.new2old.get(rule, rule))
+
+    def timed_reduce_check(self, p, reduce_is_invalid):
+        """Return `reduce_is_invalid` of parser `p`, timed and counted."""
+        check_table = getattr(p, "reduce_check_table", {})
+
+        def timed_reduce_is_invalid(rule, ast, tokens, first, last):
+            start = perf_counter()
+            try:
+                invalid = reduce_is_invalid(rule, ast, tokens, first, last)
+            finally:
+                counts = self.rule_counts(p, rule)
+                counts.check_seconds += perf_counter() - start
+                counts.check_calls += 1
+                fn = check_table.get(rule[0])
+                counts.check = fn.__name__ if fn else "reduce_is_invalid"
+            if invalid:
+                counts.rejected += 1
+            return invalid
+
+        return timed_reduce_is_invalid
+
+    def timed_reduce_ast(self, p, reduce_ast):
+        """
+        Return `reduce_ast` of parser `p`, timed. It builds the tree
+        that "AST" reduction checks look at.
+        """
+
+        def timed_reduce_ast(rule, tokens, item, k, sets):
+            start = perf_counter()
+            try:
+                return reduce_ast(rule, tokens, item, k, sets)
+            finally:
+                self.rule_counts(p, rule).ast_seconds += perf_counter() - start
+
+        return timed_reduce_ast
+
+    def rule_rows(self) -> List[tuple]:
+        """Return the rows of the rule table, most completed first."""
+        rows = [
+            (
+                name,
+                c.predicted,
+                c.completed,
+                c.rejected,
+                c.check,
+                c.check_calls,
+                f"{c.check_seconds:.6f}",
+                f"{c.ast_seconds:.6f}",
+            )
+            for name, c in self.rules.items()
+        ]
+        rows.sort(key=lambda row: (-row[2], -row[1], row[0]))
+        return rows
+
+    def parse_rows(self) -> List[tuple]:
+        """Return the rows of the parse table, in the order parsed."""
+        rows = []
+        for record in self.parses:
+            record = dict(
+                record,
+                seconds=f"{record['seconds']:.6f}",
+                items_per_token=",".join(map(str, record["items_per_token"])),
+            )
+            rows.append(tuple(record[column] for column in PARSE_COLUMNS))
+        return rows
+
+    def write(self, path: str):
+        """
+        Write the rule table to `path` and the parse table to `path`
+        with ".parses" added.
+        """
+        write_table(path, RULE_COLUMNS, self.rule_rows())
+        write_table(path + ".parses", PARSE_COLUMNS, self.parse_rows())
+
+
+def write_table(path: str, columns: tuple, rows: List[tuple]):
+    """Write `rows` to `path` as tab-separated values under a header."""
+    with open(path, "w") as f:
+        f.write("\t".join(columns) + "\n")
+        for row in rows:
+            f.write("\t".join(str(value) for value in row) + "\n")
+
+
+# The profile in use, or None if we are not profiling.
+_profile: Optional[GrammarProfile] = None
+
+
+def current_grammar_profile() -> Optional[GrammarProfile]:
+    """Return the grammar profile in use, or None."""
+    return _profile
+
+
+@contextmanager
+def profiling_grammar(profile: Optional[GrammarProfile]):
+    """Profile parsing into `profile` in the body of a "with" statement."""
+    global _profile
+    outer_profile = _profile
+    _profile = profile
+    try:
+        yield profile
+    finally:
+        _profile = outer_profile
@@ -11,8 +11,13 @@ it checks.
 from decompyle3.parsers.reduce_check.and_check import and_invalid
 from decompyle3.parsers.reduce_check.and_cond_check import and_cond_check
 from decompyle3.parsers.reduce_check.and_not_check import and_not_check
+from decompyle3.parsers.reduce_check.annotate_tuple_check import (
+    annotate_tuple_invalid,
+)
+from decompyle3.parsers.reduce_check.aug_assign_check import aug_assign_invalid
 from decompyle3.parsers.reduce_check.break38_check import break_invalid
 from decompyle3.parsers.reduce_check.c_tryelsestmt import *  # noqa
+from decompyle3.parsers.reduce_check.call_kw_check import call_kw_invalid
 from decompyle3.parsers.reduce_check.for38_check import for38_invalid
 from decompyle3.parsers.reduce_check.forelse38_check import forelse38_invalid
 from decompyle3.parsers.reduce_check.if_and_elsestmt import *  # noqa
@@ -22,6 +27,11 @@ from decompyle3.parsers.reduce_check.ifelsestmt import ifelsestmt
 from decompyle3.parsers.reduce_check.iflaststmt import *  # noqa
 from decompyle3.parsers.reduce_check.ifstmt import *  # noqa
 from decompyle3.parsers.reduce_check.ifstmts_jump import ifstmts_jump_invalid
+from decompyle3.parsers.reduce_check.import37_check import (
+    import_as37_invalid,
+    import_from37_invalid,
+    import_from_as37_invalid,
+)
 from decompyle3.parsers.reduce_check.lastc_stmt import *  # noqa
 from decompyle3.parsers.reduce_check.list_if_not import *  # noqa
 from decompyle3.parsers.reduce_check.not_or_check import *  # noqa
@@ -40,13 +50,19 @@ __all__ = [
     "and_invalid",
     "and_cond_check",
     "and_not_check",
+    "annotate_tuple_invalid",
+    "aug_assign_invalid",
     "break_invalid",
+    "call_kw_invalid",
     "for38_invalid",
     "forelse38_invalid",
     "if_and_stmt",
     "if_not_stmtc_invalid",
     "ifstmts_jump_invalid",
     "ifelsestmt",
+    "import_as37_invalid",
+    "import_from37_invalid",
+    "import_from_as37_invalid",
     "pop_return_check",
     "whilestmt38_check",
 ]
@@ -66,7 +66,7 @@ def and_invalid(
         jump_target = jump.attr
         jump_offset = jump.offset
 
-        if tokens[first].off2int() <= jump_target < tokens[last].off2int():
+        if tokens[first].inst_offset <= jump_target < tokens[last].inst_offset:
             return True
 
         if rule == ("and", ("expr_pjif", "expr_pjif")):
@@ -83,13 +83,13 @@ def and_invalid(
                 # Ok if jump_target jumps to a COME_FROM after
                 # the last instruction or jumps right after the last instruction
                 if last + 1 < n and tokens[last + 1] == "COME_FROM":
-                    return jump_target != tokens[last + 1].off2int()
+                    return jump_target != tokens[last + 1].inst_offset
                 return jump_target + 2 != tokens[last].attr
         elif rule == ("and", ("expr_pjif", "expr", "COME_FROM")):
             return tree[-1].attr != jump_offset
         elif (
             rule == ("and", ("and_parts", "expr"))
-            and jump_target > tokens[last].off2int()
+            and jump_target > tokens[last].inst_offset
             and tokens[last].kind.startswith("JUMP_IF_")
             and jump_target < tokens[last].attr
         ):
@@ -101,5 +101,5 @@ def and_invalid(
             # end_or:
             return False
 
-        return jump_target != tokens[last].off2int()
+        return jump_target != tokens[last].inst_offset
     return False
@@ -13,10 +13,10 @@ def and_not_check(
             return True
         jump_target = jmp.attr
 
-        if tokens[first].off2int() <= jump_target < tokens[last].off2int():
+        if tokens[first].inst_offset <= jump_target < tokens[last].inst_offset:
             return True
         if rule == ("and_not", ("expr_pjif", "expr_pjit")):
             jmp2_target = ast[1][1].attr
             return jump_target != jmp2_target
-        return jump_target != tokens[last].off2int()
+        return jump_target != tokens[last].inst_offset
     return False
@@ -58,7 +58,7 @@ def c_tryelsestmt(self, lhs, n, rule, ast, tokens, first, last):
     except_stmt = except_handler[2]
     if except_stmt in ("c_except_stmts", "except_stmts"):
         first_except = except_stmt[0]
-        first_except_offset = first_except.first_child().off2int(prefer_last=False)
+        first_except_offset = first_except.first_child().first_offset
         i = self.offset2inst_index[first_except_offset]
         else_offset = leading_jump.attr
         inst = self.insts[i]
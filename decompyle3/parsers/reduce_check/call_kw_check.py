@@ -0,0 +1,27 @@
+#  Copyright (c) 2024 Rocky Bernstein
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from decompyle3.scanners.tok import Token
+
+
+def call_kw_invalid(
+    self, lhs: str, n: int, rule, tree, tokens: list, first: int, last: int
+) -> bool:
+    # Make sure we don't derive call_kw
+    nt = tree[0]
+    while not isinstance(nt, Token):
+        if nt[0] == "call_kw":
+            return True
+        nt = nt[0]
+    return False
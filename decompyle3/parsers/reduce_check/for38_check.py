@@ -13,8 +13,6 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from decompyle3.scanners.tok import off2int
-
 
 def for38_invalid(
     self, lhs: str, n: int, rule, tree, tokens: list, first: int, last: int
@@ -23,13 +21,13 @@ def for38_invalid(
     jumps within the "for" never go past the "FOR_ITER" offset.
     """
 
-    first_offset = tokens[first].off2int(prefer_last=False)
-    last_offset = tokens[last].off2int(prefer_last=False)
+    first_offset = tokens[first].first_offset
+    last_offset = tokens[last].first_offset
     if last_offset == -1:
-        last_offset = tokens[last - 1].off2int(prefer_last=False)
+        last_offset = tokens[last - 1].first_offset
 
     start = self.offset2inst_index[first_offset]
-    end = off2int(self.offset2inst_index[last_offset], prefer_last=True)
+    end = self.offset2inst_index[last_offset]
 
     # In the loop below, we expect the first "FOR_ITER" to
     # be before any jumps that go to the end of it (in the case of "for")
@@ -24,7 +24,7 @@ def forelse38_invalid(
 
     saw_break = False
     saw_break_to_last = False
-    last_offset = tokens[last].off2int()
+    last_offset = tokens[last].inst_offset
 
     # for i in range(first, last):
     #     print(tokens[i])
@@ -32,12 +32,12 @@ def forelse38_invalid(
     else_start = None
     for node in tree:
         if node.kind.startswith("else"):
-            else_start = node.first_child().off2int()
+            else_start = node.first_child().inst_offset
     assert else_start is not None
 
     for i in range(first, last):
         t = tokens[i]
-        if t.off2int() >= else_start:
+        if t.inst_offset >= else_start:
             break
         if t == "BREAK_LOOP":
             if else_start <= t.attr < last_offset:
@@ -17,7 +17,7 @@ def if_and_elsestmt(
     self, lhs: str, n: int, rule, ast, tokens: list, first: int, last: int
 ) -> bool:
     # Make sure jumps don't extend beyond the end of the if statement.
-    last_offset = tokens[last].off2int()
+    last_offset = tokens[last].inst_offset
     for i in range(first, last):
         t = tokens[i]
         # instead of POP_JUMP_IF, should we use op attributes?
@@ -31,7 +31,7 @@ def if_and_elsestmt(
                 if tokens[last] == "JUMP_FORWARD":
                     return tokens[last].attr != pjif_target
                 return True
-            elif lhs == "ifstmtc" and tokens[first].off2int() > pjif_target:
+            elif lhs == "ifstmtc" and tokens[first].inst_offset > pjif_target:
                 # A conditional JUMP to the loop is expected for "ifstmtc"
                 return False
             pass
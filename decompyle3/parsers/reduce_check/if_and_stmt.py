@@ -17,7 +17,7 @@ def if_and_stmt(
     self, lhs: str, n: int, rule, ast, tokens: list, first: int, last: int
 ) -> bool:
     # Make sure jumps don't extend beyond the end of the if statement.
-    last_offset = tokens[last].off2int()
+    last_offset = tokens[last].inst_offset
     for i in range(first, last):
         t = tokens[i]
         # instead of POP_JUMP_IF, should we use op attributes?
@@ -31,7 +31,7 @@ def if_and_stmt(
                 if tokens[last] == "JUMP_FORWARD":
                     return tokens[last].attr != pjif_target
                 return True
-            elif lhs == "ifstmtc" and tokens[first].off2int() > pjif_target:
+            elif lhs == "ifstmtc" and tokens[first].inst_offset > pjif_target:
                 # A conditional JUMP to the loop is expected for "ifstmtc"
                 return False
             pass
@@ -43,10 +43,10 @@ def if_and_stmt(
 
     if rule[1][:-1] == ("expr_pjif", "expr", "COME_FROM", "stmts"):
         # POP_JUMP_IF_FALSE should go to the COME_FROM
-        return ast[2].attr != ast[0][1].off2int(prefer_last=False)
+        return ast[2].attr != ast[0][1].first_offset
     else:
         end_if_jump = ast[1]
         end_if_offset = end_if_jump.attr
         # stmts = ast[-2]
         # come_froms = ast[-1]
-        return end_if_offset < tokens[last].off2int(prefer_last=False)
+        return end_if_offset < tokens[last].first_offset
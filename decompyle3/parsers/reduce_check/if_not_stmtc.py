@@ -14,7 +14,7 @@ def if_not_stmtc_invalid(
     # print("XXX2", ifstmts_jumpc)
 
     # Make sure the testexprc does not jump inside the "then"
-    last_offset = tokens[last].off2int()
+    last_offset = tokens[last].inst_offset
     then_jump = testexprc.last_child()
     if not then_jump.kind.startswith("POP_JUMP_IF_"):
         return False
@@ -28,8 +28,8 @@ def ifelsestmt(
     # for t in range(first, last): print(tokens[t])
     # print("="*40)
 
-    first_offset = tokens[first].off2int()
-    last_offset = tokens[last].off2int(prefer_last=False)
+    first_offset = tokens[first].inst_offset
+    last_offset = tokens[last].first_offset
 
     # FIXME: It is conceivable the below could be handled strictly in the grammar.
     # If we have an optional else, then we *must* have a COME_FROM for it.
@@ -68,7 +68,7 @@ def ifelsestmt(
                 #   XX       JUMP_FORWARD         XX+2
                 #   XX+2_00  COME_FROM            XX
                 # and these aren't caught by our "if/then" rules
-                return tokens[last].off2int() != jf_cfs[0].attr
+                return tokens[last].inst_offset != jf_cfs[0].attr
             come_from_target = come_froms[-1].attr
 
         if come_from_target < first_offset:
@@ -139,13 +139,13 @@ def ifelsestmt(
         # If there any instructions in the "then" part that jump to the beginning of the
         # "else" then this is not a proper if/else. Note that we might generalize this
         # to jump *anywhere* in the else body instead of the first instruction.
-        else_start_offset = else_suite.first_child().off2int(prefer_last=False)
+        else_start_offset = else_suite.first_child().first_offset
 
         then_start = tree[1].first_child()
         if then_start is None:
             return False
 
-        then_start_offset = tree[1].first_child().off2int(prefer_last=False)
+        then_start_offset = tree[1].first_child().first_offset
 
         i = self.offset2inst_index[then_start_offset]
         inst = self.insts[i]
@@ -156,7 +156,7 @@ def ifelsestmt(
             inst = self.insts[i]
 
         if last_offset == -1:
-            last_offset = tokens[last - 1].off2int(prefer_last=False)
+            last_offset = tokens[last - 1].first_offset
 
         if else_suite == "else_suitec" and then_end in (
             "jb_elsec",
@@ -169,7 +169,7 @@ def ifelsestmt(
             if come_from in ("come_froms", "_come_froms") and len(come_from):
                 come_from = come_from[-1]
             if come_from == "COME_FROM":
-                if come_from.attr > stmts.first_child().off2int():
+                if come_from.attr > stmts.first_child().inst_offset:
                     return True
                 pass
             pass
@@ -228,7 +228,7 @@ def ifelsestmt(
                 jump_else_end in ("jf_cfs", "come_froms")
                 and jump_else_end[-1] == "COME_FROM"
             ):
-                if jump_else_end[-1].off2int() != jump_target:
+                if jump_else_end[-1].inst_offset != jump_target:
                     return True
 
                 # If the end of the "then" jumps to back to a loop,
@@ -265,7 +265,7 @@ def ifelsestmt(
             if jump_else_end == "come_froms":
                 jump_else_end = jump_else_end.last_child()
             if jump_else_end == "COME_FROM":
-                come_from_offset = jump_else_end.off2int(prefer_last=False)
+                come_from_offset = jump_else_end.first_offset
                 before_come_from = self.insts[
                     self.offset2inst_index[come_from_offset] - 1
                 ]
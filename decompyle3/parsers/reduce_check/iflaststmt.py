@@ -34,7 +34,7 @@ def iflaststmt(
     # if statements that *don't* fall though.
     if tokens[last] == "COME_FROM":
         come_from_offset = tokens[last].attr
-        if tokens[first].off2int() <= come_from_offset <= tokens[last].off2int():
+        if tokens[first].inst_offset <= come_from_offset <= tokens[last].inst_offset:
             return True
 
     if rhs[0:2] in (
@@ -60,13 +60,13 @@ def iflaststmt(
         # If there was backward jump, the LHS would be "iflaststmtc".
         # Note that there might not be a COME_FROM before "stmts" because there can be a fall
         # through to it.
-        stmt_offset = tree[1].first_child().off2int(prefer_last=False)
+        stmt_offset = tree[1].first_child().first_offset
         inst_offset = self.offset2inst_index[stmt_offset]
 
-        test_expr_offset = tree[0].first_child().off2int(prefer_last=False)
+        test_expr_offset = tree[0].first_child().first_offset
         test_inst_offset = self.offset2inst_index[test_expr_offset]
 
-        last_offset = tokens[last].off2int(prefer_last=False)
+        last_offset = tokens[last].first_offset
 
         # Make sure there are *forward* jumps outside offset range of this construct.
         # This helps distinguish:
@@ -153,7 +153,7 @@ def iflaststmt(
 
             if (
                 then_end_come_from == "POP_JUMP_IF_FALSE"
-                and then_end_come_from.attr == tokens[last].off2int()
+                and then_end_come_from.attr == tokens[last].inst_offset
             ):
                 return True
             pass
@@ -162,8 +162,8 @@ def iflaststmt(
             if last == n:
                 last -= 1
             jump_target = if_condition[1].attr
-            first_offset = tokens[first].off2int()
-            if first_offset <= jump_target < tokens[last].off2int():
+            first_offset = tokens[first].inst_offset
+            if first_offset <= jump_target < tokens[last].inst_offset:
                 return True
             # jump_target less than tokens[first] is okay - is to a loop
             # jump_target equal tokens[last] is also okay: normal non-optimized non-loop jump
@@ -190,7 +190,7 @@ def iflaststmt(
             if first > 0 and tokens[first - 1] == "POP_JUMP_IF_FALSE":
                 return tokens[first - 1].attr == jump_target
 
-            if jump_target > tokens[last].off2int():
+            if jump_target > tokens[last].inst_offset:
                 if jump_target == tokens[last - 1].attr:
                     # if c1 [jump] jumps exactly the end of the iflaststmt...
                     return False
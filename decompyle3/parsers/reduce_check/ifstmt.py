@@ -40,7 +40,7 @@ def ifstmt(
         ltm1_index -= 1
     ltm1 = tokens[ltm1_index]
 
-    first_offset = tokens[first].off2int(prefer_last=False)
+    first_offset = tokens[first].first_offset
 
     # The below doesn't work for Example A above
     # # Test that the outermost COME_FROM, if it exists, must be *somewhere*
@@ -103,9 +103,9 @@ def ifstmt(
                 last -= 1
 
             # Get reasonable offset "end if" offset
-            endif_offset = ltm1.off2int(prefer_last=True)
+            endif_offset = ltm1.inst_offset
             if endif_offset == -1:
-                endif_offset = tokens[last - 2].off2int(prefer_last=True)
+                endif_offset = tokens[last - 2].inst_offset
 
             if first_offset <= jump_target < endif_offset:
                 if rule[1] == ("testexpr", "stmts", "come_froms"):
@@ -115,7 +115,7 @@ def ifstmt(
                         come_from_offset = come_froms.first_child()
                     else:
                         assert come_froms.kind.startswith("COME_FROM")
-                        come_from_offset = come_froms.off2int()
+                        come_from_offset = come_froms.inst_offset
                     return jump_target != come_from_offset
                 # FIXME: investigate why this happens for "if"s with EXTENDED_ARG POP_JUMP_IF_FALSE.
                 # An example is decompyle3/semantics/transform.py n_ifelsestmt.py
@@ -123,7 +123,7 @@ def ifstmt(
                     return True
                 pass
 
-            endif_inst_index = self.offset2inst_index[ltm1.off2int(prefer_last=False)]
+            endif_inst_index = self.offset2inst_index[ltm1.first_offset]
 
             # FIXME: RAISE_VARARGS is an instance of a no-follow instruction.
             # Should this be generalized? For example for RETURN ?
@@ -189,7 +189,7 @@ def ifstmt(
     if (
         pop_jump_if is not None
         and ltm1 == "COME_FROM"
-        and ltm1.attr == pop_jump_if.off2int()
+        and ltm1.attr == pop_jump_if.inst_offset
     ):
         return False
 
@@ -199,7 +199,7 @@ def ifstmt(
     # the outer else. So we do this after all of the above and
     # rely on the above COME_FROM test.
 
-    last_offset = tokens[last].off2int()
+    last_offset = tokens[last].inst_offset
     for i in range(first, last):
         t = tokens[i]
         # instead of POP_JUMP_IF, should we use op attributes?
@@ -213,7 +213,7 @@ def ifstmt(
                 if tokens[last] == "JUMP_FORWARD":
                     return tokens[last].attr != pjif_target
                 return True
-            # elif lhs == "ifstmtc" and tokens[first].off2int() > pjif_target:
+            # elif lhs == "ifstmtc" and tokens[first].inst_offset > pjif_target:
             #     # A conditional JUMP to the loop is expected for "ifstmtc"
             #     return True
             pass
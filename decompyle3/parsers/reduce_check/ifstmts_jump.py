@@ -37,7 +37,7 @@ def ifstmts_jump_invalid(
     if jump_token.attr > 256:
         return False
 
-    pop_jump_offset = jump_token.off2int(prefer_last=False)
+    pop_jump_offset = jump_token.first_offset
     if isinstance(come_froms, Token):
         if jump_token.attr < pop_jump_offset and tree[0] != "pass":
             # This is a jump backwards to a loop. All bets are off here when there the
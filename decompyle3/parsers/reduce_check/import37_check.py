@@ -0,0 +1,38 @@
+#  Copyright (c) 2024 Rocky Bernstein
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+def import_as37_invalid(
+    self, lhs: str, n: int, rule, tree, tokens: list, first: int, last: int
+) -> bool:
+    # "import a.b as c" has no "from" list.
+    return tokens[first + 1].pattr is not None
+
+
+def import_from_as37_invalid(
+    self, lhs: str, n: int, rule, tree, tokens: list, first: int, last: int
+) -> bool:
+    return tokens[first + 1].pattr is None
+
+
+def import_from37_invalid(
+    self, lhs: str, n: int, rule, tree, tokens: list, first: int, last: int
+) -> bool:
+    importlist37 = tree[3]
+    alias37 = importlist37[0]
+    if importlist37 == "importlist37" and alias37 == "alias37":
+        store = alias37[1]
+        assert store == "store"
+        return alias37[0].attr != store[0].attr
+    return False
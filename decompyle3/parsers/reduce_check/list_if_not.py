@@ -22,11 +22,7 @@ def list_if_not(
     assert pop_jump_if.kind.startswith("POP_JUMP_IF_TRUE")
     # The jump should not be somewhere inside the list_if_not,
     # unless the list_iter is another "list_if"
-    if (
-        tokens[first].off2int(prefer_last=False)
-        < pop_jump_if.attr
-        < tokens[last].off2int(prefer_last=True)
-    ):
+    if tokens[first].first_offset < pop_jump_if.attr < tokens[last].inst_offset:
         list_iter = tree[2]
         assert list_iter == "list_iter"
         return list_iter[0] != "list_if"
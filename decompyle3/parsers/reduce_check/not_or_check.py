@@ -39,7 +39,7 @@ def not_or_check(
         # solid ground.
 
         # If test jump is a backwards then, we have an "and", not a "not or".
-        first_offset = tokens[first].off2int()
+        first_offset = tokens[first].inst_offset
         if end_token.attr < first_offset:
             return True
         # Similarly if the test jump goes to another jump it is (probably?) an "and".
@@ -50,7 +50,7 @@ def or_check37_invalid(
         if load_global == "LOAD_GLOBAL" and load_global.attr == "AssertionError":
             return True
 
-        first_offset = tokens[first].off2int()
+        first_offset = tokens[first].inst_offset
         jump_if_true_target = expr_pjit[1].attr
         if jump_if_true_target < first_offset:
             return False
@@ -58,7 +58,7 @@ def or_check37_invalid(
         jump_if_false = tokens[last]
         # If the jmp is backwards
         if jump_if_false.kind.startswith("POP_JUMP_IF_FALSE"):
-            jump_if_false_offset = jump_if_false.off2int()
+            jump_if_false_offset = jump_if_false.inst_offset
             if jump_if_false == "POP_JUMP_IF_FALSE_LOOP":
                 # For a backwards loop, well compare to the instruction *after*
                 # then POP_JUMP...
@@ -69,7 +69,7 @@ def or_check37_invalid(
                     <= jump_if_true_target
                     <= jump_if_false_offset + 2
                 )
-                or jump_if_true_target < tokens[first].off2int()
+                or jump_if_true_target < tokens[first].inst_offset
             )
 
     return False
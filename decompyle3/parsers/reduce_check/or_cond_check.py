@@ -18,8 +18,8 @@ def or_cond_check_invalid(
 ) -> bool:
     if rule == ("or_cond", ("or_parts", "expr_pjif", "come_froms")):
         if tokens[last - 1] == "COME_FROM":
-            return tokens[last - 1].attr < tokens[first].off2int()
-    last_offset = tokens[last].off2int()
+            return tokens[last - 1].attr < tokens[first].inst_offset
+    last_offset = tokens[last].inst_offset
     for i in range(first, last):
         t = tokens[i]
         if t.kind.startswith("POP_JUMP_IF"):
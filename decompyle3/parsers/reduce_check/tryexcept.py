@@ -50,12 +50,10 @@ def tryexcept(self, lhs, n, rule, ast, tokens, first, last):
                     if jump_before_finally == "JUMP_FORWARD":
                         # If there is a JUMP_FORWARD before
                         # the END_FINALLY to some jumps place
-                        # beyond tokens[last].off2int() then
+                        # beyond tokens[last].inst_offset then
                         # this is a try/else rather than an
                         # try (no else).
-                        return tokens[i - 1].attr > tokens[last].off2int(
-                            prefer_last=True
-                        )
+                        return tokens[i - 1].attr > tokens[last].inst_offset
                     elif jump_before_finally == "JUMP_LOOP":
                         # If there is a JUMP_LOOP before the
                         # END_FINALLY then this is a looping
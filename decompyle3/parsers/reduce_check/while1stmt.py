@@ -29,7 +29,7 @@ def while1stmt(
         last += 1
     if last == n:
         last -= 1
-    offset = tokens[last].off2int()
+    offset = tokens[last].inst_offset
     assert tokens[first] == "SETUP_LOOP"
 
     # Scan for jumps out of the loop. Skip the initial "SETUP_LOOP" instruction.
@@ -38,7 +38,7 @@ def while1stmt(
     # are considered to break out of the loop.
     if tokens[loop_end] == "JUMP_LOOP":
         loop_end += 1
-    loop_end_offset = tokens[loop_end].off2int(prefer_last=False)
+    loop_end_offset = tokens[loop_end].first_offset
     for t in range(first + 1, loop_end):
         token = tokens[t]
         # token could be a pseudo-op like "LOAD_STR", which is not in
@@ -37,7 +37,7 @@ def whileTruestmt38_check(
         jump_loop = tokens[last]
     if jump_loop == "JUMP_LOOP":
         jump_target = jump_loop.attr
-        if jump_target < tokens[first].off2int(prefer_last=False):
+        if jump_target < tokens[first].first_offset:
             return True
 
         c_stmts = tree[1]
@@ -52,7 +52,7 @@ def whileTruestmt38_check(
             # the loop bound.
 
             # First, see if we have "ifstmt" as the first statement inside "while True"
-            c_stmts_offset = c_stmts.first_child().off2int()
+            c_stmts_offset = c_stmts.first_child().inst_offset
             first_stmt = c_stmts[0]
             while first_stmt in ("_stmts", "stmts"):
                 first_stmt = first_stmt[0]
@@ -64,7 +64,7 @@ def whileTruestmt38_check(
                     # Do we have POP_JUMP_IF with a jump outside of the loop?
                     if (
                         pop_jump_if.kind.startswith("POP_JUMP_IF")
-                        and pop_jump_if.attr > tokens[last].off2int()
+                        and pop_jump_if.attr > tokens[last].inst_offset
                     ):
                         # Fail here, but we expect a "while expr" pattern to succeed elsewhere.
                         return True
@@ -33,7 +33,7 @@ def whilestmt38_check(
         last -= 1
     # In a "while" loop, (in contrast to "for" loop), the loop jump is
     # always to the first offset
-    first_offset = tokens[first].off2int()
+    first_offset = tokens[first].inst_offset
     if tokens[last] == "JUMP_LOOP" and (
         tokens[last].attr == first_offset or tokens[last - 1].attr == first_offset
     ):
@@ -0,0 +1,402 @@
+#  Copyright (c) 2024 by Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Parsing long statement sequences in segments.
+
+The module-level code of generated files, such as settings modules,
+registration tables and protobuf _pb2 descriptors, can give token
+streams of tens of thousands of tokens. Earley parsing time and memory
+grow much faster than linearly in the number of tokens, so we cut long
+streams into segments, parse each one by itself, and join the
+resulting "stmts" trees.
+
+We cut only where nothing carries over from one statement to the next:
+at an instruction that starts a line, that no jump crosses or lands
+on, and where the evaluation stack is empty. Since no jump crosses
+it, every way through the code goes through that instruction, and
+nothing on the stack or in the jumps before it is used after it.
+Jumps cover compound statements, conditional expressions, try blocks
+and the like, so these stay whole, and the stack depth check keeps us
+out of expressions and assignments that span lines. We work out the
+stack depth along the ways control flows, so cutting goes on after
+the places that control flow joins. See cut_offsets().
+
+The grammar is ambiguous in places: the statements after a "try"
+statement can also be read as its "else" part, and those after a
+conditional expression as the body of an "if" on its test. These
+readings join statements that no jump joins, so a cut can split one.
+Whole-stream parsing picks such a reading too, and segments must not
+change the output, so we parse the whole stream instead when a
+segment's statements run across a cut point inside it, or when its
+last statement ends in an open block such as an "else" body that could
+take in the statements of the next segment.
+
+The grammar joins one kind of statement with the lines after it
+without a jump: "import a, b" becomes "import a" followed by an
+"import_cont" for each further name. We don't cut where the tokens of
+a continuation like that start; see continuation_prefixes().
+
+Reduction checks look at the tokens around a reduction, so while a
+segment is parsed they are given the whole stream; see
+PythonBaseParser.reduce_is_invalid().
+
+Segments are parsed one after another, not in parallel. Parsing the
+30 segments of a module of 200 mixed statements takes 0.8 seconds of
+the 3.2 seconds it takes to decompile it, and a worker process would
+need the customized parser, the whole token stream and the scanner's
+state for the code to check reductions; importing decompyle3 in it
+alone takes a quarter of a second. The --jobs option decompiles
+separate files in parallel.
+
+Segments are used only in the body of a
+
+    with using_segments():
+        ...
+
+statement, which the --segments option sets up.
+"""
+
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from xdis.cross_dis import xstack_effect
+
+from decompyle3.parsers.parse_heads import ParserError
+from decompyle3.parsers.treenode import SyntaxTree
+from decompyle3.scanners.tok import Token
+
+# Token streams shorter than this are parsed in one go.
+SEGMENT_MIN_TOKENS = 200
+
+# The number of tokens we aim to have in a segment. A segment ends at
+# the first place we can cut after it has this many tokens. Parsing a
+# module of 300 simple assignments and calls takes about 1 second in
+# segments of 50 tokens, 3 seconds in segments of 200, and over 200
+# seconds in one go.
+SEGMENT_TOKENS = 50
+
+# How instructions that jump change the evaluation stack, as (effect
+# when control falls through, effect when it jumps). xstack_effect()
+# gives the larger of the two. None means we don't follow that way:
+# control doesn't fall through, the jump is to an exception handler or
+# a "finally" block, or it unwinds the block stack.
+JUMP_STACK_EFFECTS = {
+    "CALL_FINALLY": (0, None),
+    "CONTINUE_LOOP": (None, None),
+    "FOR_ITER": (1, -1),
+    "JUMP_ABSOLUTE": (None, 0),
+    "JUMP_FORWARD": (None, 0),
+    "JUMP_IF_FALSE_OR_POP": (-1, 0),
+    "JUMP_IF_TRUE_OR_POP": (-1, 0),
+    "POP_JUMP_IF_FALSE": (-1, -1),
+    "POP_JUMP_IF_TRUE": (-1, -1),
+    "SETUP_ASYNC_WITH": (0, None),
+    "SETUP_EXCEPT": (0, None),
+    "SETUP_FINALLY": (0, None),
+    "SETUP_LOOP": (0, 0),
+    "SETUP_WITH": (1, None),
+}
+
+# xstack_effect() gives the effect of these instructions when an
+# exception is being handled. These are their effects when none is;
+# None means it depends on how we got there.
+STACK_EFFECTS = {
+    "BEGIN_FINALLY": 1,
+    "END_FINALLY": -1,
+    "POP_FINALLY": None,
+    "WITH_CLEANUP_FINISH": -2,
+    "WITH_CLEANUP_START": 1,
+}
+
+# Grammar nonterminals that continue the statement on the line before
+# them, with no jump to join them, and the number of their first token
+# kinds we match to tell where they start.
+CONTINUATIONS = ("import_cont",)
+CONTINUATION_TOKENS = 3
+
+# Grammar nonterminals for blocks of statements, besides those with
+# "stmts" in their names; see ends_in_block().
+BLOCKS = ("c_returns", "else_suite", "else_suitec", "returns")
+
+# Whether long token streams are parsed in segments; see using_segments().
+_segmenting = False
+
+
+def segmenting() -> bool:
+    """Return True if long token streams are parsed in segments."""
+    return _segmenting
+
+
+@contextmanager
+def using_segments(enabled: bool = True):
+    """
+    Parse long token streams in segments, if `enabled`, in the body of a
+    "with" statement.
+    """
+    global _segmenting
+    outer_segmenting = _segmenting
+    _segmenting = enabled
+    try:
+        yield
+    finally:
+        _segmenting = outer_segmenting
+
+
+def stack_depths(insts, opc) -> Optional[List[Optional[int]]]:
+    """
+    Return the evaluation stack depth before each instruction in
+    `insts`, following the ways control flows when no exception is
+    raised. The depth is None for an instruction we don't reach that
+    way, or whose depth we can't tell. None is returned instead of a
+    list if two ways to an instruction give it different depths.
+    """
+    offset2index = {inst.offset: i for i, inst in enumerate(insts)}
+    depths: List[Optional[int]] = [None] * len(insts)
+    depths[0] = 0
+    todo = [0]
+    while todo:
+        i = todo.pop()
+        inst = insts[i]
+        depth = depths[i]
+        jump_effect = None
+        if inst.opcode in opc.JUMP_OPS:
+            effect, jump_effect = JUMP_STACK_EFFECTS.get(inst.opname, (None, None))
+        elif inst.opname in STACK_EFFECTS:
+            effect = STACK_EFFECTS[inst.opname]
+        elif inst.opcode in opc.nofollow:
+            effect = None
+        else:
+            effect = xstack_effect(inst.opcode, opc, inst.arg or 0, jump=False)
+            if effect == -100:
+                effect = None
+        successors = [(i + 1, effect)]
+        if jump_effect is not None:
+            successors.append((offset2index.get(inst.argval), jump_effect))
+        for j, effect in successors:
+            if effect is None or j is None or j >= len(insts):
+                continue
+            if depths[j] is None:
+                depths[j] = depth + effect
+                todo.append(j)
+            elif depths[j] != depth + effect:
+                return None
+    return depths
+
+
+def cut_offsets(insts, opc) -> set:
+    """
+    Return the offsets of the instructions in `insts` before which
+    we can cut the code into separately-parsed statement sequences.
+    """
+    depths = stack_depths(insts, opc)
+    if depths is None:
+        return set()
+
+    # Ranges of offsets spanned by jumps. A jump to the instruction we
+    # cut before crosses the cut, as the COME_FROM tokens for the jump
+    # come before the instruction's own tokens.
+    jump_ranges = []
+    for inst in insts:
+        if inst.opcode in opc.JUMP_OPS and isinstance(inst.argval, int):
+            jump_ranges.append(
+                (min(inst.offset, inst.argval), max(inst.offset, inst.argval))
+            )
+    jump_ranges.sort()
+
+    offsets = set()
+    range_index = 0
+    # The largest end of the jump ranges starting at or before the
+    # current instruction.
+    covered_to = -1
+    for inst, depth in zip(insts, depths):
+        offset = inst.offset
+        while range_index < len(jump_ranges) and jump_ranges[range_index][0] <= offset:
+            covered_to = max(covered_to, jump_ranges[range_index][1])
+            range_index += 1
+        if depth == 0 and inst.starts_line and covered_to < offset:
+            offsets.add(offset)
+    return offsets
+
+
+def token_prefixes(p, symbols, n: int, expanding=frozenset()) -> set:
+    """
+    Return the first `n` token kinds that the sequence of grammar
+    `symbols` can derive in the grammar of parser `p`, as (kinds,
+    complete) pairs. `complete` is True if `kinds` is all that the
+    symbols derive. A nonterminal met again while we expand it ends
+    the kinds early, so that they match more token streams, not fewer.
+    """
+    if not symbols:
+        return {((), True)}
+    if n == 0:
+        return {((), False)}
+    symbol, rest = symbols[0], symbols[1:]
+    if symbol not in p.rules:
+        heads = {((symbol,), True)}
+    elif symbol in expanding:
+        heads = {((), False)}
+    else:
+        heads = set()
+        for _, rhs in p.rules[symbol]:
+            heads |= token_prefixes(p, rhs, n, expanding | {symbol})
+    prefixes = set()
+    for head, complete in heads:
+        if complete:
+            for tail, tail_complete in token_prefixes(
+                p, rest, n - len(head), expanding
+            ):
+                prefixes.add((head + tail, tail_complete))
+        else:
+            prefixes.add((head, False))
+    return prefixes
+
+
+def continuation_prefixes(p) -> set:
+    """
+    Return the tuples of token kinds that a statement continuation in
+    the grammar of parser `p` starts with. We don't cut before tokens
+    that start with one of these.
+    """
+    prefixes = set()
+    for symbol in CONTINUATIONS:
+        if symbol in p.rules:
+            for kinds, _ in token_prefixes(p, (symbol,), CONTINUATION_TOKENS):
+                prefixes.add(kinds)
+    return prefixes
+
+
+def cut_points(p, tokens) -> List[int]:
+    """
+    Return the indices of the tokens in `tokens`, parsed by parser `p`,
+    before which we can cut the stream.
+    """
+    offsets = cut_offsets(p.insts, p.opc)
+    continuations = continuation_prefixes(p)
+    points = []
+    last_offset = -1
+    for i, token in enumerate(tokens):
+        # Pseudo tokens such as COLLECTION_START come before the token
+        # of their instruction, so we cut before the first token for an
+        # instruction.
+        offset = token.first_offset
+        if (
+            i > 0
+            and offset in offsets
+            and offset > last_offset
+            and not any(
+                tuple(t.kind for t in tokens[i : i + len(kinds)]) == kinds
+                for kinds in continuations
+            )
+        ):
+            points.append(i)
+        last_offset = max(last_offset, offset)
+    return points
+
+
+def segment_bounds(tokens, points: List[int]) -> List[Tuple[int, int]]:
+    """
+    Return [start, end) index pairs into `tokens` of segments that end
+    at some of the cut `points`, each with at least SEGMENT_TOKENS
+    tokens but the last.
+    """
+    bounds = []
+    start = 0
+    for i in points:
+        if i - start >= SEGMENT_TOKENS:
+            bounds.append((start, i))
+            start = i
+    bounds.append((start, len(tokens)))
+    return bounds
+
+
+def first_token(node) -> Optional[Token]:
+    """Return the first token in parse tree `node`, or None if it has none."""
+    if isinstance(node, Token):
+        return node
+    for child in node:
+        token = first_token(child)
+        if token is not None:
+            return token
+    return None
+
+
+def ends_in_block(stmt) -> bool:
+    """
+    Return True if the last token of statement `stmt` is in a block of
+    statements nested in it, like the body of an "else".
+    """
+    node = stmt
+    while not isinstance(node, Token):
+        children = [child for child in node if first_token(child) is not None]
+        if not children:
+            return False
+        node = children[-1]
+        if node is not stmt and not isinstance(node, Token):
+            if "stmts" in node.kind or node.kind in BLOCKS:
+                return True
+    return False
+
+
+def parse_segments(p, tokens) -> Optional[SyntaxTree]:
+    """
+    Parse `tokens` with parser `p` a segment at a time and return the
+    joined "stmts" tree. None is returned if we aren't parsing in
+    segments or `tokens` shouldn't be cut, or if a segment doesn't parse
+    to a "stmts" tree of statements that start at its cut points, in
+    which case the whole stream has to be parsed.
+    """
+    if not _segmenting or p.start_symbol != "stmts":
+        return None
+    if len(tokens) < SEGMENT_MIN_TOKENS or not p.insts:
+        return None
+    points = cut_points(p, tokens)
+    bounds = segment_bounds(tokens, points)
+    if len(bounds) < 2:
+        return None
+    debug = p.debug
+    # A segment that doesn't parse isn't an error, since we then parse
+    # the whole stream, so we don't want the parser to report it.
+    p.debug = dict(debug, errorstack=None, context=False)
+    tree = None
+    try:
+        for start, end in bounds:
+            p.segment = (tokens, start)
+            try:
+                segment_tree = p.parse(tokens[start:end])
+            except ParserError:
+                return None
+            if segment_tree != "stmts":
+                return None
+            # A statement that runs over a cut point, such as an "if"
+            # whose "else" takes in the statements after it, would
+            # have been cut short had we cut there. So would one that
+            # ends in a block at the end of the segment, since no jump
+            # marks where the block ends. The whole stream may parse
+            # differently.
+            starts = {id(first_token(stmt)) for stmt in segment_tree}
+            inner = points[bisect_right(points, start) : bisect_left(points, end)]
+            if any(id(tokens[i]) not in starts for i in inner) or (
+                end < len(tokens) and ends_in_block(segment_tree[-1])
+            ):
+                return None
+            if tree is None:
+                tree = segment_tree
+            else:
+                tree.data.extend(segment_tree.data)
+    finally:
+        p.debug = debug
+        p.segment = None
+    return tree
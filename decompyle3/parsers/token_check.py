@@ -0,0 +1,245 @@
+#  Copyright (c) 2024 by Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Checking a token stream against the grammar before parsing it.
+
+An Earley parse that fails usually gets a long way first, and can
+take as long as one that succeeds. Bytecode that we can't decompile,
+obfuscated bytecode especially, often has token sequences that no
+grammar rule could give. We can find many of these with a linear scan.
+
+From the grammar we compute the FIRST set of the start symbol, the
+terminals a derivation of it can begin with, and the FOLLOW set of
+each terminal, the terminals that can come right after it in some
+derivation. The FOLLOW sets include an end marker when the terminal
+can be the last one. Spark matches a token to a terminal by its kind
+alone, so a token stream whose kinds fail these checks can't parse.
+Passing them doesn't mean that the stream parses.
+
+Only the rules of nonterminals that the start symbol can derive are
+used. Computing the sets for a whole grammar takes several
+milliseconds, about as long as spark takes to prepare a customized
+grammar for parsing. But grammar customization only adds rules, so
+the sets for a customized grammar are worked out from those of the
+grammar it started from, by following the effects of the rules added.
+See PythonBaseParser.parse().
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+
+# The bit for the end of the token stream in FOLLOW sets. Terminals
+# get the bits after it.
+END_BIT = 1
+
+
+def add_edges(edges: Dict[str, tuple], new_edges: List[Tuple[str, str]]):
+    """Add (from, to) pairs `new_edges` to `edges`, leaving its tuples alone."""
+    grouped: Dict[str, list] = {}
+    for src, dst in new_edges:
+        grouped.setdefault(src, []).append(dst)
+    for src, dsts in grouped.items():
+        edges[src] = edges.get(src, ()) + tuple(dsts)
+
+
+def propagate(bits: Dict[str, int], edges: Dict[str, tuple], todo: list) -> set:
+    """
+    Add the bits of each symbol in `todo` to those of the symbols that
+    `edges` gives for it, and so on for the symbols whose bits that
+    changes. Returns the symbols whose bits changed.
+    """
+    changed = set()
+    while todo:
+        src = todo.pop()
+        src_bits = bits[src]
+        for dst in edges.get(src, ()):
+            if src_bits & ~bits[dst]:
+                bits[dst] |= src_bits
+                changed.add(dst)
+                todo.append(dst)
+    return changed
+
+
+class TokenSets:
+    """
+    The FIRST set of the start symbol of grammar `rules`, and the
+    FOLLOW sets of its symbols. Sets of terminals are ints, with a bit
+    for each terminal.
+    """
+
+    def __init__(self, rules: Dict[str, list], start: str):
+        self.start = start
+        # The rule lists of the grammar the sets are for.
+        self.rule_lists: Dict[str, list] = {
+            lhs: list(rule_list) for lhs, rule_list in rules.items()
+        }
+        self.bits: Dict[str, int] = {}
+        # The nonterminals that the start symbol derives.
+        self.reachable: Set[str] = {start}
+        self.nullable: Set[str] = set()
+        self.first: Dict[str, int] = {start: 0}
+        self.follow: Dict[str, int] = {start: END_BIT}
+        # Symbol -> the rules of reachable nonterminals using it.
+        self.uses: Dict[str, tuple] = {}
+        # Symbol -> the nonterminals with a rule it can begin.
+        self.begins: Dict[str, tuple] = {}
+        # Symbol -> the symbols it can come right after in a rule.
+        self.precedes: Dict[str, tuple] = {}
+        # Nonterminal -> the symbols that can end one of its rules.
+        self.ends: Dict[str, tuple] = {}
+        self.add_rules(rules, list(rules.get(start, ())))
+
+    def updated(self, rules: Dict[str, list]) -> "TokenSets":
+        """
+        Return the sets for grammar `rules`. If that has only added
+        rules to ours, the sets are worked out from ours.
+        """
+        rule_lists = self.rule_lists
+        if rule_lists.keys() - rules.keys():
+            return TokenSets(rules, self.start)
+        added = []
+        changed = {}
+        for lhs, rule_list in rules.items():
+            old = rule_lists.get(lhs, [])
+            if len(rule_list) == len(old):
+                if rule_list != old:
+                    return TokenSets(rules, self.start)
+                continue
+            if len(rule_list) < len(old) or rule_list[: len(old)] != old:
+                return TokenSets(rules, self.start)
+            added.extend(rule_list[len(old) :])
+            changed[lhs] = list(rule_list)
+        if not changed:
+            return self
+
+        sets = TokenSets.__new__(TokenSets)
+        sets.__dict__ = {
+            name: value.copy() if isinstance(value, (dict, set)) else value
+            for name, value in self.__dict__.items()
+        }
+        sets.rule_lists.update(changed)
+        # Some nonterminals, like "mkfunc", are used in rules before
+        # customization adds rules for them, and so start out as
+        # terminals. Their bits stay in the sets, but no token has them.
+        reached = [
+            rule for rule in added if rule[0] in self.reachable or rule[0] in self.bits
+        ]
+        if not sets.add_rules(rules, reached):
+            return TokenSets(rules, self.start)
+        return sets
+
+    def add_rules(self, rules: Dict[str, list], added: List[tuple]) -> bool:
+        """
+        Update our sets for rules `added` to grammar `rules`, whose
+        nonterminals we have reached. Returns False, leaving the sets
+        unusable, if a symbol used in rules we had becomes nullable.
+        """
+        bits, reachable, nullable = self.bits, self.reachable, self.nullable
+        first, follow, uses = self.first, self.follow, self.uses
+
+        # Rules of nonterminals that become reachable are added too.
+        reachable.update(lhs for lhs, _ in added)
+        todo = list(added)
+        added = []
+        new_uses = []
+        while todo:
+            rule = todo.pop()
+            added.append(rule)
+            for sym in rule[1]:
+                if sym in rules:
+                    if sym not in reachable:
+                        reachable.add(sym)
+                        first.setdefault(sym, 0)
+                        follow.setdefault(sym, 0)
+                        todo.extend(rules[sym])
+                elif sym not in bits:
+                    bits[sym] = first[sym] = END_BIT << (len(bits) + 1)
+                    follow[sym] = 0
+            new_uses.extend((sym, rule) for sym in set(rule[1]))
+        old_uses = set(uses)
+        add_edges(uses, new_uses)
+
+        todo = list(added)
+        while todo:
+            lhs, rhs = todo.pop()
+            if lhs not in nullable and all(sym in nullable for sym in rhs):
+                if lhs in old_uses:
+                    return False
+                nullable.add(lhs)
+                todo.extend(uses.get(lhs, ()))
+
+        new_begins = []
+        new_precedes = []
+        new_ends = []
+        for lhs, rhs in added:
+            for sym in rhs:
+                new_begins.append((sym, lhs))
+                if sym not in nullable:
+                    break
+            for i, sym in enumerate(rhs):
+                for next_sym in rhs[i + 1 :]:
+                    new_precedes.append((next_sym, sym))
+                    if next_sym not in nullable:
+                        break
+                else:
+                    new_ends.append((lhs, sym))
+        add_edges(self.begins, new_begins)
+        add_edges(self.precedes, new_precedes)
+        add_edges(self.ends, new_ends)
+
+        # FIRST of a nonterminal includes FIRST of each symbol that can
+        # begin one of its rules.
+        todo = []
+        for sym, lhs in new_begins:
+            if first[sym] & ~first[lhs]:
+                first[lhs] |= first[sym]
+                todo.append(lhs)
+        first_changed = set(todo) | propagate(first, self.begins, todo)
+
+        # FOLLOW of a symbol includes FIRST of what can come right after
+        # it in a rule, and FOLLOW of the rule's nonterminal if nothing
+        # has to.
+        todo = []
+        for next_sym, sym in new_precedes:
+            if first[next_sym] & ~follow[sym]:
+                follow[sym] |= first[next_sym]
+                todo.append(sym)
+        for next_sym in first_changed:
+            for sym in self.precedes.get(next_sym, ()):
+                if first[next_sym] & ~follow[sym]:
+                    follow[sym] |= first[next_sym]
+                    todo.append(sym)
+        for lhs, sym in new_ends:
+            if follow[lhs] & ~follow[sym]:
+                follow[sym] |= follow[lhs]
+                todo.append(sym)
+        propagate(follow, self.ends, todo)
+        return True
+
+    def first_invalid_token(self, tokens) -> Optional[int]:
+        """
+        Return the index in `tokens` of the first token that can't come
+        where it is, or None. A token that ends the stream but can't
+        end a derivation is invalid too.
+        """
+        bits, follow = self.bits, self.follow
+        allowed = self.first[self.start]
+        for i, token in enumerate(tokens):
+            kind = token.kind
+            if not allowed & bits.get(kind, 0):
+                return i
+            allowed = follow[kind]
+        if tokens and not allowed & END_BIT:
+            return len(tokens) - 1
+        return None
@@ -0,0 +1,108 @@
+#  Copyright (c) 2024 by Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+A machine-readable run report in JSON Lines format: one JSON object
+per input file, written as soon as the file has been handled.
+
+Each record has these keys:
+
+  path         the input file
+  version      bytecode version, e.g. "3.8.0", or null if unknown
+  magic        the bytecode magic number, or null if unknown
+  status       "ok", "failed", "verify failed", "budget exceeded"
+               or "unsupported"
+  error_class  the name of the exception class for a failure, or null
+  error_offset the bytecode offset of a parse error, or null
+  output       the file the source was written to, or null
+  times        seconds spent in each phase; see decompyle3.timing
+"""
+
+import json
+from typing import Optional, Tuple
+
+from xdis.magics import magic2int, magic_int2tuple
+from xdis.version_info import version_tuple_to_str
+
+from decompyle3.archive import read_input
+
+
+def bytecode_magic(path: str) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Return the bytecode version string and magic number of the bytecode
+    file `path`, or None for those we can't determine.
+    """
+    try:
+        magic_int = magic2int(read_input(path)[:4])
+    except (OSError, IndexError, KeyError):
+        return None, None
+    try:
+        version = version_tuple_to_str(magic_int2tuple(magic_int))
+    except KeyError:
+        version = None
+    return version, magic_int
+
+
+def error_class(e: BaseException) -> str:
+    """
+    Return the name of the exception class of `e`. For a failure replayed
+    from the cache, this is the class of the exception seen originally.
+    """
+    return getattr(e, "error_class", type(e).__name__)
+
+
+def error_offset(e: BaseException) -> Optional[int]:
+    """
+    Return the bytecode offset a parse error was found at. The semantic
+    routines wrap the parser's ParserError, keeping the original in
+    attribute "error".
+    """
+    offset = getattr(getattr(e, "error", e), "offset", None)
+    return offset if isinstance(offset, (int, str)) else None
+
+
+class RunReport:
+    """
+    Writes report records to the JSON Lines file `path`. Several
+    processes can append to the same file: each record goes out in a
+    single write to a file opened in append mode.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "ab", buffering=0)
+
+    def write(
+        self,
+        path: str,
+        status: str,
+        error: Optional[BaseException] = None,
+        output: Optional[str] = None,
+        times: Optional[dict] = None,
+    ):
+        version, magic_int = bytecode_magic(path)
+        record = {
+            "path": path,
+            "version": version,
+            "magic": magic_int,
+            "status": status,
+            "error_class": error_class(error) if error is not None else None,
+            "error_offset": error_offset(error) if error is not None else None,
+            "output": output,
+            "times": {name: round(t, 6) for name, t in (times or {}).items()},
+        }
+        self.file.write((json.dumps(record) + "\n").encode("utf-8"))
+
+    def close(self):
+        self.file.close()
@@ -23,7 +23,7 @@ scanners, e.g. for Python 3.7 or 3.8.
 
 from abc import ABC
 from array import array
-from collections import namedtuple
+from bisect import bisect_left
 from types import ModuleType
 from typing import Optional, Union
 
@@ -31,14 +31,21 @@ import xdis
 from xdis import (
     Bytecode,
     canonic_python_version,
-    code2num,
-    extended_arg_val,
     instruction_size,
     next_offset,
 )
 from xdis.version_info import IS_PYPY, version_tuple_to_str
 
+from decompyle3.scanners.insts import (
+    TABLE_MIN_CODE_SIZE,
+    InstructionTable,
+    OffsetIndex,
+    OpcodeIndex,
+    iter_instructions,
+)
+from decompyle3.scanners.intervals import LineTable, PrevOpTable
 from decompyle3.scanners.tok import Token
+from decompyle3.timing import phase
 
 # The byte code versions we support.
 # Note: these all have to be tuples
@@ -72,7 +79,10 @@ class Code:
         for i in dir(co):
             if i.startswith("co_"):
                 setattr(self, i, getattr(co, i))
-        self._tokens, self._customize = scanner.ingest(co, classname, show_asm=show_asm)
+        with phase("scan"):
+            self._tokens, self._customize = scanner.ingest(
+                co, classname, show_asm=show_asm
+            )
 
 
 class Scanner(ABC):
@@ -103,7 +113,9 @@ class Scanner(ABC):
     def build_instructions(self, co):
         """
         Create a list of instructions (a structured object rather than
-        an array of bytes) and store that in self.insts
+        an array of bytes) and store that in self.insts. Large code
+        objects get an InstructionTable, which acts like that list but
+        takes much less memory.
         """
         # FIXME: remove this when all subsidiary functions have been removed.
         # We should be able to get everything from the self.insts list.
@@ -111,17 +123,31 @@ class Scanner(ABC):
 
         bytecode = Bytecode(co, self.opc)
         self.build_prev_op()
-        self.insts = self.remove_extended_args(list(bytecode))
+        instructions = self.remove_extended_args(iter_instructions(bytecode))
+        if len(self.code) >= TABLE_MIN_CODE_SIZE:
+            self.insts = InstructionTable(self.opc, len(self.code))
+            self.insts.extend(instructions)
+            self.inst_offsets = self.insts.offsets
+            self.offset2inst_index = self.insts.offset2index
+            opcodes = self.insts.opcodes
+        else:
+            self.insts = list(instructions)
+            self.inst_offsets = array("l", [inst.offset for inst in self.insts])
+            self.offset2inst_index = OffsetIndex(len(self.code))
+            self.offset2inst_index.add_all(
+                0, self.inst_offsets, [inst.inst_size for inst in self.insts]
+            )
+            opcodes = (inst.opcode for inst in self.insts)
         self.lines = self.build_lines_data(co)
-        self.offset2inst_index = {}
-        for i, inst in enumerate(self.insts):
-            self.offset2inst_index[inst.offset] = i
-            offset = inst.offset
-            inst_size = inst.inst_size
-            while inst_size > 0:
-                self.offset2inst_index[offset] = i
-                offset += 2
-                inst_size -= 2
+
+        # Indexes of the instructions with each opcode, for range
+        # queries. They are built on first use, after ingest() has
+        # finished rewriting instructions.
+        op_offsets = self.prev_op.op_offsets
+        self.op_index = OpcodeIndex(
+            op_offsets, map(self.code.__getitem__, op_offsets), self.get_target
+        )
+        self.inst_index = OpcodeIndex(self.inst_offsets, opcodes, self.get_target)
 
         return bytecode
 
@@ -131,50 +157,22 @@ class Scanner(ABC):
         """
 
         # Offset: lineno pairs, only for offsets which start line.
-        # Locally we use list for more convenient iteration using indices
         linestarts = list(self.opc.findlinestarts(code_obj))
         self.linestarts = dict(linestarts)
-        if not self.linestarts:
-            return []
-
-        # 'List-map' which shows line number of current op and offset of
-        # first op on following line, given offset of op as index
-        lines = []
-        LineTuple = namedtuple("LineTuple", ["l_no", "next"])
-
-        # Iterate through available linestarts, and fill
-        # the data for all code offsets encountered until
-        # last linestart offset
-        _, prev_line_no = linestarts[0]
-        offset = 0
-        for start_offset, line_no in linestarts[1:]:
-            while offset < start_offset:
-                lines.append(LineTuple(prev_line_no, start_offset))
-                offset += 1
-            prev_line_no = line_no
-
-        # Fill remaining offsets with reference to last line number
-        # and code length as start offset of following non-existing line
-        codelen = len(self.code)
-        while offset < codelen:
-            lines.append(LineTuple(prev_line_no, codelen))
-            offset += 1
-        return lines
+
+        # Line number of each offset, and offset of the first op on the
+        # following line, given offset of op as index.
+        return LineTable(linestarts, len(self.code))
 
     def build_prev_op(self):
         """
-        Compose 'list-map' which allows to jump to previous
+        Compose a map which allows to jump to previous
         op, given offset of current op as index.
         """
-        code = self.code
-        codelen = len(code)
+        codelen = len(self.code)
         # 2.x uses prev 3.x uses prev_op. Sigh
         # Until we get this sorted out.
-        self.prev = self.prev_op = [0]
-        for offset in self.op_range(0, codelen):
-            op = code[offset]
-            for _ in range(instruction_size(op, self.opc)):
-                self.prev_op.append(offset)
+        self.prev = self.prev_op = PrevOpTable(self.op_range(0, codelen), codelen)
 
     def is_jump_forward(self, offset: int) -> bool:
         """
@@ -272,23 +270,17 @@ class Scanner(ABC):
 
         if not isinstance(instr, list):
             instr = [instr]
+        opcodes = [op for op in instr if isinstance(op, int)]
+
+        if target is None:
+            offsets = self.op_index.between(opcodes, start, end)
+            return offsets[0] if offsets else None
 
-        result_offset = None
-        current_distance = len(code)
-        for offset in self.op_range(start, end):
-            op = code[offset]
-            if op in instr:
-                if target is None:
-                    return offset
-                dest = self.get_target(offset)
-                if dest == target:
-                    return offset
-                elif not exact:
-                    new_distance = abs(target - dest)
-                    if new_distance < current_distance:
-                        current_distance = new_distance
-                        result_offset = offset
-        return result_offset
+        if exact:
+            offsets = self.op_index.targeting(opcodes, target, start, end)
+            return offsets[0] if offsets else None
+        distance, offsets = self.op_index.nearest(opcodes, target, start, end)
+        return offsets[0] if offsets and distance < len(code) else None
 
     def last_instr(
         self, start: int, end: int, instr, target=None, exact=True
@@ -312,39 +304,22 @@ class Scanner(ABC):
 
         if not isinstance(instr, list):
             instr = [instr]
-
-        result_offset = None
-        current_distance = self.insts[-1].offset - self.insts[0].offset
-        extended_arg = 0
-        # FIXME: use self.insts rather than code[]
-        for offset in self.op_range(start, end):
-            op = code[offset]
-
-            if op == self.opc.EXTENDED_ARG:
-                arg = code2num(code, offset + 1) | extended_arg
-                extended_arg = extended_arg_val(self.opc, arg)
-                continue
-
-            if op in instr:
-                if target is None:
-                    result_offset = offset
-                else:
-                    dest = self.get_target(offset, extended_arg)
-                    if dest == target:
-                        current_distance = 0
-                        result_offset = offset
-                    elif not exact:
-                        new_distance = abs(target - dest)
-                        if new_distance <= current_distance:
-                            current_distance = new_distance
-                            result_offset = offset
-                            pass
-                        pass
-                    pass
-                pass
-            extended_arg = 0
-            pass
-        return result_offset
+        # EXTENDED_ARGs are part of the instruction they extend.
+        opcodes = [
+            op for op in instr if isinstance(op, int) and op != self.opc.EXTENDED_ARG
+        ]
+
+        if target is None:
+            offsets = self.op_index.between(opcodes, start, end)
+            return offsets[-1] if offsets else None
+
+        if exact:
+            offsets = self.op_index.targeting(opcodes, target, start, end)
+            return offsets[-1] if offsets else None
+        # An exact match is nearest, at distance 0.
+        distance, offsets = self.op_index.nearest(opcodes, target, start, end)
+        max_distance = self.insts[-1].offset - self.insts[0].offset
+        return offsets[-1] if offsets and distance <= max_distance else None
 
     def inst_matches(self, start, end, instr, target=None, include_beyond_target=False):
         """
@@ -360,30 +335,21 @@ class Scanner(ABC):
         except Exception:
             instr = [instr]
 
+        opcodes = [op for op in instr if isinstance(op, int)]
+        offsets = self.inst_offsets
+        # From the instruction at `start` through the first one at or
+        # after `end`.
         first = self.offset2inst_index[start]
-        result = []
-        for inst in self.insts[first:]:
-            if inst.opcode in instr:
-                if target is None:
-                    result.append(inst.offset)
-                else:
-                    t = self.get_target(inst.offset)
-                    if include_beyond_target and t >= target:
-                        result.append(inst.offset)
-                    elif t == target:
-                        result.append(inst.offset)
-                        pass
-                    pass
-                pass
-            if isinstance(inst.offset, int) and inst.offset >= end:
-                break
-            pass
-
-        # FIXME: put in a test
-        # check = self.all_instr(start, end, instr, target, include_beyond_target)
-        # assert result == check
-
-        return result
+        last = min(max(first, bisect_left(offsets, end)), len(offsets) - 1)
+        start, stop = offsets[first], offsets[last] + 1
+
+        if target is None:
+            return self.inst_index.between(opcodes, start, stop)
+        return [
+            offset
+            for offset, t in self.inst_index.with_targets(opcodes, start, stop)
+            if t == target or (include_beyond_target and t >= target)
+        ]
 
     # FIXME: this is broken on 3.6+. Replace remaining (2.x-based) calls
     # with inst_matches
@@ -406,32 +372,16 @@ class Scanner(ABC):
         if not isinstance(instr, list):
             instr = [instr]
 
-        result = []
-        extended_arg = 0
-        for offset in self.op_range(start, end):
-            op = code[offset]
-
-            if op == self.opc.EXTENDED_ARG:
-                arg = code2num(code, offset + 1) | extended_arg
-                extended_arg = extended_arg_val(self.opc, arg)
-                continue
-
-            if op in instr:
-                if target is None:
-                    result.append(offset)
-                else:
-                    t = self.get_target(offset, extended_arg)
-                    if include_beyond_target and t >= target:
-                        result.append(offset)
-                    elif t == target:
-                        result.append(offset)
-                        pass
-                    pass
-                pass
-            extended_arg = 0
-            pass
-
-        return result
+        opcodes = [
+            op for op in instr if isinstance(op, int) and op != self.opc.EXTENDED_ARG
+        ]
+        if target is None:
+            return self.op_index.between(opcodes, start, end)
+        return [
+            offset
+            for offset, t in self.op_index.with_targets(opcodes, start, end)
+            if t == target or (include_beyond_target and t >= target)
+        ]
 
     def opname_for_offset(self, offset):
         return self.opc.opname[self.code[offset]]
@@ -451,43 +401,46 @@ class Scanner(ABC):
     def remove_extended_args(self, instructions):
         """Go through instructions removing extended ARG.
         get_instruction_bytes previously adjusted the operand values
-        to account for these"""
-        new_instructions = []
+        to account for these. Instructions are yielded as they are
+        read, so `instructions` can be an iterator"""
+        # Each instruction is a 2-byte code unit.
+        n = len(self.code) // 2
         last_was_extarg = False
-        n = len(instructions)
-        starts_line = False
-        for i, inst in enumerate(instructions):
+        instructions = iter(instructions)
+        inst = next(instructions, None)
+        while inst is not None:
+            next_inst = next(instructions, None)
             if (
                 inst.opname == "EXTENDED_ARG"
-                and i + 1 < n
-                and instructions[i + 1].opname != "MAKE_FUNCTION"
+                and next_inst is not None
+                and next_inst.opname != "MAKE_FUNCTION"
             ):
                 last_was_extarg = True
                 starts_line = inst.starts_line
                 is_jump_target = inst.is_jump_target
                 offset = inst.offset
+                inst = next_inst
                 continue
             if last_was_extarg:
                 # j = self.stmts.index(inst.offset)
                 # self.lines[j] = offset
 
-                new_inst = inst._replace(
-                    starts_line=starts_line,
-                    is_jump_target=is_jump_target,
-                    offset=offset,
-                )
-                inst = new_inst
-                if i < n:
-                    new_prev = self.prev_op[instructions[i].offset]
-                    j = instructions[i + 1].offset
+                new_prev = self.prev_op[inst.offset]
+                if next_inst is not None:
+                    j = next_inst.offset
                     old_prev = self.prev_op[j]
                     while self.prev_op[j] == old_prev and j < n:
                         self.prev_op[j] = new_prev
                         j += 1
+                inst = inst._replace(
+                    starts_line=starts_line,
+                    is_jump_target=is_jump_target,
+                    offset=offset,
+                )
 
             last_was_extarg = False
-            new_instructions.append(inst)
-        return new_instructions
+            yield inst
+            inst = next_inst
 
     def remove_mid_line_ifs(self, ifs):
         """
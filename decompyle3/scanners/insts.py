@@ -0,0 +1,633 @@
+#  Copyright (c) 2024 by Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+A scanner's instructions, kept column by column.
+
+xdis gives us an Instruction namedtuple for each instruction, with
+sixteen fields. For a large code object, those tuples, and a dict
+entry for each offset to find them by, take far more memory and time
+to make than the bytecode they describe. So we keep instructions as
+arrays of offsets, opcodes, operands, line starts and jump targets,
+and keep only the operand values and their string forms as Python
+objects.
+
+Indexing an InstructionTable gives an Inst, a view of a row that
+has the attributes and methods of an xdis Instruction, so code that
+looks at instructions one at a time doesn't have to change. Reading a
+field through a view is slower than reading it from a namedtuple,
+though, so the scanner only uses a table for code objects of at least
+TABLE_MIN_CODE_SIZE bytes, where memory matters more.
+
+OffsetIndex maps an offset to the index of its instruction with an
+array that has an entry for each 2-byte code unit.
+
+OpcodeIndex keeps the offsets of the instructions with each opcode,
+so that the scanner can find the instructions with some opcodes in a
+range of offsets, or the jumps in it to some target, by bisection
+rather than by walking through the code.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from itertools import count, islice, repeat
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from xdis import Bytecode, Instruction, next_offset
+from xdis.bytecode import get_logical_instruction_at_offset, get_optype
+
+# Bits in InstructionTable.flags
+HAS_ARG = 1
+IS_JUMP_TARGET = 2
+HAS_EXTENDED_ARG = 4
+
+# Column value for None in the int columns
+NONE = -1
+
+JUMP_OPTYPES = frozenset(("jabs", "jrel"))
+
+# The number of instructions InstructionTable.extend() reads at a time
+CHUNK_SIZE = 1024
+
+# The size in bytes of the smallest code object that the scanner keeps
+# in an InstructionTable rather than a list of Instructions. On a module
+# with 720KB of bytecode the table holds 32.5MB against the list's
+# 75.1MB, but the test corpus, with its small code objects, scans more
+# slowly with tables.
+TABLE_MIN_CODE_SIZE = 1 << 16
+
+# Instruction fields that are almost always None
+RARE_FIELDS = ("tos_str", "positions", "fallthrough")
+
+EMPTY = array("l")
+
+# opcode module -> the optype of each opcode
+_optypes = {}
+
+
+def optypes(opc) -> list:
+    """Return a list of the optypes of the opcodes of `opc`."""
+    if opc not in _optypes:
+        _optypes[opc] = [get_optype(opcode, opc) for opcode in range(256)]
+    return _optypes[opc]
+
+
+def iter_instructions(bytecode: Bytecode) -> Iterator[Instruction]:
+    """
+    Yield the instructions of xdis Bytecode `bytecode`, as iterating
+    over it does. xdis looks for each offset in a list of the jump
+    targets, which takes time quadratic in the size of the code, so
+    we give it a set.
+    """
+    co, opc = bytecode.codeobj, bytecode.opc
+    code = co.co_code
+    labels = frozenset(opc.findlabels(code, opc))
+    offset = 0
+    while offset < len(code):
+        for inst in get_logical_instruction_at_offset(
+            code,
+            offset,
+            opc,
+            varnames=co.co_varnames,
+            names=co.co_names,
+            constants=co.co_consts,
+            cells=bytecode._cell_names,
+            linestarts=bytecode._linestarts,
+            exception_entries=bytecode.exception_entries,
+            labels=labels,
+        ):
+            yield inst
+        offset = next_offset(inst.opcode, opc, inst.offset)
+
+
+class Inst:
+    """
+    A view of instruction `index` of InstructionTable `table`. It has
+    the fields and methods of an xdis Instruction that we use.
+    """
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: "InstructionTable", index: int):
+        self.table = table
+        self.index = index
+
+    def __repr__(self) -> str:
+        return repr(self.as_instruction())
+
+    def as_instruction(self) -> Instruction:
+        """Return the instruction as an xdis Instruction."""
+        return Instruction(
+            **{field: getattr(self, field) for field in Instruction._fields}
+        )
+
+    @property
+    def opcode(self) -> int:
+        return self.table.opcodes[self.index]
+
+    @property
+    def opname(self) -> str:
+        table = self.table
+        return table.opnames[table.opcodes[self.index]]
+
+    @property
+    def optype(self) -> str:
+        table = self.table
+        return table.optypes[table.opcodes[self.index]]
+
+    @property
+    def offset(self) -> int:
+        return self.table.offsets[self.index]
+
+    @property
+    def inst_size(self) -> int:
+        return self.table.inst_sizes[self.index]
+
+    @property
+    def arg(self) -> Optional[int]:
+        arg = self.table.args[self.index]
+        return None if arg == NONE else arg
+
+    @property
+    def argval(self):
+        table = self.table
+        target = table.jump_targets[self.index]
+        if target != NONE:
+            return target
+        return table.argvals[self.index]
+
+    @property
+    def argrepr(self) -> str:
+        table = self.table
+        argrepr = table.argreprs[self.index]
+        if argrepr is None:
+            return f"to {table.jump_targets[self.index]}"
+        return argrepr
+
+    @property
+    def starts_line(self) -> Optional[int]:
+        line = self.table.starts_lines[self.index]
+        return None if line == NONE else line
+
+    @property
+    def start_offset(self) -> Optional[int]:
+        offset = self.table.start_offsets[self.index]
+        return None if offset == NONE else offset
+
+    @property
+    def has_arg(self) -> bool:
+        return bool(self.table.flags[self.index] & HAS_ARG)
+
+    @property
+    def is_jump_target(self) -> bool:
+        return bool(self.table.flags[self.index] & IS_JUMP_TARGET)
+
+    @property
+    def has_extended_arg(self) -> bool:
+        return bool(self.table.flags[self.index] & HAS_EXTENDED_ARG)
+
+    @property
+    def positions(self):
+        return self.rare_field("positions")
+
+    @property
+    def fallthrough(self):
+        return self.rare_field("fallthrough")
+
+    @property
+    def tos_str(self):
+        return self.rare_field("tos_str")
+
+    def rare_field(self, field: str):
+        rare = self.table.rare.get(self.index)
+        return rare.get(field) if rare else None
+
+    def is_jump(self) -> bool:
+        """
+        Return True if instruction is some sort of jump.
+        """
+        table = self.table
+        return table.optypes[table.opcodes[self.index]] in JUMP_OPTYPES
+
+    def jumps_forward(self) -> bool:
+        """
+        Return True if instruction is a jump forward.
+        """
+        return self.is_jump() and self.offset < self.argval
+
+
+class InstructionTable:
+    """
+    The instructions of a code object whose bytecode is `code_size`
+    bytes long, for opcode module `opc`. Rows are added with extend()
+    or append() and replaced by assigning an Instruction, or anything
+    with its fields, to an index.
+
+    Jump instructions have their target offset in `jump_targets`, and
+    NONE elsewhere. Their `argvals` entry is None, as is their
+    `argreprs` entry when that is just "to <target>".
+    """
+
+    def __init__(self, opc, code_size: int):
+        self.opc = opc
+        self.opnames = opc.opname
+        self.optypes = optypes(opc)
+        self.offsets = array("l")
+        self.opcodes = array("B")
+        self.args = array("q")
+        self.starts_lines = array("l")
+        self.jump_targets = array("l")
+        self.start_offsets = array("l")
+        self.inst_sizes = array("B")
+        self.flags = array("B")
+        self.argvals = []
+        self.argreprs = []
+        # Index -> those RARE_FIELDS of the instruction that aren't
+        # None. For the Python versions we handle, they all are.
+        self.rare = {}
+        self.offset2index = OffsetIndex(code_size)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+        n = len(self.offsets)
+        if isinstance(index, slice):
+            return [Inst(self, i) for i in range(*index.indices(n))]
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("instruction index out of range")
+        return Inst(self, index)
+
+    def __iter__(self) -> Iterator[Inst]:
+        return map(Inst, repeat(self), range(len(self.offsets)))
+
+    def __setitem__(self, index: int, inst):
+        if index < 0:
+            index += len(self.offsets)
+        for column, values in zip(self.columns(), self.column_values([inst])):
+            column[index] = values[0]
+        self.rare.pop(index, None)
+        self.add_rare(index, [inst])
+
+    def append(self, inst):
+        """
+        Add instruction `inst` and the offsets it covers to the table.
+        """
+        self.extend((inst,))
+
+    def extend(self, instructions: Iterable):
+        """
+        Add `instructions` and the offsets they cover to the table.
+        They are read a chunk at a time, so we never have many of them
+        at once.
+        """
+        instructions = iter(instructions)
+        while True:
+            chunk = list(islice(instructions, CHUNK_SIZE))
+            if not chunk:
+                break
+            start = len(self.offsets)
+            values = self.column_values(chunk)
+            for column, column_values in zip(self.columns(), values):
+                if isinstance(column, array):
+                    column.fromlist(column_values)
+                else:
+                    column.extend(column_values)
+            self.add_rare(start, chunk)
+            self.offset2index.add_all(start, values[0], values[6])
+
+    def columns(self) -> tuple:
+        return (
+            self.offsets,
+            self.opcodes,
+            self.args,
+            self.starts_lines,
+            self.jump_targets,
+            self.start_offsets,
+            self.inst_sizes,
+            self.flags,
+            self.argvals,
+            self.argreprs,
+        )
+
+    def column_values(self, chunk: list) -> tuple:
+        """
+        Return lists of the values in each of our columns() for the
+        instructions in `chunk`.
+        """
+        optypes = self.optypes
+        jump_targets = [
+            (
+                inst.argval
+                if optypes[inst.opcode] in JUMP_OPTYPES and isinstance(inst.argval, int)
+                else NONE
+            )
+            for inst in chunk
+        ]
+        return (
+            [inst.offset for inst in chunk],
+            [inst.opcode for inst in chunk],
+            [NONE if inst.arg is None else inst.arg for inst in chunk],
+            [NONE if inst.starts_line is None else inst.starts_line for inst in chunk],
+            jump_targets,
+            [
+                NONE if inst.start_offset is None else inst.start_offset
+                for inst in chunk
+            ],
+            [inst.inst_size for inst in chunk],
+            [
+                (HAS_ARG if inst.has_arg else 0)
+                | (IS_JUMP_TARGET if inst.is_jump_target else 0)
+                | (HAS_EXTENDED_ARG if inst.has_extended_arg else 0)
+                for inst in chunk
+            ],
+            [
+                inst.argval if target == NONE else None
+                for inst, target in zip(chunk, jump_targets)
+            ],
+            [
+                (
+                    None
+                    if target != NONE and inst.argrepr == f"to {target}"
+                    else inst.argrepr
+                )
+                for inst, target in zip(chunk, jump_targets)
+            ],
+        )
+
+    def add_rare(self, start: int, chunk: list):
+        """
+        Record the RARE_FIELDS of the instructions in `chunk`, the first
+        of which is at index `start`, that aren't None.
+        """
+        for index, inst in enumerate(chunk, start):
+            if (
+                inst.tos_str is not None
+                or inst.positions is not None
+                or inst.fallthrough is not None
+            ):
+                self.rare[index] = {
+                    field: getattr(inst, field)
+                    for field in RARE_FIELDS
+                    if getattr(inst, field) is not None
+                }
+
+
+class OffsetIndex(Mapping):
+    """
+    A mapping from the offsets in code `code_size` bytes long to the
+    index of the instruction at each. An instruction with an operand
+    too large for one code unit covers the offsets of its units.
+    """
+
+    def __init__(self, code_size: int):
+        self.indexes = array("l", [NONE]) * ((code_size + 1) // 2)
+
+    def add(self, offset: int, inst_size: int, index: int):
+        """Map offset `offset` and the rest of its instruction to `index`."""
+        unit = offset >> 1
+        self.indexes[unit] = index
+        if inst_size > 2:
+            units = (inst_size + 1) // 2
+            for unit in range(unit + 1, min(unit + units, len(self.indexes))):
+                self.indexes[unit] = index
+
+    def add_all(self, start: int, offsets: list, inst_sizes: list):
+        """
+        Map the offsets of instructions `start`, `start` + 1, ..., which
+        are at `offsets` and have sizes `inst_sizes`.
+        """
+        indexes = self.indexes
+        for index, offset, inst_size in zip(count(start), offsets, inst_sizes):
+            indexes[offset >> 1] = index
+            if inst_size > 2:
+                self.add(offset, inst_size, index)
+
+    def __getitem__(self, offset: int) -> int:
+        try:
+            if offset >= 0 and not offset & 1:
+                index = self.indexes[offset >> 1]
+                if index != NONE:
+                    return index
+        except (IndexError, TypeError):
+            pass
+        raise KeyError(offset)
+
+    def __contains__(self, offset) -> bool:
+        try:
+            return offset >= 0 and not offset & 1 and self.indexes[offset >> 1] != NONE
+        except (IndexError, TypeError):
+            return False
+
+    def __iter__(self) -> Iterator[int]:
+        for unit, index in enumerate(self.indexes):
+            if index != NONE:
+                yield unit << 1
+
+    def __len__(self) -> int:
+        return sum(1 for index in self.indexes if index != NONE)
+
+
+class OpcodeIndex:
+    """
+    The offsets of the instructions with each opcode, given the
+    `offsets` of a code object's instructions, in order, and their
+    `opcodes`. The index is built when first asked for.
+
+    For jump targets, `get_target` gives the target of the instruction
+    at an offset. It is called for the instructions with an opcode the
+    first time targets are asked for with that opcode.
+    """
+
+    def __init__(self, offsets: Iterable[int], opcodes: Iterable[int], get_target):
+        self.all_offsets = offsets
+        self.all_opcodes = opcodes
+        self.get_target = get_target
+        self.offsets: Optional[Dict[int, array]] = None
+        # opcode -> the targets of the instructions in offsets[opcode]
+        self.targets: Dict[int, array] = {}
+        # opcode -> target -> the offsets of the instructions with it
+        self.target_offsets: Dict[int, Dict[int, array]] = {}
+        # opcode -> levels of a merge sort tree of the targets in
+        # targets[opcode]; see nearest_distance().
+        self.target_trees: Dict[int, List[array]] = {}
+
+    def opcode_offsets(self, opcode: int) -> array:
+        if self.offsets is None:
+            offsets: Dict[int, list] = {}
+            for offset, op in zip(self.all_offsets, self.all_opcodes):
+                if op in offsets:
+                    offsets[op].append(offset)
+                else:
+                    offsets[op] = [offset]
+            self.offsets = {op: array("l", offs) for op, offs in offsets.items()}
+        return self.offsets.get(opcode, EMPTY)
+
+    def opcode_targets(self, opcode: int) -> array:
+        if opcode not in self.targets:
+            get_target = self.get_target
+            self.targets[opcode] = array(
+                "l", [get_target(offset) for offset in self.opcode_offsets(opcode)]
+            )
+        return self.targets[opcode]
+
+    def between(self, opcodes: Iterable[int], start: int, end: int) -> List[int]:
+        """
+        Return the offsets from `start` up to `end` of the instructions
+        with one of `opcodes`, in order.
+        """
+        result = []
+        for opcode in set(opcodes):
+            offsets = self.opcode_offsets(opcode)
+            result.extend(
+                offsets[bisect_left(offsets, start) : bisect_left(offsets, end)]
+            )
+        result.sort()
+        return result
+
+    def with_targets(
+        self, opcodes: Iterable[int], start: int, end: int
+    ) -> List[Tuple[int, int]]:
+        """
+        Return (offset, target) pairs for the instructions from `start`
+        up to `end` with one of `opcodes`, in order.
+        """
+        result = []
+        for opcode in set(opcodes):
+            offsets = self.opcode_offsets(opcode)
+            lo, hi = bisect_left(offsets, start), bisect_left(offsets, end)
+            result.extend(zip(offsets[lo:hi], self.opcode_targets(opcode)[lo:hi]))
+        result.sort()
+        return result
+
+    def targeting(
+        self, opcodes: Iterable[int], target: int, start: int, end: int
+    ) -> List[int]:
+        """
+        Return the offsets from `start` up to `end` of the instructions
+        with one of `opcodes` that have target `target`, in order.
+        """
+        result = []
+        for opcode in set(opcodes):
+            offsets = self.offsets_by_target(opcode).get(target, EMPTY)
+            result.extend(
+                offsets[bisect_left(offsets, start) : bisect_left(offsets, end)]
+            )
+        result.sort()
+        return result
+
+    def offsets_by_target(self, opcode: int) -> Dict[int, array]:
+        """
+        Return a dict from each target of the instructions with `opcode`
+        to their offsets, in order.
+        """
+        if opcode not in self.target_offsets:
+            by_target: Dict[int, list] = {}
+            for offset, opcode_target in zip(
+                self.opcode_offsets(opcode), self.opcode_targets(opcode)
+            ):
+                by_target.setdefault(opcode_target, []).append(offset)
+            self.target_offsets[opcode] = {
+                opcode_target: array("l", offsets)
+                for opcode_target, offsets in by_target.items()
+            }
+        return self.target_offsets[opcode]
+
+    def nearest_distance(self, opcode: int, target: int, lo: int, hi: int) -> int:
+        """
+        Return the smallest distance from `target` to the targets of the
+        instructions with `opcode` from index `lo` up to `hi` in
+        opcode_offsets(opcode). There must be some.
+
+        Level k of the tree has the targets in blocks of 2**k, each block
+        sorted. Any range of instructions is made up of at most two
+        blocks from each level, and bisection finds the nearest target
+        in a block, so this takes time in O(log(n)**2), not O(n).
+        """
+        levels = self.target_trees.get(opcode)
+        if levels is None:
+            targets = self.opcode_targets(opcode)
+            levels = [targets]
+            size = 1
+            while size < len(targets):
+                below = levels[-1]
+                level = array("l")
+                for i in range(0, len(below), 2 * size):
+                    level.extend(sorted(below[i : i + 2 * size]))
+                levels.append(level)
+                size *= 2
+            self.target_trees[opcode] = levels
+
+        n = len(levels[0])
+        best = None
+        k = 0
+        while lo < hi:
+            blocks = []
+            if lo & 1:
+                blocks.append(lo)
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                blocks.append(hi)
+            level = levels[k]
+            for block in blocks:
+                first, last = block << k, min((block + 1) << k, n)
+                i = bisect_left(level, target, first, last)
+                if i < last:
+                    distance = level[i] - target
+                    if best is None or distance < best:
+                        best = distance
+                if i > first:
+                    distance = target - level[i - 1]
+                    if best is None or distance < best:
+                        best = distance
+            lo >>= 1
+            hi >>= 1
+            k += 1
+        return best
+
+    def nearest(
+        self, opcodes: Iterable[int], target: int, start: int, end: int
+    ) -> Tuple[Optional[int], List[int]]:
+        """
+        Of the instructions from `start` up to `end` with one of
+        `opcodes`, find those whose target is nearest to `target`.
+        Return the distance to it and their offsets, in order, or
+        (None, []) if there are no such instructions.
+        """
+        best, nearest = None, []
+        for opcode in set(opcodes):
+            offsets = self.opcode_offsets(opcode)
+            lo, hi = bisect_left(offsets, start), bisect_left(offsets, end)
+            if lo >= hi:
+                continue
+            distance = self.nearest_distance(opcode, target, lo, hi)
+            if best is None or distance < best:
+                best, nearest = distance, []
+            if distance == best:
+                nearest.append(opcode)
+
+        result = []
+        for opcode in nearest:
+            by_target = self.offsets_by_target(opcode)
+            for opcode_target in {target - best, target + best}:
+                offsets = by_target.get(opcode_target, EMPTY)
+                result.extend(
+                    offsets[bisect_left(offsets, start) : bisect_left(offsets, end)]
+                )
+        result.sort()
+        return best, result
@@ -0,0 +1,102 @@
+#  Copyright (c) 2024 by Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Maps from each byte offset of a code object that are constant over
+runs of offsets.
+
+The scanner asks, for an offset, what line it is on and where the
+next line starts, and where the instruction before it starts. We used
+to answer with lists that have an entry for each byte of the code,
+which for a large code object is millions of entries. Here we keep
+just the offsets where the answer changes, in an array, and find an
+offset's run with bisect.
+
+Like the lists they replace, these are indexed by offset, take
+negative indexes from the end, and raise IndexError past it.
+"""
+
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+from typing import Iterable, List, Tuple
+
+LineTuple = namedtuple("LineTuple", ["l_no", "next"])
+
+
+def check_index(index: int, length: int) -> int:
+    """Return list index `index` of a list of size `length` as an offset."""
+    if index < 0:
+        index += length
+    if not 0 <= index < length:
+        raise IndexError("offset out of range")
+    return index
+
+
+class LineTable:
+    """
+    For each offset in code `code_size` bytes long, the line number of
+    the instruction there and the offset of the next line. `linestarts`
+    are the (offset, line number) pairs of the offsets that start a
+    line, in order. Offsets before the first of these are on its line.
+    """
+
+    def __init__(self, linestarts: List[Tuple[int, int]], code_size: int):
+        self.code_size = code_size if linestarts else 0
+        # Where each line but the first starts.
+        self.starts = array("l", [offset for offset, _ in linestarts[1:]])
+        self.line_numbers = array("l", [line_no for _, line_no in linestarts])
+
+    def __len__(self) -> int:
+        return self.code_size
+
+    def __getitem__(self, offset: int) -> LineTuple:
+        offset = check_index(offset, self.code_size)
+        starts = self.starts
+        i = bisect_right(starts, offset)
+        return LineTuple(
+            self.line_numbers[i], starts[i] if i < len(starts) else self.code_size
+        )
+
+
+class PrevOpTable:
+    """
+    For each offset in code `code_size` bytes long, and the offset just
+    past it, the offset of the instruction that covers the byte before
+    it. For offset 0, it is 0. `op_offsets` are the offsets of all of
+    the instructions, EXTENDED_ARG included, in order.
+
+    Entries can be changed, as for EXTENDED_ARG removal, and changed
+    entries are kept in a dict.
+    """
+
+    def __init__(self, op_offsets: Iterable[int], code_size: int):
+        self.length = code_size + 1
+        self.op_offsets = array("l", op_offsets)
+        self.changed = {}
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, offset: int) -> int:
+        offset = check_index(offset, self.length)
+        if offset in self.changed:
+            return self.changed[offset]
+        if offset == 0:
+            return 0
+        op_offsets = self.op_offsets
+        return op_offsets[bisect_right(op_offsets, offset - 1) - 1]
+
+    def __setitem__(self, offset: int, prev_offset: int):
+        self.changed[check_index(offset, self.length)] = prev_offset
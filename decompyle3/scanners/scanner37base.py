@@ -40,6 +40,7 @@ from xdis import Instruction, instruction_size, iscode
 from xdis.bytecode import _get_const_info
 
 from decompyle3.scanner import Scanner, Token
+from decompyle3.scanners.structs import Structs
 
 globals().update(op3.opmap)
 
@@ -636,7 +637,7 @@ class Scanner37Base(Scanner):
                             last_continue is not None
                             and tokens[-1].kind == "JUMP_LOOP"
                             and last_continue.attr <= tokens[-1].attr
-                            and last_continue.offset > tokens[-1].attr
+                            and last_continue.inst_offset > tokens[-1].attr
                         ):
                             # Handle mis-characterized "CONTINUE"
                             # We have a situation like:
@@ -688,7 +689,6 @@ class Scanner37Base(Scanner):
 
         if show_asm in ("both", "after") and self.version < (3, 8):
             print("\n# ---- tokenization:")
-            # FIXME: t.format() is changing tokens!
             for t in tokens.copy():
                 print(t.format(line_prefix=""))
             print()
@@ -706,7 +706,7 @@ class Scanner37Base(Scanner):
         """
         code = self.code
         n = len(code)
-        self.structs = [{"type": "root", "start": 0, "end": n - 1}]
+        self.structs = Structs({"type": "root", "start": 0, "end": n - 1})
 
         # All loop entry points
         self.loops: List[int] = []
@@ -741,10 +741,10 @@ class Scanner37Base(Scanner):
                     label = self.fixed_jumps.get(offset)
 
                 if label is not None and label != -1:
-                    targets[label] = targets.get(label, []) + [offset]
+                    targets.setdefault(label, []).append(offset)
             elif op == self.opc.END_FINALLY and offset in self.fixed_jumps:
                 label = self.fixed_jumps[offset]
-                targets[label] = targets.get(label, []) + [offset]
+                targets.setdefault(label, []).append(offset)
                 pass
 
             pass  # for loop
@@ -773,7 +773,9 @@ class Scanner37Base(Scanner):
         # Same for opcode sequences
         pass_stmts = set()
         for sequence in self.statement_opcode_sequences:
-            for i in self.op_range(start, end - (len(sequence) + 1)):
+            for i in self.op_index.between(
+                sequence[:1], start, end - (len(sequence) + 1)
+            ):
                 match = True
                 for elem in sequence:
                     if elem != code[i]:
@@ -857,22 +859,11 @@ class Scanner37Base(Scanner):
         inst = self.insts[inst_index]
         op = inst.opcode
 
-        # Detect parent structure
-        parent: Dict[str, Any] = self.structs[0]
+        # Pick innermost parent structure for our offset
+        parent: Dict[str, Any] = self.structs.parent(offset)
         start: int = parent["start"]
         end: int = parent["end"]
 
-        # Pick innermost parent for our offset
-        for struct in self.structs:
-            current_start = struct["start"]
-            current_end = struct["end"]
-            if (current_start <= offset < current_end) and (
-                current_start >= start and current_end <= end
-            ):
-                start = current_start
-                end = current_end
-                parent = struct
-
         if self.version < (3, 8) and op == self.opc.SETUP_LOOP:
             # We categorize loop types: 'for', 'while', 'while 1' with
             # possibly suffixes '-loop' and '-else'
@@ -29,7 +29,6 @@ from xdis.opcodes import opcode_38 as opc
 
 from decompyle3.scanners.scanner37 import Scanner37
 from decompyle3.scanners.scanner37base import Scanner37Base
-from decompyle3.scanners.tok import off2int
 
 # bytecode verification, verify(), uses JUMP_OPS from here
 JUMP_OPs = opc.JUMP_OPS
@@ -77,20 +76,20 @@ class Scanner38(Scanner37):
         jump_back_targets: Dict[int, int] = {}
         for token in tokens:
             if token.kind == "JUMP_LOOP":
-                jump_back_targets[token.attr] = token.offset
+                jump_back_targets[token.attr] = token.first_offset
                 pass
             pass
 
         if self.debug and jump_back_targets:
             print(jump_back_targets)
         loop_ends: List[int] = []
-        next_end = tokens[len(tokens) - 1].off2int() + 10
+        next_end = tokens[len(tokens) - 1].inst_offset + 10
 
         new_tokens = []
         for token in tokens:
             opname = token.kind
             offset = token.offset
-            if token.off2int(prefer_last=False) == next_end:
+            if token.first_offset == next_end:
                 loop_ends.pop()
                 if self.debug:
                     print(f"{'  ' * len(loop_ends)}remove loop offset {offset}")
@@ -98,13 +97,13 @@ class Scanner38(Scanner37):
                 next_end = (
                     loop_ends[-1]
                     if len(loop_ends)
-                    else tokens[len(tokens) - 1].off2int() + 10
+                    else tokens[len(tokens) - 1].inst_offset + 10
                 )
 
             # things that smash new_tokens like BUILD_LIST have to come first.
 
             if offset in jump_back_targets:
-                next_end = off2int(jump_back_targets[offset], prefer_last=False)
+                next_end = jump_back_targets[offset]
                 if self.debug:
                     print(
                         f"{'  ' * len(loop_ends)}adding loop offset {offset} ending "
@@ -130,9 +129,7 @@ class Scanner38(Scanner37):
                     # We also want to avoid confusing BREAK_LOOPS with parts of the
                     # grammar rules for loops. (Perhaps we should change the grammar.)
                     # Try to find an adjacent JUMP_LOOP which is part of the normal loop end.
-                    jump_back_index = self.offset2inst_index[
-                        off2int(offset, prefer_last=False)
-                    ]
+                    jump_back_index = self.offset2inst_index[token.first_offset]
 
                     if (
                         jump_back_index + 1 < len(self.insts)
@@ -161,7 +158,7 @@ class Scanner38(Scanner37):
                     # should start before where the "break" instruction sits.
                     if break_loop or (
                         jump_back_inst.opname == "JUMP_LOOP"
-                        and jump_back_inst.argval < token.off2int()
+                        and jump_back_inst.argval < token.inst_offset
                     ):
                         token.kind = "BREAK_LOOP"
                     pass
@@ -170,7 +167,6 @@ class Scanner38(Scanner37):
 
         if show_asm in ("both", "after"):
             print("\n# ---- tokenization:")
-            # FIXME: t.format() is changing tokens!
             for t in new_tokens.copy():
                 print(t.format(line_prefix=""))
             print()
@@ -0,0 +1,101 @@
+#  Copyright (c) 2024 by Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+The block structures that Scanner37Base.detect_control_flow() finds.
+
+For each instruction, detect_control_flow() wants the innermost
+structure around it. Looking through every structure for that takes
+time quadratic in the size of code with many loops. Instructions are
+looked at in order, so we sweep through the offsets instead, keeping
+the structures that the current offset is in. There are only as many
+of those as loops are nested there.
+"""
+
+from heapq import heappop, heappush
+from typing import Any, Dict, Iterator, List
+
+Struct = Dict[str, Any]
+
+
+class Structs:
+    """
+    A list of block structures, each a dict with "type", "start" and
+    "end" offsets, starting with `root`. Structures are added with
+    append() and are not changed after that.
+    """
+
+    def __init__(self, root: Struct):
+        self.structs: List[Struct] = [root]
+        # The offset parent() last looked at.
+        self.offset = -1
+        # (start, index) of structures that start after self.offset.
+        self.pending = [(root["start"], 0)]
+        # Index -> structure for those that self.offset is in, and
+        # perhaps some that have ended since.
+        self.active: Dict[int, Struct] = {}
+
+    def __getitem__(self, index: int) -> Struct:
+        return self.structs[index]
+
+    def __iter__(self) -> Iterator[Struct]:
+        return iter(self.structs)
+
+    def __len__(self) -> int:
+        return len(self.structs)
+
+    def __repr__(self) -> str:
+        return repr(self.structs)
+
+    def append(self, struct: Struct):
+        index = len(self.structs)
+        self.structs.append(struct)
+        if struct["start"] > self.offset:
+            heappush(self.pending, (struct["start"], index))
+        elif self.offset < struct["end"]:
+            self.active[index] = struct
+
+    def rewind(self):
+        """Start the sweep over, for an offset before the last one."""
+        self.offset = -1
+        self.pending = sorted(
+            (struct["start"], index) for index, struct in enumerate(self.structs)
+        )
+        self.active = {}
+
+    def parent(self, offset: int) -> Struct:
+        """
+        Return the innermost structure around `offset`: of the
+        structures that contain it, taken in the order they were added,
+        the last that is inside all of those taken before it. The root
+        structure is returned when there are none.
+        """
+        if offset < self.offset:
+            self.rewind()
+        self.offset = offset
+        pending, active = self.pending, self.active
+        while pending and pending[0][0] <= offset:
+            index = heappop(pending)[1]
+            active[index] = self.structs[index]
+        for index in [i for i, struct in active.items() if struct["end"] <= offset]:
+            del active[index]
+
+        parent = self.structs[0]
+        start, end = parent["start"], parent["end"]
+        for index in sorted(active):
+            struct = active[index]
+            if struct["start"] >= start and struct["end"] <= end:
+                start, end = struct["start"], struct["end"]
+                parent = struct
+        return parent
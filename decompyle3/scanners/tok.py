@@ -17,32 +17,115 @@
 
 import re
 import sys
-from typing import Optional, Union
+from collections import namedtuple
+from importlib import import_module
+from operator import attrgetter
+from typing import Dict, Optional, Tuple, Union
 
 
-def off2int(offset: int, prefer_last=True) -> int:
+def split_offset(offset: Union[int, str]) -> Tuple[int, Optional[int], bool]:
+    """
+    Return the parts of a token offset: the first offset, the second
+    number or None, and whether the token is for an instruction with an
+    extended arg.
+
+    Offsets are ints, except for pseudo tokens and instructions with an
+    extended arg, which have offsets like "120_1" or "118_120". For an
+    instruction with an extended arg, the first offset is that of the
+    EXTENDED_ARG instruction and the second that of the instruction
+    itself. For "COME_FROM"-type tokens, the second number is just a
+    count, and not really an offset.
+    """
+    if isinstance(offset, int):
+        return offset, None, False
+    assert isinstance(offset, str)
+    offsets = list(map(int, offset.split("_")))
+    if len(offsets) == 1:
+        return offsets[0], None, False
+    assert 2 <= len(offsets) <= 3
+    offset_1, offset_2 = offsets[:2]
+    return offset_1, offset_2, offset_1 + 2 == offset_2
+
+
+def off2int(offset: Union[int, str], prefer_last=True) -> int:
     if isinstance(offset, int):
         return offset
-    else:
-        assert isinstance(offset, str)
-        offsets = list(map(int, offset.split("_")))
-        if len(offsets) == 1:
-            return offsets[0]
-        else:
-            assert 2 <= len(offsets) <= 3
-            if len(offsets) == 3:
-                offsets = offsets[:-1]
-            assert len(offsets) == 2
-            offset_1, offset_2 = offsets
-        if offset_1 + 2 == offset_2:
-            # This is an instruction with an extended arg.
-            # For things that compare against offsets, we generally want the
-            # later offset.
-            return offset_2 if prefer_last else offset_1
-        else:
-            # Probably a "COME_FROM"-type offset, where the second number
-            # is just a count, and not really an offset.
-            return offset_1
+    offset_1, offset_2, has_extended_arg = split_offset(offset)
+    if has_extended_arg and prefer_last:
+        # For things that compare against offsets, we generally want the
+        # later offset.
+        return offset_2
+    return offset_1
+
+
+# The attributes every Token has its own value of
+TOKEN_SLOTS = (
+    "kind",
+    "attr",
+    "pattr",
+    "_offset",
+    "first_offset",
+    "second_offset",
+    "has_extended_arg",
+    "inst_offset",
+    "linestart",
+    "start_offset",
+    "opcode_info",
+)
+
+# What a token has for its opcode. Tokens with the same share one.
+OpcodeInfo = namedtuple("OpcodeInfo", ["opc", "op", "has_arg", "optype"])
+NO_OPCODE_INFO = OpcodeInfo(None, None, None, None)
+_opcode_infos: Dict[OpcodeInfo, OpcodeInfo] = {}
+
+
+def opcode_info(opc, op, has_arg, optype) -> OpcodeInfo:
+    """Return the shared OpcodeInfo with these fields."""
+    info = OpcodeInfo(opc, op, has_arg, optype)
+    return _opcode_infos.setdefault(info, info)
+
+
+def opcode_property(field: str) -> property:
+    """Return a Token property for OpcodeInfo field `field`."""
+
+    def set_field(self, value):
+        info = getattr(self, "opcode_info", NO_OPCODE_INFO)
+        self.opcode_info = opcode_info(*info._replace(**{field: value}))
+
+    return property(attrgetter(f"opcode_info.{field}"), set_field)
+
+
+# Token kinds ending in a count, like "CALL_FUNCTION_3"
+COUNT_SUFFIX = re.compile(r"_\d+$")
+
+# The opcode module of the Python we run under, for tokens made
+# without one. See std_opc().
+_std_opc = None
+
+
+def std_opc():
+    """
+    Return the opcode module of the Python we run under, or None if
+    xdis doesn't know about it.
+    """
+    global _std_opc
+    if _std_opc is None:
+        try:
+            from xdis.std import _std_api
+        except KeyError as e:
+            print(f"I don't know about Python version {e} yet.")
+            try:
+                version_tuple = tuple(int(i) for i in str(e)[1:-1].split("."))
+            except Exception:
+                pass
+            else:
+                if version_tuple > (3, 9):
+                    print("Python versions 3.9 and greater are not supported.")
+                else:
+                    print(f"xdis might need to be informed about version {e}")
+            return None
+        _std_opc = _std_api.opc
+    return _std_opc
 
 
 class Token:
@@ -51,8 +134,23 @@ class Token:
 
     A byte-code token is equivalent to Python 3's dis.instruction or
     the contents of one line as output by dis.dis().
+
+    Tokens are the most numerous objects we have while parsing, so
+    their fields are slots, and tokens share an OpcodeInfo for the
+    fields that come from their opcode. Other attributes, like those
+    the fragment walker sets, go in a __dict__ that is only made when
+    one is set. tos_str is almost always None, and is only set there
+    when it isn't.
     """
 
+    __slots__ = TOKEN_SLOTS + ("__dict__",)
+
+    opc = opcode_property("opc")
+    op = opcode_property("op")
+    has_arg = opcode_property("has_arg")
+    optype = opcode_property("optype")
+    tos_str = None
+
     # FIXME: match Python 3.4's terms:
     #    linestart = starts_line
     #    attr = argval
@@ -78,41 +176,51 @@ class Token:
         optype: Optional[str] = None,
     ):
         self.attr = attr
-        self.has_arg = has_arg
         self.kind = sys.intern(opname)
         self.linestart = linestart
         self.offset = f"{offset}_{offset+2}" if has_extended_arg else offset
-        self.optype = optype
         self.pattr = pattr
         self.start_offset = start_offset
-        self.tos_str = tos_str
+        if tos_str is not None:
+            self.tos_str = tos_str
         if has_arg is False:
             self.attr = None
             self.pattr = None
 
         if opc is None:
-            try:
-                from xdis.std import _std_api
-            except KeyError as e:
-                print(f"I don't know about Python version {e} yet.")
-                try:
-                    version_tuple = tuple(int(i) for i in str(e)[1:-1].split("."))
-                except Exception:
-                    pass
-                else:
-                    if version_tuple > (3, 9):
-                        print("Python versions 3.9 and greater are not supported.")
-                    else:
-                        print(f"xdis might need to be informed about version {e}")
-                return
+            opc = std_opc()
+        if op is None and opc is not None:
+            op = opc.opmap.get(self.kind, None)
+        self.opcode_info = opcode_info(opc, op, has_arg, optype)
 
-            self.opc = _std_api.opc
-        else:
-            self.opc = opc
-        if op is None:
-            self.op = self.opc.opmap.get(self.kind, None)
-        else:
-            self.op = op
+    @property
+    def offset(self) -> Union[int, str]:
+        """
+        The token's offset, as it is shown. This is an int, or a string
+        like "120_1" or "118_120"; see split_offset(). Code comparing
+        offsets should use the int fields set from it: first_offset,
+        second_offset, has_extended_arg and inst_offset.
+        """
+        return self._offset
+
+    @offset.setter
+    def offset(self, offset: Union[int, str]):
+        self._offset = offset
+        if isinstance(offset, int):
+            self.first_offset = self.inst_offset = offset
+            self.second_offset = None
+            self.has_extended_arg = False
+            return
+        (
+            self.first_offset,
+            self.second_offset,
+            self.has_extended_arg,
+        ) = split_offset(offset)
+        # The offset of the instruction itself: for an instruction with
+        # an extended arg, the offset after the EXTENDED_ARG.
+        self.inst_offset = (
+            self.second_offset if self.has_extended_arg else self.first_offset
+        )
 
     def __eq__(self, o) -> bool:
         """'==' on kind and "pattr" attributes.
@@ -168,8 +276,7 @@ class Token:
                     if not self.pattr.startswith("to "):
                         pattr = "to " + self.pattr
                 elif self.op in self.opc.JABS_OPS:
-                    self.pattr = str(self.pattr)
-                    if not self.pattr.startswith("to "):
+                    if not str(self.pattr).startswith("to "):
                         pattr = "to " + str(self.pattr)
                     pass
                 elif self.op in self.opc.CONST_OPS:
@@ -201,7 +308,7 @@ class Token:
                     )
                 # And so on. See xdis/bytecode.py get_instructions_bytes
                 pass
-        elif re.search(r"_\d+$", self.kind):
+        elif COUNT_SUFFIX.search(self.kind):
             return "%s%s%s" % (prefix, offset_opname, argstr)
         else:
             pattr = ""
@@ -213,13 +320,42 @@ class Token:
     def __getitem__(self, i: int):
         raise IndexError
 
+    def __getstate__(self) -> dict:
+        """
+        Pickle the opcode module we refer to by its name, since
+        modules can't be pickled.
+        """
+        state = {}
+        for name in TOKEN_SLOTS:
+            try:
+                state[name] = getattr(self, name)
+            except AttributeError:
+                pass
+        info = state.pop("opcode_info", NO_OPCODE_INFO)
+        state.update(info._asdict())
+        state.update(self.__dict__)
+        opc = state.get("opc")
+        if opc is not None:
+            state["opc"] = opc.__name__
+        return state
+
+    def __setstate__(self, state: dict):
+        state = dict(state)
+        opc = state.get("opc")
+        if isinstance(opc, str):
+            state["opc"] = import_module(opc)
+        self.opcode_info = opcode_info(
+            *(state.pop(field, None) for field in OpcodeInfo._fields)
+        )
+        for name, value in state.items():
+            setattr(self, name, value)
+
     def off2int(self, prefer_last=True) -> int:
         """
-        Return an offset for this token. Note that the
-        token type can sometimes be a string when the token
-        encompasses one or more EXTENDED_ARG instructions.
+        Return an offset for this token: inst_offset, or first_offset
+        if `prefer_last` is False.
         """
-        return off2int(self.offset, prefer_last)
+        return self.inst_offset if prefer_last else self.first_offset
 
 
 NoneToken = Token("LOAD_CONST", offset=-1, attr=None, pattr=None)
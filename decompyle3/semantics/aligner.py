@@ -162,30 +162,33 @@ def code_deparse_align(
         is_pypy=is_pypy,
     )
 
-    is_top_level_module = co.co_name == "<module>"
-    deparsed.ast = deparsed.build_ast(
-        tokens, customize, co, is_top_level_module=is_top_level_module
-    )
+    try:
+        is_top_level_module = co.co_name == "<module>"
+        deparsed.ast = deparsed.build_ast(
+            tokens, customize, co, is_top_level_module=is_top_level_module
+        )
 
-    assert deparsed.ast == "stmts", "Should have parsed grammar start"
+        assert deparsed.ast == "stmts", "Should have parsed grammar start"
 
-    del tokens  # save memory
+        del tokens  # save memory
 
-    deparsed.mod_globs = find_globals(deparsed.ast, set())
+        deparsed.mod_globs = find_globals(deparsed.ast, set())
 
-    # convert leading '__doc__ = "..." into doc string
-    try:
-        if deparsed.ast[0][0] == ASSIGN_DOC_STRING(co.co_consts[0]):
-            deparsed.print_docstring("", co.co_consts[0])
-            del deparsed.ast[0]
-        if deparsed.ast[-1] == RETURN_NONE:
-            deparsed.ast.pop()  # remove last node
-            # todo: if empty, add 'pass'
-    except:
-        pass
-
-    # What we've been waiting for: Generate Python source from the parse tree!
-    deparsed.gen_source(deparsed.ast, co.co_name, customize)
+        # convert leading '__doc__ = "..." into doc string
+        try:
+            if deparsed.ast[0][0] == ASSIGN_DOC_STRING(co.co_consts[0]):
+                deparsed.print_docstring("", co.co_consts[0])
+                del deparsed.ast[0]
+            if deparsed.ast[-1] == RETURN_NONE:
+                deparsed.ast.pop()  # remove last node
+                # todo: if empty, add 'pass'
+        except:
+            pass
+
+        # What we've been waiting for: Generate Python source from the parse tree!
+        deparsed.gen_source(deparsed.ast, co.co_name, customize)
+    finally:
+        deparsed.release_parsers()
 
     for g in sorted(deparsed.mod_globs):
         deparsed.write("# global %s ## Warning: Unused global\n" % g)
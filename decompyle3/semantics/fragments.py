@@ -75,7 +75,7 @@ from xdis.version_info import IS_PYPY, PYTHON_VERSION_TRIPLE
 
 import decompyle3.parsers.main as python_parser
 import decompyle3.parsers.parse_heads as heads
-from decompyle3.parsers.main import get_python_parser
+from decompyle3.parsers.main import acquire_parser
 from decompyle3.parsers.treenode import SyntaxTree
 from decompyle3.scanner import Code, Token, get_scanner
 from decompyle3.semantics import pysource
@@ -89,6 +89,7 @@ from decompyle3.semantics.consts import (
     TABLE_DIRECT,
     escape,
 )
+from decompyle3.semantics.helper import NodeAttributes
 from decompyle3.semantics.make_function36 import make_function36
 from decompyle3.semantics.pysource import (
     DEFAULT_DEBUG_OPTS,
@@ -97,6 +98,7 @@ from decompyle3.semantics.pysource import (
     StringIO,
 )
 from decompyle3.show import maybe_show_tree
+from decompyle3.timing import phase
 
 NodeInfo = namedtuple("NodeInfo", "node start finish")
 ExtractInfo = namedtuple(
@@ -1141,10 +1143,10 @@ class FragmentsWalker(pysource.SourceWalker, object):
                     t.kind = "RETURN_END_IF_LAMBDA"
                 elif t.kind == "RETURN_VALUE":
                     t.kind = "RETURN_VALUE_LAMBDA"
-            tokens.append(Token("LAMBDA_MARKER", optyhpe="pseudo"))
+            tokens.append(Token("LAMBDA_MARKER", optype="pseudo"))
             try:
                 if self.p_lambda is None:
-                    self.p_lambda = get_python_parser(
+                    self.p_lambda = acquire_parser(
                         self.version,
                         self.debug_parser,
                         compile_mode="lambda",
@@ -1678,7 +1680,7 @@ class FragmentsWalker(pysource.SourceWalker, object):
                     node = node[int(m.group("child"))]
                     node.parent = startnode
             except Exception:
-                print(node.__dict__)
+                print(node)
                 raise
 
             if typ == "%":
@@ -1829,7 +1831,6 @@ class FragmentsWalker(pysource.SourceWalker, object):
                 arg += 1
 
             elif typ == "{":
-                d = node.__dict__
                 expr = m.group("expr")
 
                 # Line mapping stuff
@@ -1842,7 +1843,7 @@ class FragmentsWalker(pysource.SourceWalker, object):
                 # Additional fragment-position stuff
                 try:
                     start = len(self.f.getvalue())
-                    self.write(eval(expr, d, d))
+                    self.write(eval(expr, {}, NodeAttributes(node)))
                     self.set_pos_info(node, start, len(self.f.getvalue()))
                 except Exception:
                     print(node)
@@ -1951,12 +1952,15 @@ def code_deparse(
     scanner = get_scanner(version, is_pypy=is_pypy, show_asm=debug_opts["asm"])
 
     show_asm = debug_opts.get("asm", None)
-    tokens, customize = scanner.ingest(co, code_objects=code_objects, show_asm=show_asm)
+    with phase("scan"):
+        tokens, customize = scanner.ingest(
+            co, code_objects=code_objects, show_asm=show_asm
+        )
 
     if start_offset > 0:
         for i, t in enumerate(tokens):
             # If t.offset is a string, we want to skip this.
-            if isinstance(t.offset, int) and t.offset >= start_offset:
+            if t.second_offset is None and t.first_offset >= start_offset:
                 tokens = tokens[i:]
                 break
 
@@ -1964,7 +1968,7 @@ def code_deparse(
         for i, t in enumerate(tokens):
             # In contrast to the test for start_offset If t.offset is
             # a string, we want to extract the integer offset value.
-            if t.off2int() >= stop_offset:
+            if t.inst_offset >= stop_offset:
                 tokens = tokens[:i]
                 break
 
@@ -1982,26 +1986,29 @@ def code_deparse(
         linestarts=linestarts,
     )
 
-    is_top_level_module = co.co_name == "<module>"
-    deparsed.ast = deparsed.build_ast(
-        tokens, customize, co, is_top_level_module=is_top_level_module
-    )
+    try:
+        is_top_level_module = co.co_name == "<module>"
+        deparsed.ast = deparsed.build_ast(
+            tokens, customize, co, is_top_level_module=is_top_level_module
+        )
 
-    assert deparsed.ast == "stmts", "Should have parsed grammar start"
+        assert deparsed.ast == "stmts", "Should have parsed grammar start"
 
-    # save memory
-    del tokens
+        # save memory
+        del tokens
 
-    # convert leading '__doc__ = "..." into doc string
-    assert deparsed.ast == "stmts"
+        # convert leading '__doc__ = "..." into doc string
+        assert deparsed.ast == "stmts"
 
-    (deparsed.mod_globs, _) = pysource.find_globals_and_nonlocals(
-        deparsed.ast, set(), set(), co, version
-    )
+        (deparsed.mod_globs, _) = pysource.find_globals_and_nonlocals(
+            deparsed.ast, set(), set(), co, version
+        )
 
-    # Just when you think we've forgotten about what we
-    # were supposed to do: Generate source from the Syntax tree!
-    deparsed.gen_source(deparsed.ast, co.co_name, customize)
+        # Just when you think we've forgotten about what we
+        # were supposed to do: Generate source from the Syntax tree!
+        deparsed.gen_source(deparsed.ast, co.co_name, customize)
+    finally:
+        deparsed.release_parsers()
 
     deparsed.set_pos_info(deparsed.ast, 0, len(deparsed.text))
     deparsed.fixup_parents(deparsed.ast, None)
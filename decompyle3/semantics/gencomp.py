@@ -22,7 +22,7 @@ from typing import Optional
 from spark_parser.ast import GenericASTTraversalPruningException
 from xdis import iscode
 
-from decompyle3.parsers.main import get_python_parser
+from decompyle3.parsers.main import acquire_parser, release_parser
 from decompyle3.scanner import Code
 from decompyle3.scanners.tok import Token
 from decompyle3.semantics.consts import PRECEDENCE
@@ -173,13 +173,16 @@ class ComprehensionMixin:
         # encounter comprehensions of other kinds, and lambdas
         if is_lambda_mode(self.compile_mode):
             p_save = self.p
-            self.p = get_python_parser(
+            self.p = acquire_parser(
                 self.version,
                 compile_mode="exec",
                 is_pypy=self.is_pypy,
             )
-            tree = self.build_ast(code._tokens, code._customize, code)
-            self.p = p_save
+            try:
+                tree = self.build_ast(code._tokens, code._customize, code)
+            finally:
+                release_parser(self.p)
+                self.p = p_save
         else:
             tree = self.build_ast(code._tokens, code._customize, code)
         self.customize(code._customize)
@@ -704,15 +707,18 @@ class ComprehensionMixin:
         # encounter comprehensions of other kinds, and lambdas
         if is_lambda_mode(self.compile_mode):
             p_save = self.p
-            self.p = get_python_parser(
+            self.p = acquire_parser(
                 self.version,
                 compile_mode="exec",
                 is_pypy=self.is_pypy,
             )
-            tree = self.build_ast(
-                code._tokens, code._customize, code, is_lambda=self.is_lambda
-            )
-            self.p = p_save
+            try:
+                tree = self.build_ast(
+                    code._tokens, code._customize, code, is_lambda=self.is_lambda
+                )
+            finally:
+                release_parser(self.p)
+                self.p = p_save
         else:
             tree = self.build_ast(
                 code._tokens, code._customize, code, is_lambda=self.is_lambda
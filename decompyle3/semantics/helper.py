@@ -14,6 +14,25 @@ read_global_ops = frozenset(("STORE_GLOBAL", "DELETE_GLOBAL"))
 nonglobal_ops = frozenset(("STORE_DEREF", "DELETE_DEREF"))
 
 
+class NodeAttributes:
+    """
+    The attributes of parse tree node `node`, as a mapping for eval()
+    to look names up in. Tokens keep their attributes in slots, so we
+    can't use their __dict__.
+    """
+
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    def __getitem__(self, name: str):
+        try:
+            return getattr(self.node, name)
+        except AttributeError:
+            raise KeyError(name)
+
+
 def escape_string(s: str, quotes=('"', "'", '"""', "'''")):
     quote = None
     for q in quotes:
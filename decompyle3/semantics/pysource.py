@@ -139,7 +139,8 @@ from xdis.version_info import PYTHON_VERSION_TRIPLE
 
 import decompyle3.parsers.main as python_parser
 import decompyle3.parsers.parse_heads as heads
-from decompyle3.parsers.main import get_python_parser
+from decompyle3.parse_cache import current_parse_cache
+from decompyle3.parsers.main import acquire_parser, release_parser
 from decompyle3.parsers.treenode import SyntaxTree
 from decompyle3.scanner import Code, get_scanner
 from decompyle3.scanners.tok import Token
@@ -160,11 +161,16 @@ from decompyle3.semantics.consts import (
 )
 from decompyle3.semantics.customize import customize_for_version
 from decompyle3.semantics.gencomp import ComprehensionMixin
-from decompyle3.semantics.helper import find_globals_and_nonlocals, is_lambda_mode
+from decompyle3.semantics.helper import (
+    NodeAttributes,
+    find_globals_and_nonlocals,
+    is_lambda_mode,
+)
 from decompyle3.semantics.n_actions import NonterminalActions
 from decompyle3.semantics.parser_error import ParserError
 from decompyle3.semantics.transform import TreeTransform
 from decompyle3.show import maybe_show_tree
+from decompyle3.timing import phase
 from decompyle3.util import better_repr
 
 PARSER_DEFAULT_DEBUG = {
@@ -245,7 +251,7 @@ class SourceWalker(GenericASTTraversal, NonterminalActions, ComprehensionMixin):
         self.scanner = scanner
         params = {"f": out, "indent": ""}
         self.version = version
-        self.p = get_python_parser(
+        self.p = acquire_parser(
             version,
             debug_parser=debug_parser,
             compile_mode=compile_mode,
@@ -782,9 +788,8 @@ class SourceWalker(GenericASTTraversal, NonterminalActions, ComprehensionMixin):
                     self.template_engine((expr, index), node)
                     arg += 1
                 else:
-                    d = node.__dict__
                     try:
-                        self.write(eval(expr, d, d))
+                        self.write(eval(expr, {}, NodeAttributes(node)))
                     except Exception:
                         raise
             m = escape.search(fmt, i)
@@ -915,6 +920,8 @@ class SourceWalker(GenericASTTraversal, NonterminalActions, ComprehensionMixin):
                     del tree[0]
                     first_stmt = tree[0]
             pass
+        except MemoryError:
+            raise
         except Exception:
             pass
 
@@ -931,6 +938,8 @@ class SourceWalker(GenericASTTraversal, NonterminalActions, ComprehensionMixin):
                 and first_stmt[1][0] == Token("STORE_NAME", pattr="__qualname__")
             ):
                 have_qualname = True
+        except MemoryError:
+            raise
         except Exception:
             pass
 
@@ -995,6 +1004,30 @@ class SourceWalker(GenericASTTraversal, NonterminalActions, ComprehensionMixin):
         self.name = old_name
         self.return_none = rn
 
+    def release_parsers(self):
+        """
+        Hand our parsers back for reuse once we are done with parsing.
+        """
+        if self.p is not None:
+            release_parser(self.p)
+            self.p = None
+        if self.p_lambda is not None:
+            release_parser(self.p_lambda)
+            self.p_lambda = None
+
+    def caches_parse_trees(self) -> bool:
+        """
+        Return True if build_ast() can use the parse cache: that is
+        when it wouldn't show trees or parser debug output, which a
+        cached tree would skip.
+        """
+        return not (
+            any(self.showast.get(phase, False) for phase in ("before", "after"))
+            or any(
+                self.debug_parser.get(opt) for opt in ("reduce", "rules", "transition")
+            )
+        )
+
     def build_ast(
         self,
         tokens,
@@ -1003,6 +1036,57 @@ class SourceWalker(GenericASTTraversal, NonterminalActions, ComprehensionMixin):
         is_lambda=False,
         noneInNames=False,
         is_top_level_module=False,
+    ) -> GenericASTTraversal:
+        """
+        Return the transformed parse tree of code object `code` with
+        tokens `tokens`. When a parse cache is in use, a code object
+        identical to one seen before gets a copy of the tree built then.
+        """
+        parse_cache = current_parse_cache()
+        if parse_cache is None or not self.caches_parse_trees():
+            return self.build_ast_uncached(
+                tokens, customize, code, is_lambda, noneInNames, is_top_level_module
+            )
+
+        key = parse_cache.key(
+            code,
+            (
+                self.version,
+                self.is_pypy,
+                type(self.p).__name__,
+                self.compile_mode,
+                is_lambda,
+                noneInNames,
+                is_top_level_module,
+                self.hide_internal,
+                self.currentclass,
+            ),
+        )
+        cached = parse_cache.get(key)
+        if cached is not None:
+            tree, parse_customize = cached
+            # Parsing adds to the customizations, which are used when
+            # generating source.
+            customize.update(parse_customize)
+            self.customize(customize)
+            return tree
+
+        ast_error_count = len(self.ast_errors)
+        tree = self.build_ast_uncached(
+            tokens, customize, code, is_lambda, noneInNames, is_top_level_module
+        )
+        if len(self.ast_errors) == ast_error_count:
+            parse_cache.put(key, code, tree, customize)
+        return tree
+
+    def build_ast_uncached(
+        self,
+        tokens,
+        customize,
+        code,
+        is_lambda=False,
+        noneInNames=False,
+        is_top_level_module=False,
     ) -> GenericASTTraversal:
         # FIXME: DRY with fragments.py
 
@@ -1017,7 +1101,7 @@ class SourceWalker(GenericASTTraversal, NonterminalActions, ComprehensionMixin):
             tokens.append(Token("LAMBDA_MARKER", optype="pseudo"))
             try:
                 if self.p_lambda is None:
-                    self.p_lambda = get_python_parser(
+                    self.p_lambda = acquire_parser(
                         self.version,
                         self.debug_parser,
                         compile_mode="lambda",
@@ -1032,9 +1116,10 @@ class SourceWalker(GenericASTTraversal, NonterminalActions, ComprehensionMixin):
             except (heads.ParserError, AssertionError) as e:
                 raise ParserError(e, tokens, self.p.debug["reduce"])
 
-            transform_tree = self.treeTransform.transform(
-                parse_tree, code, self.println
-            )
+            with phase("transform"):
+                transform_tree = self.treeTransform.transform(
+                    parse_tree, code, self.println
+                )
 
             del parse_tree  # Save memory
             return transform_tree
@@ -1080,7 +1165,10 @@ class SourceWalker(GenericASTTraversal, NonterminalActions, ComprehensionMixin):
 
         self.customize(customize)
 
-        transform_tree = self.treeTransform.transform(parse_tree, code, self.println)
+        with phase("transform"):
+            transform_tree = self.treeTransform.transform(
+                parse_tree, code, self.println
+            )
 
         del parse_tree  # Save memory
         return transform_tree
@@ -1118,14 +1206,15 @@ def code_deparse(
     # store final output stream for case of error
     scanner = get_scanner(version, is_pypy=is_pypy, show_asm=debug_opts["asm"])
 
-    tokens, customize = scanner.ingest(
-        co, code_objects=code_objects, show_asm=debug_opts["asm"]
-    )
+    with phase("scan"):
+        tokens, customize = scanner.ingest(
+            co, code_objects=code_objects, show_asm=debug_opts["asm"]
+        )
 
     if start_offset > 0:
         for i, t in enumerate(tokens):
             # If t.offset is a string, we want to skip this.
-            if isinstance(t.offset, int) and t.offset >= start_offset:
+            if t.second_offset is None and t.first_offset >= start_offset:
                 tokens = tokens[i:]
                 break
 
@@ -1133,7 +1222,7 @@ def code_deparse(
         for i, t in enumerate(tokens):
             # In contrast to the test for start_offset If t.offset is
             # a string, we want to extract the integer offset value.
-            if t.off2int() >= stop_offset:
+            if t.inst_offset >= stop_offset:
                 tokens = tokens[:i]
                 break
 
@@ -1153,85 +1242,88 @@ def code_deparse(
     )
 
     is_top_level_module = co.co_name == "<module>"
-    if compile_mode == "eval":
-        deparsed.hide_internal = False
-    deparsed.compile_mode = compile_mode
-    deparsed.ast = deparsed.build_ast(
-        tokens,
-        customize,
-        co,
-        is_lambda=is_lambda_mode(compile_mode),
-        is_top_level_module=is_top_level_module,
-    )
-
-    # XXX workaround for profiling
-    if deparsed.ast is None:
-        return None
-
-    # FIXME use a lookup table here.
-    if is_lambda_mode(compile_mode):
-        expected_start = "lambda_start"
-    elif compile_mode == "eval":
-        expected_start = "expr_start"
-    elif compile_mode == "expr":
-        expected_start = "expr_start"
-    elif compile_mode == "exec":
-        expected_start = "stmts"
-    elif compile_mode == "single":
-        expected_start = "single_start"
-    else:
-        expected_start = None
-
-    if expected_start:
-        assert deparsed.ast == expected_start, (
-            f"Should have parsed grammar start to '{expected_start}'; "
-            f"got: {deparsed.ast.kind}"
+    try:
+        if compile_mode == "eval":
+            deparsed.hide_internal = False
+        deparsed.compile_mode = compile_mode
+        deparsed.ast = deparsed.build_ast(
+            tokens,
+            customize,
+            co,
+            is_lambda=is_lambda_mode(compile_mode),
+            is_top_level_module=is_top_level_module,
         )
-    # save memory
-    del tokens
 
-    deparsed.mod_globs, nonlocals = find_globals_and_nonlocals(
-        deparsed.ast, set(), set(), co, version
-    )
+        # XXX workaround for profiling
+        if deparsed.ast is None:
+            return None
+
+        # FIXME use a lookup table here.
+        if is_lambda_mode(compile_mode):
+            expected_start = "lambda_start"
+        elif compile_mode == "eval":
+            expected_start = "expr_start"
+        elif compile_mode == "expr":
+            expected_start = "expr_start"
+        elif compile_mode == "exec":
+            expected_start = "stmts"
+        elif compile_mode == "single":
+            expected_start = "single_start"
+        else:
+            expected_start = None
 
-    deparsed.is_module = compile_mode not in (
-        "dictcomp",
-        "gencomp",
-        "genexpr",
-        "lambda",
-        "listcomp",
-        "setcomp",
-    )
+        if expected_start:
+            assert deparsed.ast == expected_start, (
+                f"Should have parsed grammar start to '{expected_start}'; "
+                f"got: {deparsed.ast.kind}"
+            )
+        # save memory
+        del tokens
 
-    if deparsed.is_module:
-        assert not nonlocals
+        deparsed.mod_globs, nonlocals = find_globals_and_nonlocals(
+            deparsed.ast, set(), set(), co, version
+        )
 
-    deparsed.FUTURE_UNICODE_LITERALS = (
-        COMPILER_FLAG_BIT["FUTURE_UNICODE_LITERALS"] & co.co_flags != 0
-    )
+        deparsed.is_module = compile_mode not in (
+            "dictcomp",
+            "gencomp",
+            "genexpr",
+            "lambda",
+            "listcomp",
+            "setcomp",
+        )
 
-    # What we've been waiting for: Generate source from Syntax Tree!
-    deparsed.gen_source(
-        deparsed.ast,
-        name=co.co_name,
-        customize=customize,
-        is_lambda=is_lambda_mode(compile_mode),
-        debug_opts=debug_opts,
-    )
+        if deparsed.is_module:
+            assert not nonlocals
 
-    for g in sorted(deparsed.mod_globs):
-        deparsed.write("# global %s ## Warning: Unused global\n" % g)
+        deparsed.FUTURE_UNICODE_LITERALS = (
+            COMPILER_FLAG_BIT["FUTURE_UNICODE_LITERALS"] & co.co_flags != 0
+        )
 
-    if deparsed.ast_errors:
-        deparsed.write("# NOTE: have internal decompilation grammar errors.\n")
-        deparsed.write("# Use -T option to show full context.")
-        for err in deparsed.ast_errors:
-            deparsed.write(err)
-        raise SourceWalkerError("Deparsing hit an internal grammar-rule bug")
+        # What we've been waiting for: Generate source from Syntax Tree!
+        deparsed.gen_source(
+            deparsed.ast,
+            name=co.co_name,
+            customize=customize,
+            is_lambda=is_lambda_mode(compile_mode),
+            debug_opts=debug_opts,
+        )
 
-    if deparsed.ERROR:
-        raise SourceWalkerError("Deparsing stopped due to parse error")
-    return deparsed
+        for g in sorted(deparsed.mod_globs):
+            deparsed.write("# global %s ## Warning: Unused global\n" % g)
+
+        if deparsed.ast_errors:
+            deparsed.write("# NOTE: have internal decompilation grammar errors.\n")
+            deparsed.write("# Use -T option to show full context.")
+            for err in deparsed.ast_errors:
+                deparsed.write(err)
+            raise SourceWalkerError("Deparsing hit an internal grammar-rule bug")
+
+        if deparsed.ERROR:
+            raise SourceWalkerError("Deparsing stopped due to parse error")
+        return deparsed
+    finally:
+        deparsed.release_parsers()
 
 
 def deparse_code2str(
@@ -86,6 +86,8 @@ def is_not_docstring(call_stmt_node) -> bool:
             and call_stmt_node[0][0] == "LOAD_STR"
             and call_stmt_node[1] == "POP_TOP"
         )
+    except MemoryError:
+        raise
     except Exception:
         return False
 
@@ -546,6 +548,8 @@ class TreeTransform(GenericASTTraversal, object):
                 call_stmt.kind = "string_at_beginning"
                 call_stmt.transformed_by = "transform"
                 pass
+        except MemoryError:
+            raise
         except Exception:
             pass
         try:
@@ -565,6 +569,8 @@ class TreeTransform(GenericASTTraversal, object):
             if self.ast[-1] == RETURN_NONE:
                 self.ast.pop()  # remove last node
                 # todo: if empty, add 'pass'
+        except MemoryError:
+            raise
         except Exception:
             pass
 
@@ -0,0 +1,362 @@
+#  Copyright (c) 2024 by Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+A long-running decompilation server, so that tools asking for many
+single files don't pay for interpreter start-up, module imports, and
+scanner and parser set-up on each request.
+
+Requests and responses are JSON objects, one per line, read from and
+written to either standard input and output or connections to a Unix
+socket. A request names a bytecode file or gives its contents:
+
+  {"id": 1, "path": "foo.pyc"}
+  {"id": 2, "bytecode": "<base64 of a .pyc file>", "options": {...}}
+
+"options" can have keys "start_offset", "stop_offset",
+"source_encoding", "timeout" and "max_memory", which mean the same as
+the corresponding command-line options.
+
+Each response carries the request's "id", since requests are handled
+concurrently and responses are written as they finish:
+
+  {"id": 1, "status": "ok", "version": "3.8.0", "source": "...",
+   "error_class": null, "error_offset": null, "message": null}
+
+"status" is one of the values used in run reports; see
+decompyle3.report. "source" holds whatever was written before a
+failure. A request still unanswered after the request timeout, say
+because the worker process handling it died, is answered as failed.
+"""
+
+import base64
+import errno
+import json
+import os
+import socketserver
+import stat
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from io import StringIO
+from typing import Optional
+
+from xdis.version_info import version_tuple_to_str
+
+from decompyle3.budget import BudgetExceeded, file_budget
+from decompyle3.cache import DEFAULT_CACHE_SIZE, CachedDecompileError, DecompileCache
+from decompyle3.main import decompile_file
+from decompyle3.parsers.main import acquire_parser, release_parser
+from decompyle3.parsers.parse_heads import ParserError
+from decompyle3.report import error_class, error_offset
+from decompyle3.scanner import get_scanner
+from decompyle3.semantics import pysource
+from decompyle3.semantics.pysource import PARSER_DEFAULT_DEBUG
+
+# (version, is_pypy) pairs of the bytecode we set up for ahead of time.
+WARM_VERSIONS = (((3, 7), False), ((3, 8), False), ((3, 8), True))
+
+DECOMPILE_OPTIONS = ("start_offset", "stop_offset", "source_encoding")
+BUDGET_OPTIONS = ("timeout", "max_memory")
+
+# Seconds a request may wait for its answer, counted from when it is
+# read, before we answer it as failed ourselves.
+DEFAULT_REQUEST_TIMEOUT = 600.0
+
+# Set in each worker process by warm_up().
+_cache: Optional[DecompileCache] = None
+
+
+def warm_up(cache_dir: Optional[str] = None, cache_size: int = DEFAULT_CACHE_SIZE):
+    """
+    Get a worker process ready to decompile: import the scanners and
+    the parsers for each version we handle, and put a parser of each
+    kind in the parser pool.
+    """
+    global _cache
+    # In stdin/stdout mode, standard output carries responses; anything
+    # else printed there would garble them.
+    sys.stdout = sys.stderr
+    for version, is_pypy in WARM_VERSIONS:
+        get_scanner(version, is_pypy=is_pypy)
+        for compile_mode in ("exec", "lambda", "expr"):
+            parser = acquire_parser(
+                version,
+                dict(PARSER_DEFAULT_DEBUG),
+                compile_mode=compile_mode,
+                is_pypy=is_pypy,
+            )
+            release_parser(parser)
+    if cache_dir:
+        _cache = DecompileCache(cache_dir, cache_size)
+
+
+def failed_response(request: dict) -> dict:
+    """Return a response to `request` saying that it failed."""
+    return {
+        "id": request.get("id"),
+        "status": "failed",
+        "version": None,
+        "source": "",
+        "error_class": None,
+        "error_offset": None,
+        "message": None,
+    }
+
+
+def handle_request(request: dict) -> dict:
+    """Decompile the file a request names, and return the response."""
+    response = failed_response(request)
+    options = request.get("options", {})
+    unknown = set(options) - set(DECOMPILE_OPTIONS + BUDGET_OPTIONS)
+    if unknown:
+        response["message"] = f"unknown options: {', '.join(sorted(unknown))}"
+        return response
+
+    tmp_path = None
+    path = request.get("path")
+    if path is None and "bytecode" not in request:
+        response["message"] = 'request needs "path" or "bytecode"'
+        return response
+
+    out = StringIO()
+    try:
+        if path is None:
+            fd, tmp_path = tempfile.mkstemp(suffix=".pyc")
+            with os.fdopen(fd, "wb") as f:
+                f.write(base64.b64decode(request["bytecode"]))
+            path = tmp_path
+        with file_budget(options.get("timeout"), options.get("max_memory")):
+            deparsed = decompile_file(
+                path,
+                out,
+                showgrammar=dict(PARSER_DEFAULT_DEBUG),
+                cache=_cache,
+                **{k: options[k] for k in DECOMPILE_OPTIONS if k in options},
+            )
+        response["status"] = "ok"
+        if deparsed:
+            response["version"] = version_tuple_to_str(deparsed[0].version)
+    except (
+        BudgetExceeded,
+        CachedDecompileError,
+        ValueError,
+        SyntaxError,
+        ParserError,
+        pysource.SourceWalkerError,
+        ImportError,
+        OSError,
+        RuntimeError,
+    ) as e:
+        if isinstance(e, BudgetExceeded):
+            response["status"] = "budget exceeded"
+        elif str(e).startswith("Unsupported Python"):
+            response["status"] = "unsupported"
+        response["error_class"] = error_class(e)
+        response["error_offset"] = error_offset(e)
+        response["message"] = str(e)
+    except Exception as e:
+        # A bug of ours. The client still gets its answer, and the
+        # worker goes on to the next request.
+        traceback.print_exc()
+        response["error_class"] = error_class(e)
+        response["message"] = str(e)
+    finally:
+        if tmp_path is not None:
+            os.remove(tmp_path)
+    response["source"] = out.getvalue()
+    return response
+
+
+def failed_responder(request: dict, respond):
+    """
+    Return an error callback for the pool task handling `request`, which
+    answers the request as failed with `respond`. The task can fail
+    outside of handle_request(), say when its response can't be sent
+    back from the worker process.
+    """
+
+    def respond_failed(e: BaseException):
+        response = failed_response(request)
+        response["error_class"] = error_class(e)
+        response["message"] = str(e)
+        respond(response)
+
+    return respond_failed
+
+
+def serve_stream(
+    pool,
+    rfile,
+    wfile,
+    request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    poll_interval: float = 1.0,
+):
+    """
+    Hand each request line read from `rfile` to `pool`, writing
+    responses to `wfile` as they come in. Returns once `rfile` is
+    exhausted and every request has been answered.
+
+    A request that has no answer `request_timeout` seconds after it was
+    read is answered as failed. The pool calls back for neither success
+    nor failure when the worker process handling a request dies, for
+    example killed for using too much memory, so without this the
+    client would wait forever.
+    """
+    write_lock = threading.Lock()
+    pending_lock = threading.Lock()
+    # Request number -> (request, time by which it must be answered)
+    pending = {}
+    reading_done = threading.Event()
+    # Set when the watcher below should look again before its next poll.
+    wake_watcher = threading.Event()
+
+    def respond(response: dict):
+        line = json.dumps(response) + "\n"
+        with write_lock:
+            try:
+                wfile.write(line.encode("utf-8"))
+                wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # The client has gone away. This runs in the pool's
+                # result thread, which must not die.
+                pass
+
+    def responder(n: int):
+        """Return a function answering request number `n` once."""
+
+        def respond_once(response: dict):
+            with pending_lock:
+                if pending.pop(n, None) is None:
+                    # Answered already, as having timed out.
+                    return
+                if not pending:
+                    wake_watcher.set()
+            respond(response)
+
+        return respond_once
+
+    def watch():
+        while True:
+            wake_watcher.clear()
+            now = time.monotonic()
+            with pending_lock:
+                expired = [
+                    (n, request)
+                    for n, (request, deadline) in pending.items()
+                    if deadline <= now
+                ]
+                if not pending and reading_done.is_set():
+                    return
+            for n, request in expired:
+                response = failed_response(request)
+                response["message"] = (
+                    f"no answer within {request_timeout} seconds; "
+                    "the worker process may have died"
+                )
+                responder(n)(response)
+            wake_watcher.wait(poll_interval)
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    try:
+        for n, line in enumerate(rfile):
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request is not a JSON object")
+            except ValueError as e:
+                response = failed_response({})
+                response["message"] = str(e)
+                respond(response)
+                continue
+            with pending_lock:
+                pending[n] = (request, time.monotonic() + request_timeout)
+            respond_once = responder(n)
+            pool.apply_async(
+                handle_request,
+                (request,),
+                callback=respond_once,
+                error_callback=failed_responder(request, respond_once),
+            )
+    finally:
+        reading_done.set()
+        wake_watcher.set()
+        watcher.join()
+
+
+def remove_old_socket(socket_path: str):
+    """
+    Remove the socket an earlier server left at `socket_path`, if there
+    is one. Anything else there raises FileExistsError rather than
+    being removed.
+    """
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(
+            errno.EEXIST, "exists and is not a socket; not removing it", socket_path
+        )
+    os.remove(socket_path)
+
+
+def serve(
+    socket_path: Optional[str] = None,
+    jobs: int = 1,
+    cache_dir: Optional[str] = None,
+    cache_size: int = DEFAULT_CACHE_SIZE,
+    request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+):
+    """
+    Serve decompilation requests with `jobs` worker processes, on
+    standard input and output or, if `socket_path` is given, on a Unix
+    socket there. A socket left at `socket_path` by an earlier server
+    is replaced. Requests not answered within `request_timeout`
+    seconds are answered as failed; see serve_stream().
+    """
+    import multiprocessing
+
+    if socket_path is not None:
+        remove_old_socket(socket_path)
+    stdout = sys.stdout.buffer
+    # Workers forked from a warmed-up parent start out warm too.
+    warm_up()
+    pool = multiprocessing.Pool(
+        jobs, initializer=warm_up, initargs=(cache_dir, cache_size)
+    )
+    try:
+        if socket_path is None:
+            serve_stream(pool, sys.stdin.buffer, stdout, request_timeout)
+        else:
+
+            class Handler(socketserver.StreamRequestHandler):
+                def handle(self):
+                    serve_stream(pool, self.rfile, self.wfile, request_timeout)
+
+            with socketserver.ThreadingUnixStreamServer(socket_path, Handler) as server:
+                print(f"# decompyle3 serving on {socket_path}", file=sys.stderr)
+                try:
+                    server.serve_forever()
+                except KeyboardInterrupt:
+                    pass
+            os.remove(socket_path)
+    finally:
+        pool.close()
+        pool.join()
@@ -0,0 +1,105 @@
+#  Copyright (c) 2024 by Rocky Bernstein
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Timing of the phases of decompilation: loading, scanning, parsing,
+tree transformation, and emitting source text.
+
+Phases nest: while emitting the source for a module we scan and parse
+the code objects of the functions in it. Time is charged only to the
+innermost phase, so the times add up to the total.
+
+The code that does the work marks its phase with:
+
+    with phase("parse"):
+        ...
+
+which costs next to nothing unless timing has been turned on with
+timed_phases().
+"""
+
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Optional
+
+PHASES = ("load", "scan", "parse", "transform", "emit")
+
+
+class PhaseTimer:
+    """Accumulates time spent in each phase, charging the innermost one."""
+
+    def __init__(self):
+        self.times: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        # Stack of [phase name, time the phase was last resumed]
+        self.stack = []
+
+    def enter(self, name: str):
+        now = perf_counter()
+        if self.stack:
+            outer = self.stack[-1]
+            self.times[outer[0]] += now - outer[1]
+        self.stack.append([name, now])
+
+    def exit(self):
+        now = perf_counter()
+        name, start = self.stack.pop()
+        self.times[name] += now - start
+        if self.stack:
+            self.stack[-1][1] = now
+
+
+# The timer in use, or None if we are not timing.
+_timer: Optional[PhaseTimer] = None
+
+
+class _Phase:
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        if _timer is not None:
+            _timer.enter(self.name)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if _timer is not None:
+            _timer.exit()
+
+
+_phases = {name: _Phase(name) for name in PHASES}
+
+
+def phase(name: str) -> _Phase:
+    """Return a context manager marking the code it runs as phase `name`."""
+    return _phases[name]
+
+
+@contextmanager
+def timed_phases(base_phase: str = "emit"):
+    """
+    Time the phases of the code run in the body of a "with" statement,
+    yielding the PhaseTimer. Time not in any other phase is charged to
+    `base_phase`.
+    """
+    global _timer
+    outer_timer = _timer
+    _timer = timer = PhaseTimer()
+    timer.enter(base_phase)
+    try:
+        yield timer
+    finally:
+        while timer.stack:
+            timer.exit()
+        _timer = outer_timer
@@ -0,0 +1,105 @@
+import os
+import os.path as osp
+import zipfile
+from io import StringIO
+
+import decompyle3.archive as archive
+from decompyle3.archive import (
+    expand_archive,
+    input_exists,
+    is_archive,
+    open_archive,
+    read_input,
+    split_archive_path,
+)
+from decompyle3.main import decompile_file, main
+from decompyle3.semantics.pysource import PARSER_DEFAULT_DEBUG
+
+SRC_DIR = osp.normpath(osp.join(osp.dirname(__file__), "..", "test"))
+
+
+def test_archive(tmp_path):
+    pyc_path = osp.join(SRC_DIR, "bytecode_3.8", "run", "01_boolean.pyc")
+    with open(pyc_path, "rb") as f:
+        pyc_bytes = f.read()
+
+    archive_path = str(tmp_path / "pkg-1.0-py3-none-any.whl")
+    with zipfile.ZipFile(archive_path, "w") as zf:
+        zf.writestr("pkg/stored.pyc", pyc_bytes, zipfile.ZIP_STORED)
+        zf.writestr("pkg/deflated.pyc", pyc_bytes, zipfile.ZIP_DEFLATED)
+        zf.writestr("pkg/README.txt", "not bytecode")
+
+    assert is_archive(archive_path)
+    members = expand_archive(archive_path)
+    assert members == [
+        osp.join(archive_path, "pkg", "stored.pyc"),
+        osp.join(archive_path, "pkg", "deflated.pyc"),
+    ]
+    assert split_archive_path(members[0]) == (archive_path, "pkg/stored.pyc")
+    assert split_archive_path(pyc_path) == (None, pyc_path)
+    assert not input_exists(osp.join(archive_path, "pkg", "missing.pyc"))
+
+    expected = StringIO()
+    decompile_file(pyc_path, expected)
+    for member in members:
+        assert read_input(member) == pyc_bytes
+        out = StringIO()
+        decompile_file(member, out)
+        assert out.getvalue() == expected.getvalue()
+
+
+def test_open_archive_after_fork(tmp_path, monkeypatch):
+    archive_path = str(tmp_path / "pkg.zip")
+    with zipfile.ZipFile(archive_path, "w") as zf:
+        zf.writestr("pkg/mod.pyc", b"bytes", zipfile.ZIP_STORED)
+
+    reader = open_archive(archive_path)
+    assert open_archive(archive_path) is reader
+
+    # A forked process opens the archive for itself, and leaves the one
+    # its parent has alone.
+    monkeypatch.setattr(archive.os, "getpid", lambda: -1)
+    child_reader = open_archive(archive_path)
+    assert child_reader is not reader
+    assert not reader.file.closed
+    assert child_reader.read("pkg/mod.pyc") == b"bytes"
+
+
+def test_unsafe_members(tmp_path):
+    # Members whose names would put their output outside the output
+    # directory are left out ("zip slip").
+    pyc_path = osp.join(SRC_DIR, "bytecode_3.8", "run", "01_boolean.pyc")
+    with open(pyc_path, "rb") as f:
+        pyc_bytes = f.read()
+
+    archive_path = str(tmp_path / "pkg" / "evil-1.0-py3-none-any.whl")
+    os.makedirs(osp.dirname(archive_path))
+    with zipfile.ZipFile(archive_path, "w") as zf:
+        zf.writestr("../../escaped.pyc", pyc_bytes)
+        zf.writestr("/absolute.pyc", pyc_bytes)
+        zf.writestr("pkg/../../up.pyc", pyc_bytes)
+        zf.writestr("pkg/ok.pyc", pyc_bytes)
+
+    members = expand_archive(archive_path)
+    assert members == [osp.join(archive_path, "pkg", "ok.pyc")]
+    unsafe = osp.join(archive_path, "..", "..", "escaped.pyc")
+    assert split_archive_path(unsafe) == (None, unsafe)
+    assert not input_exists(unsafe)
+
+    out_base = tmp_path / "out" / "deeper"
+    out_base.mkdir(parents=True)
+    names = [member[len(archive_path) + 1 :] for member in members]
+    names.append(osp.join("..", "..", "escaped.pyc"))
+    totals = main(
+        archive_path, str(out_base), names, [], showgrammar=PARSER_DEFAULT_DEBUG
+    )
+    assert totals == (1, 1, 0, 0)
+    written = sorted(
+        osp.relpath(osp.join(root, name), str(tmp_path))
+        for root, _, files in os.walk(str(tmp_path))
+        for name in files
+    )
+    assert written == [
+        osp.join("out", "deeper", "pkg", "ok.py"),
+        osp.join("pkg", "evil-1.0-py3-none-any.whl"),
+    ]
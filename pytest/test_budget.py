@@ -0,0 +1,67 @@
+import os.path as osp
+import signal
+
+import pytest
+from decompyle3.budget import BudgetExceeded, file_budget
+from decompyle3.parsers.main import get_python_parser
+from decompyle3.scanners.tok import Token
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+needs_rlimit = pytest.mark.skipif(
+    resource is None or not osp.exists("/proc/self/statm"),
+    reason="needs address-space limits",
+)
+
+
+@pytest.mark.skipif(not hasattr(signal, "setitimer"), reason="needs an interval timer")
+def test_timeout():
+    def work_on(co):
+        # Spin until the timer goes off, however fast the machine is.
+        while True:
+            pass
+
+    with pytest.raises(BudgetExceeded) as exc_info:
+        with file_budget(timeout=0.001):
+            work_on(test_timeout.__code__)
+    e = exc_info.value
+    assert e.kind == "time"
+    assert e.code is test_timeout.__code__
+    assert str(e).startswith("budget exceeded: time limit of 0.001 seconds")
+
+    # The timer should be cancelled once we leave the "with".
+    with file_budget(timeout=60):
+        pass
+    assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
+
+
+@needs_rlimit
+def test_max_memory():
+    old_rlimit = resource.getrlimit(resource.RLIMIT_AS)
+    with pytest.raises(BudgetExceeded) as exc_info:
+        with file_budget(max_memory=64):
+            bytearray(1024 * 1024 * 1024)
+    e = exc_info.value
+    assert e.kind == "memory"
+    assert str(e).startswith("budget exceeded: memory limit of 64 MB")
+    assert resource.getrlimit(resource.RLIMIT_AS) == old_rlimit
+
+
+@needs_rlimit
+def test_max_memory_in_reduce_check():
+    # Running out of memory in a reduction check is the memory budget
+    # being exceeded, not a parse error.
+    p = get_python_parser((3, 8))
+
+    def greedy_invalid(self, lhs, n, rule, tree, tokens, first, last):
+        return len(bytearray(1024 * 1024 * 1024)) == 0
+
+    p.reduce_check_table = {"stmt": greedy_invalid}
+    tokens = [Token("POP_TOP", offset=0)]
+    with pytest.raises(BudgetExceeded) as exc_info:
+        with file_budget(max_memory=64):
+            p.reduce_is_invalid(("stmt", ("POP_TOP",)), None, tokens, 0, 0)
+    assert exc_info.value.kind == "memory"
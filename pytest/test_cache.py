@@ -0,0 +1,58 @@
+import os
+import os.path as osp
+from io import StringIO
+
+import decompyle3.main
+from decompyle3.cache import CachedDeparse, DecompileCache
+from decompyle3.main import decompile_file
+
+SRC_DIR = osp.normpath(osp.join(osp.dirname(__file__), "..", "test"))
+
+
+def test_cache_hit(tmp_path):
+    path = osp.join(SRC_DIR, "bytecode_3.8", "run", "01_boolean.pyc")
+    cache = DecompileCache(str(tmp_path))
+
+    out = StringIO()
+    deparsed = decompile_file(path, out, cache=cache)
+    assert not isinstance(deparsed[0], CachedDeparse)
+
+    cached_out = StringIO()
+    cached = decompile_file(path, cached_out, cache=cache)
+    assert isinstance(cached[0], CachedDeparse)
+    assert cached[0].version[:2] == (3, 8)
+    assert cached_out.getvalue() == out.getvalue()
+
+    # Different options use a different entry.
+    decompile_file(path, StringIO(), source_encoding="utf-8", cache=cache)
+    assert len(list(cache._entries())) == 2
+
+
+def test_cache_hit_objects(tmp_path, monkeypatch):
+    # A hit gives as many objects as decompiling did, none included.
+    path = osp.join(SRC_DIR, "bytecode_3.8", "run", "01_boolean.pyc")
+    for count in (0, 2):
+        cache = DecompileCache(str(tmp_path / str(count)))
+        deparsed = [CachedDeparse(None, (3, 8, 18), "")] * count
+        monkeypatch.setattr(decompyle3.main, "_decompile_file", lambda *args: deparsed)
+        assert decompile_file(path, StringIO(), cache=cache) == deparsed
+        cached = decompile_file(path, StringIO(), cache=cache)
+        assert [d.version for d in cached] == [(3, 8, 18)] * count
+
+
+def test_cache_eviction(tmp_path):
+    cache = DecompileCache(str(tmp_path), max_size=1000)
+    for i in range(10):
+        key = cache.key(bytes([i]), {})
+        cache.put(key, {"status": "ok", "source": "x" * 200, "linemap": ""})
+        # Make sure modification times differ.
+        os.utime(cache._path(key), (i, i))
+    assert cache.total_size <= 1000
+    assert cache.get(cache.key(bytes([9]), {})) is not None
+    assert cache.get(cache.key(bytes([0]), {})) is None
+
+    # Replacing an entry counts its size once.
+    total_size = cache.total_size
+    key = cache.key(bytes([9]), {})
+    cache.put(key, {"status": "ok", "source": "x" * 200, "linemap": ""})
+    assert cache.total_size == total_size
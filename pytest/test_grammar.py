@@ -29,6 +29,16 @@ def test_grammar():
     expect_lhs.add("load_genexpr")
     expect_lhs.add("kv3")
     expect_lhs.add("lambda_start")  # Start symbol for lambda expressions
+    if PYTHON_VERSION_TRIPLE[:2] == (3, 8):
+        # remove_rules_38() removes the "stmt" rules for these when the
+        # parser is made.
+        expect_lhs |= {
+            "async_for_stmt37",
+            "async_forelse_stmt",
+            "for",
+            "forelsestmt",
+            "try_except36",
+        }
 
     unused_rhs = unused_rhs.union(
         set(
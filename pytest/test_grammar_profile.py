@@ -0,0 +1,48 @@
+import os.path as osp
+from io import StringIO
+
+from decompyle3.main import decompile_file
+from decompyle3.parsers.profile import (
+    PARSE_COLUMNS,
+    RULE_COLUMNS,
+    GrammarProfile,
+    profiling_grammar,
+)
+
+SRC_DIR = osp.normpath(osp.join(osp.dirname(__file__), "..", "test"))
+
+
+def decompile_source(path: str) -> str:
+    out = StringIO()
+    decompile_file(path, out)
+    return out.getvalue()
+
+
+def test_grammar_profile(tmp_path):
+    path = osp.join(SRC_DIR, "bytecode_3.8", "run", "01_class.pyc")
+    expected = decompile_source(path)
+
+    profile = GrammarProfile()
+    with profiling_grammar(profile):
+        assert decompile_source(path) == expected
+
+    assert profile.parses
+    for record in profile.parses:
+        assert record["status"] == "ok"
+        assert len(record["items_per_token"]) == record["tokens"] + 1
+        assert record["items"] == sum(record["items_per_token"])
+    counts = profile.rules["stmts ::= stmts stmt"]
+    assert counts.predicted > 0 and counts.completed > 0
+    assert any(c.rejected for c in profile.rules.values())
+    assert all(c.rejected <= c.check_calls for c in profile.rules.values())
+
+    report_path = str(tmp_path / "grammar.tsv")
+    profile.write(report_path)
+    with open(report_path) as f:
+        lines = f.read().splitlines()
+    assert lines[0].split("\t") == list(RULE_COLUMNS)
+    assert len(lines) == len(profile.rules) + 1
+    with open(report_path + ".parses") as f:
+        lines = f.read().splitlines()
+    assert lines[0].split("\t") == list(PARSE_COLUMNS)
+    assert len(lines) == len(profile.parses) + 1
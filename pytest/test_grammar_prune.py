@@ -0,0 +1,48 @@
+import os.path as osp
+from io import StringIO
+
+import decompyle3.parsers.main as parsers_main
+from decompyle3.main import decompile_file
+from decompyle3.parsers import grammar_prune
+from decompyle3.parsers.main import get_python_parser
+from decompyle3.parsers.profile import GrammarProfile, profiling_grammar
+from decompyle3.semantics.pysource import PARSER_DEFAULT_DEBUG
+
+SRC_DIR = osp.normpath(osp.join(osp.dirname(__file__), "..", "test"))
+
+
+def decompile_source(path: str) -> str:
+    out = StringIO()
+    decompile_file(path, out)
+    return out.getvalue()
+
+
+def test_grammar_prune(tmp_path, monkeypatch):
+    monkeypatch.delenv(grammar_prune.PRUNED_GRAMMAR_ENV, raising=False)
+    path = osp.join(SRC_DIR, "bytecode_3.8", "run", "01_class.pyc")
+    expected = decompile_source(path)
+    full = get_python_parser((3, 8), PARSER_DEFAULT_DEBUG, "exec")
+
+    profile = GrammarProfile()
+    with profiling_grammar(profile):
+        decompile_source(path)
+    counts = grammar_prune.prune_grammars(profile, str(tmp_path))
+    kept, total = counts[type(full).__name__]
+    assert kept < total == sum(len(rules) for rules in full.rules.values())
+
+    # New parsers use the pruned grammars, and decompile the same.
+    monkeypatch.setenv(grammar_prune.PRUNED_GRAMMAR_ENV, str(tmp_path))
+    monkeypatch.setattr(grammar_prune, "_pruned", {})
+    monkeypatch.setattr(parsers_main, "_parser_pool", {})
+    pruned = get_python_parser((3, 8), PARSER_DEFAULT_DEBUG, "exec")
+    assert sum(len(rules) for rules in pruned.rules.values()) == kept
+    assert pruned.rule2func.keys() < full.rule2func.keys()
+    assert decompile_source(path) == expected
+
+    # A pruned grammar for a grammar that has since changed is ignored.
+    grammar_path = grammar_prune.pruned_grammar_path(str(tmp_path), type(full))
+    key, rules = grammar_prune.read_pruned_grammar(grammar_path)
+    grammar_prune.write_pruned_grammar(grammar_path, "old" + key, rules, total)
+    monkeypatch.setattr(grammar_prune, "_pruned", {})
+    stale = get_python_parser((3, 8), PARSER_DEFAULT_DEBUG, "exec")
+    assert stale.rules == full.rules
@@ -0,0 +1,47 @@
+from decompyle3.parsers import grammar_snapshot
+from decompyle3.parsers.main import get_python_parser
+from decompyle3.semantics.pysource import PARSER_DEFAULT_DEBUG
+
+
+def test_grammar_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setenv(grammar_snapshot.GRAMMAR_CACHE_ENV, str(tmp_path))
+    monkeypatch.setattr(grammar_snapshot, "_snapshots", {})
+
+    # A snapshot from an earlier edit of the grammar, and one from another
+    # version of decompyle3 sharing the cache.
+    version_dir = tmp_path / grammar_snapshot._version_dir("")
+    stale = version_dir / "Python38ParserExec-0000000000000000.pickle"
+    other_version = tmp_path / "0.0.0-spark-0.0.0" / stale.name
+    for path in (stale, other_version):
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b"")
+
+    collected = get_python_parser((3, 8), PARSER_DEFAULT_DEBUG, "exec")
+    snapshots = list(version_dir.iterdir())
+    assert len(snapshots) == 1 and snapshots[0] != stale
+    assert other_version.exists()
+
+    # Once from the in-memory snapshot, once from the one on disk.
+    from_memory = get_python_parser((3, 8), PARSER_DEFAULT_DEBUG, "exec")
+    monkeypatch.setattr(grammar_snapshot, "_snapshots", {})
+    from_disk = get_python_parser((3, 8), PARSER_DEFAULT_DEBUG, "exec")
+
+    for parser in (from_memory, from_disk):
+        assert parser.rules == collected.rules
+        assert parser.rule2name == collected.rule2name
+        assert parser.list_like_nt == collected.list_like_nt
+        assert parser.optional_nt == collected.optional_nt
+        assert parser.rule2func.keys() == collected.rule2func.keys()
+
+    # Parsers must not share rules.
+    from_memory.addRule("stmt ::= NOT_A_TOKEN", lambda self, args: None)
+    assert from_memory.rules["stmt"] != from_disk.rules["stmt"]
+
+
+def test_grammar_snapshot_debug_bool(tmp_path, monkeypatch):
+    monkeypatch.setenv(grammar_snapshot.GRAMMAR_CACHE_ENV, str(tmp_path))
+    monkeypatch.setattr(grammar_snapshot, "_snapshots", {})
+
+    # Callers, such as test_pythonlib.py, can pass a bool for debug.
+    collected = get_python_parser((3, 8), PARSER_DEFAULT_DEBUG, "exec")
+    assert get_python_parser((3, 8), False, "exec").rules == collected.rules
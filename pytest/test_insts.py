@@ -0,0 +1,138 @@
+import os.path as osp
+
+import pytest
+from xdis import Bytecode, iscode
+from xdis.load import load_module
+
+import decompyle3.scanner as scanner_module
+from decompyle3.scanner import get_scanner
+from decompyle3.scanners.insts import InstructionTable
+
+SRC_DIR = osp.normpath(osp.join(osp.dirname(__file__), "..", "test"))
+
+
+def code_objects(path: str):
+    co = load_module(osp.join(SRC_DIR, path))[3]
+    todo = [co]
+    while todo:
+        co = todo.pop()
+        yield co
+        todo.extend(const for const in co.co_consts if iscode(const))
+
+
+@pytest.mark.parametrize("table", [False, True])
+@pytest.mark.parametrize(
+    "path",
+    [
+        "bytecode_3.8/run/03_extended_arg_in_loop.pyc",
+        "bytecode_3.7/exec/04_class_kwargs.pyc",
+    ],
+)
+def test_instructions(path, table, monkeypatch):
+    # Code objects this small only get a table when we lower the size
+    # that needs one.
+    if table:
+        monkeypatch.setattr(scanner_module, "TABLE_MIN_CODE_SIZE", 0)
+    for co in code_objects(path):
+        scanner = get_scanner((3, 8) if "3.8" in path else (3, 7))
+        scanner.build_instructions(co)
+        insts = scanner.insts
+        assert isinstance(insts, InstructionTable) == table
+        # The instructions are those xdis gives, less EXTENDED_ARGs,
+        # whose offsets go to the instructions they extend.
+        expected = [
+            inst for inst in Bytecode(co, scanner.opc) if inst.opname != "EXTENDED_ARG"
+        ]
+        assert len(insts) == len(expected)
+        for i, (inst, xdis_inst) in enumerate(zip(insts, expected)):
+            if table:
+                assert inst.index == i
+                assert inst.is_jump() == xdis_inst.is_jump()
+                inst = inst.as_instruction()
+            assert (
+                inst._replace(
+                    offset=xdis_inst.offset,
+                    starts_line=xdis_inst.starts_line,
+                    is_jump_target=xdis_inst.is_jump_target,
+                )
+                == xdis_inst
+            )
+            assert scanner.offset2inst_index[inst.offset] == i
+            if inst.has_extended_arg:
+                assert inst.offset + 2 == xdis_inst.offset
+                assert scanner.offset2inst_index[xdis_inst.offset] == i
+                assert scanner.get_inst(xdis_inst.offset).offset == inst.offset
+
+        for offset in (-2, 1, len(co.co_code), "0_1"):
+            assert offset not in scanner.offset2inst_index
+            with pytest.raises(KeyError):
+                scanner.offset2inst_index[offset]
+
+
+def test_instruction_table_replace(monkeypatch):
+    monkeypatch.setattr(scanner_module, "TABLE_MIN_CODE_SIZE", 0)
+    co = next(code_objects("bytecode_3.8/run/03_extended_arg_in_loop.pyc"))
+    scanner = get_scanner((3, 8))
+    scanner.build_instructions(co)
+    insts = scanner.insts
+    jump_index = next(i for i, inst in enumerate(insts) if inst.is_jump())
+    jump = insts[jump_index].as_instruction()
+
+    insts[0] = jump._replace(offset=insts[0].offset)
+    assert insts[0].opname == jump.opname
+    assert insts[0].argval == jump.argval
+    assert insts[0].argrepr == jump.argrepr
+    assert insts[0].offset == 0
+    assert scanner.offset2inst_index[0] == 0
+    assert insts[-1].offset == insts[len(insts) - 1].offset
+
+
+def test_opcode_index():
+    co = next(code_objects("bytecode_3.8/run/03_extended_arg_in_loop.pyc"))
+    scanner = get_scanner((3, 8))
+    scanner.build_instructions(co)
+    index = scanner.inst_index
+    jumps = [inst for inst in scanner.insts if inst.is_jump()]
+    opcodes = {inst.opcode for inst in jumps}
+    start, end = jumps[1].offset, jumps[-1].offset
+    in_range = [inst for inst in jumps if start <= inst.offset < end]
+
+    assert index.between(opcodes, start, end) == [inst.offset for inst in in_range]
+    assert index.with_targets(opcodes, start, end) == [
+        (inst.offset, inst.argval) for inst in in_range
+    ]
+    target = in_range[-1].argval
+    assert index.targeting(opcodes, target, start, end) == [
+        inst.offset for inst in in_range if inst.argval == target
+    ]
+    distance, offsets = index.nearest(opcodes, target + 1, start, end)
+    assert distance == 1 and in_range[-1].offset in offsets
+    assert index.between(opcodes, end, start) == []
+    assert index.nearest(opcodes, target, end, start) == (None, [])
+
+
+def test_opcode_index_nearest():
+    co = next(code_objects("bytecode_3.7/run/05_control_flow_bugs.pyc"))
+    scanner = get_scanner((3, 7))
+    scanner.build_instructions(co)
+    index = scanner.inst_index
+    jumps = [inst for inst in scanner.insts if inst.is_jump()]
+    opcodes = {inst.opcode for inst in jumps}
+    offsets = [inst.offset for inst in jumps] + [len(co.co_code)]
+    targets = {inst.argval + d for inst in jumps for d in (-2, 0, 2)}
+    for start in offsets:
+        for end in offsets:
+            in_range = [inst for inst in jumps if start <= inst.offset < end]
+            for target in targets:
+                if not in_range:
+                    assert index.nearest(opcodes, target, start, end) == (None, [])
+                    continue
+                distance = min(abs(target - inst.argval) for inst in in_range)
+                assert index.nearest(opcodes, target, start, end) == (
+                    distance,
+                    [
+                        inst.offset
+                        for inst in in_range
+                        if abs(target - inst.argval) == distance
+                    ],
+                )
@@ -0,0 +1,33 @@
+import pytest
+
+from decompyle3.scanners.intervals import LineTable, PrevOpTable
+
+
+def test_line_table():
+    # The first line starts after offset 0, and one line has no code.
+    lines = LineTable([(2, 10), (6, 11), (6, 12), (10, 14)], 14)
+    expected = [(10, 6)] * 6 + [(12, 10)] * 4 + [(14, 14)] * 4
+    assert len(lines) == len(expected)
+    for offset in range(-len(expected), len(expected)):
+        assert tuple(lines[offset]) == expected[offset]
+    assert lines[7].l_no == 12 and lines[7].next == 10
+    for offset in (14, -15):
+        with pytest.raises(IndexError):
+            lines[offset]
+
+    assert len(LineTable([], 14)) == 0
+    with pytest.raises(IndexError):
+        LineTable([], 14)[0]
+
+
+def test_prev_op_table():
+    prev_op = PrevOpTable([0, 2, 4, 6], 8)
+    expected = [0, 0, 0, 2, 2, 4, 4, 6, 6]
+    assert [prev_op[offset] for offset in range(len(prev_op))] == expected
+    assert prev_op[-1] == 6
+
+    prev_op[5] = 2
+    expected[5] = 2
+    assert [prev_op[offset] for offset in range(len(prev_op))] == expected
+    with pytest.raises(IndexError):
+        prev_op[9] = 0
@@ -0,0 +1,75 @@
+import queue
+from multiprocessing import Queue
+
+import pytest
+
+import decompyle3.bin.decompile as decompile_bin
+
+
+class ResultQueue(queue.Queue):
+    def close(self):
+        pass
+
+
+MAIN_KWARGS = {
+    "cache_dir": None,
+    "cache_size": 1024 * 1024,
+    "parse_cache": False,
+    "report_path": None,
+}
+
+
+def test_process_func_error(monkeypatch):
+    # An error main() doesn't expect fails its file, and the totals for
+    # the other files still get back to the parent.
+    def main(src_base, out_base, files, source_files, manifest=None, **kwargs):
+        if files == ["bad.pyc"]:
+            raise AssertionError("bad")
+        return 1, 1, 0, 0
+
+    monkeypatch.setattr(decompile_bin, "main", main)
+    fqueue, rqueue = Queue(), ResultQueue()
+    for f in ("a.pyc", "bad.pyc", "b.pyc", None):
+        fqueue.put(f)
+    decompile_bin.process_func(fqueue, rqueue, ".", "out", MAIN_KWARGS, False)
+    assert rqueue.get_nowait() == ((3, 2, 1, 0), None)
+
+
+def test_process_func_shares_caches(monkeypatch, tmp_path):
+    # The caches and report are opened once per process, not per file.
+    seen = []
+
+    def main(src_base, out_base, files, source_files, **kwargs):
+        seen.append((kwargs["cache"], kwargs["tree_cache"], kwargs["report"]))
+        return 1, 1, 0, 0
+
+    monkeypatch.setattr(decompile_bin, "main", main)
+    main_kwargs = dict(
+        MAIN_KWARGS,
+        cache_dir=str(tmp_path / "cache"),
+        parse_cache=True,
+        report_path=str(tmp_path / "report.jsonl"),
+    )
+    fqueue, rqueue = Queue(), ResultQueue()
+    for f in ("a.pyc", "b.pyc", None):
+        fqueue.put(f)
+    decompile_bin.process_func(fqueue, rqueue, ".", "out", main_kwargs, False)
+    assert rqueue.get_nowait() == ((2, 2, 0, 0), None)
+    assert len(seen) == 2 and seen[0] == seen[1]
+    cache, tree_cache, report = seen[0]
+    assert cache is not None and tree_cache is not None
+    assert report.file.closed
+
+
+class DeadProcess:
+    def is_alive(self):
+        return False
+
+
+def test_wait_for_result():
+    rqueue = Queue()
+    rqueue.put("result")
+    procs = [DeadProcess()]
+    assert decompile_bin.wait_for_result(rqueue, procs, 0.1) == "result"
+    with pytest.raises(queue.Empty):
+        decompile_bin.wait_for_result(rqueue, procs, 0.1)
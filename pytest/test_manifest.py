@@ -0,0 +1,35 @@
+import os
+
+from decompyle3.manifest import Manifest
+
+
+def test_manifest(tmp_path):
+    in_dir = tmp_path / "in"
+    out_dir = tmp_path / "out"
+    in_dir.mkdir()
+    out_dir.mkdir()
+    for name in ("a.pyc", "b.pyc", "c.pyc"):
+        (in_dir / name).write_bytes(name.encode())
+    output = out_dir / "c.py"
+    output.write_text("pass\n")
+
+    manifest = Manifest(str(out_dir))
+    manifest.record(str(in_dir / "a.pyc"), "ok")
+    manifest.record(str(in_dir / "b.pyc"), "failed", "Parse error")
+    manifest.record(str(in_dir / "c.pyc"), "ok", output=str(output))
+    manifest.save()
+
+    # Touched but unchanged files, and changed files.
+    os.utime(in_dir / "a.pyc", (0, 0))
+    (in_dir / "b.pyc").write_bytes(b"changed")
+    (in_dir / "d.pyc").write_bytes(b"new")
+    os.remove(in_dir / "c.pyc")
+
+    manifest = Manifest.load(str(out_dir))
+    assert manifest.remove_deleted() == [str(in_dir / "c.pyc")]
+    assert not output.exists()
+
+    changed, unchanged = manifest.partition(str(in_dir), ["a.pyc", "b.pyc", "d.pyc"])
+    assert changed == ["b.pyc", "d.pyc"]
+    assert unchanged == ["a.pyc"]
+    assert manifest.failures(str(in_dir), unchanged) == []
@@ -0,0 +1,36 @@
+import os.path as osp
+from io import StringIO
+
+from decompyle3.main import decompile_file
+from decompyle3.parse_cache import ParseCache, using_parse_cache
+
+SRC_DIR = osp.normpath(osp.join(osp.dirname(__file__), "..", "test"))
+
+
+def decompile_source(path: str) -> str:
+    out = StringIO()
+    decompile_file(path, out)
+    return out.getvalue()
+
+
+def test_parse_cache(tmp_path):
+    path = osp.join(SRC_DIR, "bytecode_3.8", "run", "01_class.pyc")
+    expected = decompile_source(path)
+
+    cache = ParseCache(cache_dir=str(tmp_path))
+    with using_parse_cache(cache):
+        assert decompile_source(path) == expected
+        assert cache.hits == 0
+        misses = cache.misses
+        # Decompiling again uses the trees built the first time,
+        # and the trees are not changed by writing source from them.
+        assert decompile_source(path) == expected
+        assert cache.hits == misses
+        assert decompile_source(path) == expected
+
+    # Trees of functions without nested functions are on disk.
+    assert list(cache.disk_cache._entries())
+    disk_cache = ParseCache(cache_dir=str(tmp_path))
+    with using_parse_cache(disk_cache):
+        assert decompile_source(path) == expected
+    assert disk_cache.hits > 0
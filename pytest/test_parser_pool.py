@@ -0,0 +1,50 @@
+from decompyle3.parsers.main import acquire_parser, parse, release_parser
+from decompyle3.scanner import get_scanner
+from decompyle3.semantics.pysource import PARSER_DEFAULT_DEBUG
+
+
+def sample_function(a, b):
+    return [x + y for x, y in zip(a, b)], (a, b)
+
+
+def test_parser_pool():
+    p = acquire_parser((3, 8), PARSER_DEFAULT_DEBUG, "exec")
+    rules = {lhs: list(rules) for lhs, rules in p.rules.items()}
+    optional_nt = set(p.optional_nt)
+
+    scanner = get_scanner((3, 8))
+    tokens, customize = scanner.ingest(sample_function.__code__)
+    p.insts = scanner.insts
+    p.offset2inst_index = scanner.offset2inst_index
+    p.opc = scanner.opc
+    parse(p, tokens, customize, is_lambda=False)
+    assert p.rules != rules
+    release_parser(p)
+
+    # Releasing twice doesn't put the parser in the pool twice.
+    release_parser(p)
+
+    q = acquire_parser((3, 8), PARSER_DEFAULT_DEBUG, "exec")
+    assert q is p
+    assert q.rules == rules
+    assert q.optional_nt == optional_nt
+    assert q.insts == []
+    assert not q.is_lambda
+    assert acquire_parser((3, 8), PARSER_DEFAULT_DEBUG, "exec") is not p
+
+
+def test_fragments_release_parsers(monkeypatch):
+    from xdis import IS_PYPY, PYTHON_VERSION_TRIPLE
+
+    import decompyle3.parsers.main as parsers_main
+    from decompyle3.semantics.fragments import code_deparse
+
+    monkeypatch.setattr(parsers_main, "_parser_pool", {})
+    lambda_key = (PYTHON_VERSION_TRIPLE[:2], "lambda", IS_PYPY)
+    co = compile("f = lambda a: [x for x in a]\n", "<test>", "exec")
+
+    # The lambda parser goes back to the pool, and the next walker uses it.
+    code_deparse(co)
+    (p,) = parsers_main._parser_pool[lambda_key]
+    code_deparse(co)
+    assert parsers_main._parser_pool[lambda_key] == [p]
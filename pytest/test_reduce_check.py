@@ -0,0 +1,35 @@
+from decompyle3.parsers.main import get_python_parser
+from decompyle3.scanners.tok import Token
+
+
+def test_reduce_checks_remembered():
+    p = get_python_parser((3, 8))
+    calls = []
+
+    def pop_top_invalid(self, lhs, n, rule, tree, tokens, first, last):
+        calls.append((first, last))
+        return tokens[first].kind == "POP_TOP"
+
+    p.reduce_check_table = {"stmt": pop_top_invalid, "expr": pop_top_invalid}
+    p.check_reduce = {"stmt": "tokens"}
+    rule = ("stmt", ("POP_TOP",))
+    other_rule = ("stmt", ("LOAD_CONST",))
+    tokens = [Token("POP_TOP", offset=0), Token("LOAD_CONST", offset=2)]
+
+    assert p.reduce_is_invalid(rule, None, tokens, 0, 1)
+    assert not p.reduce_is_invalid(rule, None, tokens, 1, 2)
+    assert not p.reduce_is_invalid(other_rule, None, tokens, 1, 2)
+    assert calls == [(0, 1), (1, 1), (1, 1)]
+
+    # Asking again gives the same answers without checking again.
+    assert p.reduce_is_invalid(rule, None, tokens, 0, 1)
+    assert not p.reduce_is_invalid(rule, None, tokens, 1, 2)
+    assert len(calls) == 3
+
+    # Checks on a tree look at it each time: another derivation of the
+    # same tokens can give a different answer.
+    p.check_reduce["expr"] = "AST"
+    expr_rule = ("expr", ("POP_TOP",))
+    assert p.reduce_is_invalid(expr_rule, [tokens[0]], tokens, 0, 1)
+    assert p.reduce_is_invalid(expr_rule, [tokens[0]], tokens, 0, 1)
+    assert len(calls) == 5
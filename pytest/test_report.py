@@ -0,0 +1,32 @@
+import json
+import os.path as osp
+
+from decompyle3.main import main
+from decompyle3.semantics.pysource import PARSER_DEFAULT_DEBUG
+from decompyle3.timing import PHASES
+
+SRC_DIR = osp.normpath(osp.join(osp.dirname(__file__), "..", "test"))
+
+
+def test_report(tmp_path):
+    in_base = osp.join(SRC_DIR, "bytecode_3.8", "run")
+    report_path = str(tmp_path / "report.jsonl")
+    main(
+        in_base,
+        str(tmp_path),
+        ["01_boolean.pyc"],
+        [],
+        showgrammar=PARSER_DEFAULT_DEBUG,
+        report_path=report_path,
+    )
+    with open(report_path) as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 1
+    record = records[0]
+    assert record["path"] == osp.join(in_base, "01_boolean.pyc")
+    assert record["version"].startswith("3.8")
+    assert record["status"] == "ok"
+    assert record["error_class"] is None
+    assert record["output"] == str(tmp_path / "01_boolean.py")
+    assert set(record["times"]) == set(PHASES)
+    assert record["times"]["parse"] > 0
@@ -0,0 +1,127 @@
+import os.path as osp
+from io import StringIO
+
+import pytest
+from xdis.version_info import PYTHON_VERSION_TRIPLE
+
+import decompyle3.parsers.main as parsers_main
+import decompyle3.parsers.segment as segment
+from decompyle3.main import decompile_file
+from decompyle3.parsers.main import get_python_parser
+from decompyle3.scanner import get_scanner
+
+SRC_DIR = osp.normpath(osp.join(osp.dirname(__file__), "..", "test"))
+
+
+def decompile_source(path: str) -> str:
+    out = StringIO()
+    decompile_file(path, out)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "bytecode_3.8/run/01_class.pyc",
+        "bytecode_3.8/run/03_extended_arg_in_loop.pyc",
+        "bytecode_3.7/exec/04_class_kwargs.pyc",
+        "bytecode_3.7/run/01_chained_compare.pyc",
+    ],
+)
+def test_segmented_parse(monkeypatch, path):
+    path = osp.join(SRC_DIR, path)
+    monkeypatch.setattr(segment, "SEGMENT_MIN_TOKENS", 10**9)
+    expected = decompile_source(path)
+
+    # Cut wherever we can, and check that we did cut somewhere.
+    segmented_trees = []
+
+    def parse_segments(p, tokens):
+        tree = segment.parse_segments(p, tokens)
+        segmented_trees.append(tree)
+        return tree
+
+    monkeypatch.setattr(segment, "SEGMENT_MIN_TOKENS", 2)
+    monkeypatch.setattr(segment, "SEGMENT_TOKENS", 1)
+    monkeypatch.setattr(parsers_main, "parse_segments", parse_segments)
+    with segment.using_segments():
+        assert decompile_source(path) == expected
+    assert any(tree is not None for tree in segmented_trees)
+
+    # Segments are only used when asked for.
+    segmented_trees.clear()
+    decompile_source(path)
+    assert segmented_trees and all(tree is None for tree in segmented_trees)
+
+
+def test_segment_ends_in_block():
+    # The module code has an "if" whose "else" takes in the statements
+    # after it, up to the end of the first segment. We parse the whole
+    # stream instead, so that the statements after the segment go into
+    # the "else" as well.
+    path = osp.join(SRC_DIR, "bytecode_3.7/run/01_chained_compare.pyc")
+    expected = decompile_source(path)
+    with segment.using_segments():
+        assert decompile_source(path) == expected
+
+
+# Line 2 starts a statement; line 4 is where the "if" jumps to; line 5
+# comes after a conditional expression and line 6 after an "or"; line
+# 7 is the start of a "try" block; the handler jumps to line 11; line
+# 13 is inside a dictionary; and line 15 comes after all of these.
+CUT_SOURCE = """\
+import os
+if os.sep:
+    a = 1
+b = 2 if a else 3
+c = a or b
+d = c
+try:
+    e = int(a)
+except ValueError:
+    e = None
+f = {
+    "a": a,
+    "b": b,
+}
+g = f
+"""
+
+
+@pytest.mark.skipif(
+    not (3, 7) <= PYTHON_VERSION_TRIPLE < (3, 9), reason="assume Python 3.7 or 3.8"
+)
+def test_cut_offsets():
+    co = compile(CUT_SOURCE, "<cut>", "exec")
+    scanner = get_scanner(PYTHON_VERSION_TRIPLE[:2])
+    scanner.build_instructions(co)
+    offsets = segment.cut_offsets(scanner.insts, scanner.opc)
+    lines = {inst.starts_line for inst in scanner.insts if inst.offset in offsets}
+    assert lines == {1, 2, 5, 6, 15}
+
+
+def test_continuation_prefixes():
+    # "import os" and "import sys" on the lines after it are joined into
+    # "import os, sys", so we don't cut before "import sys".
+    p = get_python_parser((3, 8))
+    assert ("LOAD_CONST", "LOAD_CONST", "IMPORT_NAME") in segment.continuation_prefixes(
+        p
+    )
+
+
+def test_segment_parse_error(monkeypatch, capsys):
+    path = osp.join(SRC_DIR, "bytecode_3.8/run/01_class.pyc")
+    monkeypatch.setattr(segment, "SEGMENT_MIN_TOKENS", 10**9)
+    expected = decompile_source(path)
+    capsys.readouterr()
+
+    # Cutting after the first token leaves segments that don't parse.
+    # We parse the whole stream instead, and don't report the errors.
+    def segment_bounds(tokens, points):
+        return [(0, 1), (1, len(tokens))]
+
+    monkeypatch.setattr(segment, "SEGMENT_MIN_TOKENS", 2)
+    monkeypatch.setattr(segment, "segment_bounds", segment_bounds)
+    with segment.using_segments():
+        assert decompile_source(path) == expected
+    assert "Instruction context" not in capsys.readouterr().out
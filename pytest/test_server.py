@@ -0,0 +1,145 @@
+import base64
+import json
+import multiprocessing
+import os
+import os.path as osp
+import socket
+from io import BytesIO
+from multiprocessing.pool import ThreadPool
+
+import pytest
+
+import decompyle3.server as server
+from decompyle3.server import handle_request, remove_old_socket, serve_stream
+
+SRC_DIR = osp.normpath(osp.join(osp.dirname(__file__), "..", "test"))
+PYC_PATH = osp.join(SRC_DIR, "bytecode_3.8", "run", "01_boolean.pyc")
+
+
+def test_handle_request():
+    response = handle_request({"id": 1, "path": PYC_PATH})
+    assert response["id"] == 1
+    assert response["status"] == "ok"
+    assert response["version"].startswith("3.8")
+
+    with open(PYC_PATH, "rb") as f:
+        bytecode = base64.b64encode(f.read()).decode("ascii")
+    from_bytes = handle_request({"id": 2, "bytecode": bytecode})
+    assert from_bytes["status"] == "ok"
+    assert from_bytes["source"] == response["source"]
+
+    response = handle_request({"id": 3, "path": PYC_PATH, "options": {"bogus": 1}})
+    assert response["status"] == "failed"
+    assert "bogus" in response["message"]
+
+
+def test_serve_stream():
+    requests = [{"id": i, "path": PYC_PATH} for i in range(3)]
+    rfile = BytesIO(
+        b"".join(json.dumps(r).encode() + b"\n" for r in requests) + b"garbage\n"
+    )
+    wfile = BytesIO()
+    with ThreadPool(1) as pool:
+        serve_stream(pool, rfile, wfile)
+    responses = [json.loads(line) for line in wfile.getvalue().splitlines()]
+    assert sorted(r["id"] for r in responses if r["status"] == "ok") == [0, 1, 2]
+    (failed,) = [r for r in responses if r["status"] == "failed"]
+    assert failed.keys() == responses[0].keys()
+    assert failed["id"] is None and failed["message"]
+
+
+def test_handle_request_error(monkeypatch):
+    response = handle_request({"id": 1, "bytecode": "not base64!"})
+    assert response["status"] == "failed"
+
+    def decompile_file(*args, **kwargs):
+        raise AssertionError("oops")
+
+    monkeypatch.setattr(server, "decompile_file", decompile_file)
+    response = handle_request({"id": 2, "path": PYC_PATH})
+    assert response["status"] == "failed"
+    assert response["error_class"] == "AssertionError"
+    assert response["message"] == "oops"
+
+
+class BrokenPipe(BytesIO):
+    def write(self, data):
+        raise BrokenPipeError()
+
+
+def test_serve_stream_errors(monkeypatch):
+    def failing_handle_request(request):
+        raise AssertionError("oops")
+
+    # A task that fails outside of handle_request() is still answered.
+    monkeypatch.setattr(server, "handle_request", failing_handle_request)
+    rfile = BytesIO(b'{"id": 1, "path": "x.pyc"}\n')
+    wfile = BytesIO()
+    with ThreadPool(1) as pool:
+        serve_stream(pool, rfile, wfile)
+    (response,) = [json.loads(line) for line in wfile.getvalue().splitlines()]
+    assert response["id"] == 1
+    assert response["status"] == "failed"
+    assert response["error_class"] == "AssertionError"
+
+    # A client that has gone away doesn't stop us.
+    rfile = BytesIO(b'{"id": 1, "path": "x.pyc"}\ngarbage\n')
+    with ThreadPool(1) as pool:
+        serve_stream(pool, rfile, BrokenPipe())
+
+
+class SilentPool:
+    """A pool whose worker dies on every task: it never calls back."""
+
+    def apply_async(self, func, args, callback=None, error_callback=None):
+        pass
+
+
+def test_serve_stream_timeout():
+    rfile = BytesIO(b'{"id": 1, "path": "x.pyc"}\n{"id": 2, "path": "y.pyc"}\n')
+    wfile = BytesIO()
+    serve_stream(SilentPool(), rfile, wfile, request_timeout=0.1, poll_interval=0.01)
+    responses = [json.loads(line) for line in wfile.getvalue().splitlines()]
+    assert sorted(response["id"] for response in responses) == [1, 2]
+    for response in responses:
+        assert response["status"] == "failed"
+        assert response["message"].startswith("no answer within 0.1 seconds")
+
+
+def exit_worker(request):
+    os._exit(1)
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="needs fork"
+)
+def test_serve_stream_dead_worker(monkeypatch):
+    # A worker process that dies doesn't leave its client waiting. The
+    # other requests are still answered by the worker that replaces it.
+    rfile = BytesIO(b'{"id": 1, "path": "x.pyc"}\n')
+    wfile = BytesIO()
+    with multiprocessing.get_context("fork").Pool(1) as pool:
+        monkeypatch.setattr(server, "handle_request", exit_worker)
+        serve_stream(pool, rfile, wfile, request_timeout=1, poll_interval=0.05)
+    (response,) = [json.loads(line) for line in wfile.getvalue().splitlines()]
+    assert response["id"] == 1
+    assert response["status"] == "failed"
+    assert response["message"].startswith("no answer within 1 seconds")
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+def test_remove_old_socket(tmp_path):
+    # Only a socket is removed.
+    path = tmp_path / "not-a-socket"
+    path.write_text("keep me")
+    with pytest.raises(FileExistsError):
+        remove_old_socket(str(path))
+    assert path.read_text() == "keep me"
+
+    path = tmp_path / "socket"
+    sock = socket.socket(socket.AF_UNIX)
+    sock.bind(str(path))
+    sock.close()
+    remove_old_socket(str(path))
+    assert not path.exists()
+    remove_old_socket(str(path))
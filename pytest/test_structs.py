@@ -0,0 +1,39 @@
+import random
+
+from decompyle3.scanners.structs import Structs
+
+
+def scan_parent(structs: list, offset: int) -> dict:
+    """What detect_control_flow() did before Structs."""
+    parent = structs[0]
+    start, end = parent["start"], parent["end"]
+    for struct in structs:
+        if struct["start"] <= offset < struct["end"] and (
+            struct["start"] >= start and struct["end"] <= end
+        ):
+            start, end = struct["start"], struct["end"]
+            parent = struct
+    return parent
+
+
+def test_structs_parent():
+    rng = random.Random(0)
+    root = {"type": "root", "start": 0, "end": 199}
+    structs = Structs(root)
+    added = [root]
+    offsets = list(range(0, 200, 2))
+    # Offsets go up, as in find_jump_targets(), then start over.
+    for offset in offsets + offsets[::3]:
+        assert structs.parent(offset) is scan_parent(added, offset)
+        if rng.random() < 0.3:
+            start = rng.randrange(0, 200, 2)
+            struct = {
+                "type": "while-loop",
+                "start": start,
+                "end": start + rng.randrange(-10, 60, 2),
+            }
+            structs.append(struct)
+            added.append(struct)
+
+    assert list(structs) == added and len(structs) == len(added)
+    assert structs[0] is root
@@ -1,3 +1,8 @@
+import pickle
+from copy import copy
+
+from xdis.opcodes import opcode_38
+
 from decompyle3.scanners.tok import Token
 
 
@@ -24,5 +29,86 @@ def test_token():
     assert t.format(token_num=5) == expect, t.format(token_num=5)
 
 
+def test_token_offsets():
+    t = Token("LOAD_CONST", offset=10)
+    assert (t.first_offset, t.second_offset, t.has_extended_arg) == (10, None, False)
+    assert t.inst_offset == 10
+
+    # An instruction with an extended arg
+    t = Token("JUMP_ABSOLUTE", offset=118, has_extended_arg=True)
+    assert t.offset == "118_120"
+    assert (t.first_offset, t.second_offset, t.has_extended_arg) == (118, 120, True)
+    assert t.inst_offset == t.off2int() == 120
+    assert t.off2int(prefer_last=False) == 118
+
+    # A COME_FROM, where the second number is a count
+    t = Token("COME_FROM", offset="120_1")
+    assert (t.first_offset, t.second_offset, t.has_extended_arg) == (120, 1, False)
+    assert t.inst_offset == 120
+
+    # Setting the offset sets the int fields
+    t.offset = 130
+    assert (t.first_offset, t.inst_offset) == (130, 130)
+
+
+def test_token_slots():
+    t = Token("JUMP_ABSOLUTE", attr=4, pattr=4, offset=8, has_arg=True, opc=opcode_38)
+    t2 = Token("JUMP_ABSOLUTE", attr=6, pattr=6, offset=10, has_arg=True, opc=opcode_38)
+    assert t.op == opcode_38.opmap["JUMP_ABSOLUTE"]
+    assert (t.opc, t.has_arg, t.optype, t.tos_str) == (opcode_38, True, None, None)
+    # Tokens for the same opcode share its fields.
+    assert t.opcode_info is t2.opcode_info
+
+    # Formatting doesn't change the token.
+    assert t.format() == "                8  JUMP_ABSOLUTE         4  'to 4'"
+    assert t.pattr == 4
+
+    # Attributes other than the usual ones can still be set.
+    t.parent = t2
+    t.has_arg = False
+    assert t.parent is t2 and t.has_arg is False and t.op == t2.op
+    assert t.opcode_info is not t2.opcode_info
+
+
+def test_token_pickle():
+    t = Token(
+        "LOAD_CONST",
+        attr=None,
+        pattr="None",
+        offset=118,
+        has_arg=True,
+        opc=opcode_38,
+        has_extended_arg=True,
+        tos_str="x",
+    )
+    t.parent = None
+    for t2 in (pickle.loads(pickle.dumps(t)), copy(t)):
+        assert t2 is not t
+        for name in ("kind", "attr", "pattr", "offset", "inst_offset", "opc", "op"):
+            assert getattr(t2, name) == getattr(t, name), name
+        assert (t2.has_arg, t2.tos_str, t2.parent) == (True, "x", None)
+        assert t2.opcode_info is t.opcode_info
+
+    # State from before tokens had slots
+    t2 = Token.__new__(Token)
+    t2.__setstate__(
+        {
+            "kind": "LOAD_CONST",
+            "attr": None,
+            "pattr": "None",
+            "offset": "118_120",
+            "linestart": 3,
+            "op": t.op,
+            "opc": opcode_38.__name__,
+            "has_arg": True,
+        }
+    )
+    assert (t2.offset, t2.inst_offset, t2.linestart) == ("118_120", 120, 3)
+    assert t2.opc is opcode_38 and t2.optype is None
+
+
 if __name__ == "__main__":
     test_token()
+    test_token_offsets()
+    test_token_slots()
+    test_token_pickle()
@@ -0,0 +1,129 @@
+import pytest
+
+from decompyle3.parsers.main import get_python_parser, parse
+from decompyle3.parsers.parse_heads import ParserError
+from decompyle3.parsers.token_check import TokenSets
+from decompyle3.scanner import get_scanner
+from decompyle3.scanners.tok import Token
+from decompyle3.semantics.pysource import PARSER_DEFAULT_DEBUG
+
+
+def sample_function(a, b):
+    f = lambda x: x + 1  # noqa: E731
+    return {k: f(v) for k, v in zip(a, b)}, [a, b]
+
+
+def ingest(p, co):
+    scanner = get_scanner((3, 8))
+    tokens, customize = scanner.ingest(co)
+    p.insts = scanner.insts
+    p.offset2inst_index = scanner.offset2inst_index
+    p.opc = scanner.opc
+    return tokens, customize
+
+
+def names(sets: TokenSets, bits: int) -> set:
+    return {name for name, bit in sets.bits.items() if bits & bit}
+
+
+def test_token_sets_updated():
+    p = get_python_parser((3, 8), PARSER_DEFAULT_DEBUG, "exec")
+    base = p.token_sets
+    tokens, customize = ingest(p, sample_function.__code__)
+    p.customize_grammar_rules(tokens, customize)
+
+    # Working out the sets from the uncustomized grammar's gives
+    # those of the customized grammar.
+    sets = base.updated(p.rules)
+    full = TokenSets(p.rules, "stmts")
+    assert sets is not base
+    assert names(sets, sets.first["stmts"]) & full.bits.keys() == names(
+        full, full.first["stmts"]
+    )
+    for terminal in full.bits:
+        assert names(sets, sets.follow[terminal]) & full.bits.keys() == names(
+            full, full.follow[terminal]
+        ), terminal
+    assert sets.updated(p.rules) is sets
+    assert sets.first_invalid_token(tokens) is None
+
+
+def parse_error(p, tokens, customize) -> ParserError:
+    with pytest.raises(ParserError) as e:
+        parse(p, tokens, dict(customize), is_lambda=False)
+    return e.value
+
+
+def test_check_tokens(monkeypatch, capsys):
+    p = get_python_parser((3, 8), PARSER_DEFAULT_DEBUG, "exec")
+    code = sample_function.__code__
+
+    # Parsing changes the kinds of some tokens, so each parse gets
+    # tokens of its own. A stream can't start with a RETURN_VALUE, nor
+    # end without returning.
+    def bad_streams():
+        tokens, customize = ingest(p, code)
+        yield [Token("RETURN_VALUE", offset=1000)] + tokens, customize
+        tokens, customize = ingest(p, code)
+        yield tokens[:-1], customize
+
+    # The check runs with the default debug settings, and reports the
+    # token that can't come where it is. It shows no error stacks,
+    # since there was no parse.
+    checked = [parse_error(p, *stream) for stream in bad_streams()]
+    assert [(e.token.kind, e.offset) for e in checked] == [
+        ("RETURN_VALUE", 1000),
+        ("BUILD_TUPLE_2", 36),
+    ]
+    assert "Stacks of completed symbols" not in capsys.readouterr().out
+
+    # These streams don't parse either.
+    monkeypatch.setattr(TokenSets, "first_invalid_token", lambda self, tokens: None)
+    for stream in bad_streams():
+        parse_error(p, *stream)
+    monkeypatch.undo()
+
+    tokens, customize = ingest(p, code)
+    assert parse(p, tokens, dict(customize), is_lambda=False) == "stmts"
+
+
+def test_check_tokens_reduce(monkeypatch, capsys):
+    p = get_python_parser((3, 8), dict(PARSER_DEFAULT_DEBUG, reduce=True), "exec")
+    tokens, customize = ingest(p, sample_function.__code__)
+
+    # Reductions come from the parse, so with them shown the parser
+    # finds the error.
+    monkeypatch.setattr(
+        TokenSets, "first_invalid_token", lambda self, tokens: pytest.fail()
+    )
+    parse_error(p, tokens[:-1], customize)
+    assert "Stacks of completed symbols" in capsys.readouterr().out
+
+    # The sets catch up with the rules customizing added when tokens
+    # are next checked.
+    monkeypatch.undo()
+    p.debug = dict(p.debug, reduce=False)
+    tokens, customize = ingest(p, sample_function.__code__)
+    assert parse(p, tokens, dict(customize), is_lambda=False) == "stmts"
+
+
+def test_token_sets_kept(monkeypatch):
+    p = get_python_parser((3, 8), PARSER_DEFAULT_DEBUG, "exec")
+    code = sample_function.__code__
+    tokens, customize = ingest(p, code)
+    parse(p, tokens, dict(customize), is_lambda=False)
+    sets = p.token_sets
+
+    # Parsing the same code again adds no rules, so the sets aren't
+    # worked out again.
+    calls = []
+    updated = TokenSets.updated
+
+    def counting_updated(self, rules):
+        calls.append(rules)
+        return updated(self, rules)
+
+    monkeypatch.setattr(TokenSets, "updated", counting_updated)
+    tokens, customize = ingest(p, code)
+    parse(p, tokens, dict(customize), is_lambda=False)
+    assert calls == [] and p.token_sets is sets
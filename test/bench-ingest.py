@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# Mode: -*- python -*-
+#
+# Copyright (c) 2024 by Rocky Bernstein
+#
+"""
+Usage: bench-ingest.py [--runs N] [LINES]
+
+Time the scanner in two ways. First, the CPU time of the "scan" phase
+decompiling the 3.7, 3.8 and 3.8 PyPy test bytecode, each run in a
+fresh interpreter. Second, Scanner.build_instructions() on a module of
+LINES generated statements (default 20000), compiled by this Python,
+with the memory it allocates and still holds afterwards. Run this
+before and after a change to see what it does to scanning.
+"""
+
+import glob
+import json
+import os.path as osp
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from io import StringIO
+
+TEST_DIR = osp.dirname(osp.abspath(__file__))
+DEFAULT_DIRS = [
+    osp.join(TEST_DIR, f"bytecode_{version}", kind)
+    for version in ("3.7", "3.8", "3.8pypy")
+    for kind in ("exec", "run")
+]
+
+
+def scan_corpus() -> float:
+    from decompyle3.main import decompile_file
+    from decompyle3.timing import timed_phases
+
+    files = sorted(
+        path for d in DEFAULT_DIRS for path in glob.glob(osp.join(d, "*.pyc"))
+    )
+    with timed_phases() as timer:
+        for path in files:
+            try:
+                decompile_file(path, StringIO())
+            except Exception:
+                pass
+    return timer.times["scan"]
+
+
+def large_module(lines: int):
+    source = "\n".join(
+        f"v{i} = f(a{i % 97}, {i}) if x{i % 89} else [y, {i}, 'c{i}']"
+        for i in range(lines)
+    )
+    return compile(source, "<large>", "exec")
+
+
+def build_large(lines: int) -> dict:
+    from decompyle3.scanner import get_scanner
+
+    co = large_module(lines)
+    scanner = get_scanner(sys.version_info[:2])
+    start = time.process_time()
+    scanner.build_instructions(co)
+    seconds = time.process_time() - start
+
+    scanner = get_scanner(sys.version_info[:2])
+    tracemalloc.start()
+    scanner.build_instructions(co)
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "code_bytes": len(co.co_code),
+        "seconds": seconds,
+        "held_mb": held / 2**20,
+        "peak_mb": peak / 2**20,
+    }
+
+
+def main(args: list):
+    runs = 3
+    if args[:1] == ["--once"]:
+        print(json.dumps({"scan": scan_corpus(), "large": build_large(int(args[1]))}))
+        return
+    if args[:1] == ["--runs"]:
+        runs = int(args[1])
+        args = args[2:]
+    lines = int(args[0]) if args else 20000
+
+    results = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, __file__, "--once", str(lines)],
+            check=True,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        results.append(json.loads(result.stdout.splitlines()[-1]))
+    scans = [result["scan"] for result in results]
+    builds = [result["large"]["seconds"] for result in results]
+    large = results[-1]["large"]
+    print(f"{runs} runs")
+    print(
+        f"  scan phase on the test bytecode: CPU min {min(scans):.2f}s"
+        f"  median {statistics.median(scans):.2f}s"
+    )
+    print(
+        f"  build_instructions on {large['code_bytes']} bytes of bytecode:"
+        f" CPU min {min(builds):.2f}s  median {statistics.median(builds):.2f}s"
+    )
+    print(
+        f"  memory: {large['held_mb']:.1f}MB held afterwards,"
+        f" {large['peak_mb']:.1f}MB at peak"
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# Mode: -*- python -*-
+#
+# Copyright (c) 2024 by Rocky Bernstein
+#
+"""
+Usage: bench-jump-targets.py [--python PYTHON] [--runs N] [DEPTH COPIES]
+
+Time Scanner37Base.find_jump_targets() on a synthetic function with
+COPIES copies of loops and try blocks nested DEPTH deep. The function
+is compiled by PYTHON, which must be a 3.7 or 3.8 interpreter. Python
+3.7 bytecode is the interesting case: its SETUP_LOOP instructions add
+the block structures that find_jump_targets() nests. Run this before
+and after a change to see what it does to scanning large functions.
+"""
+
+import os.path as osp
+import subprocess
+import sys
+import tempfile
+import time
+
+from xdis import iscode
+from xdis.load import load_module
+
+from decompyle3.scanner import get_scanner
+
+COMPILE = "import py_compile, sys; py_compile.compile(sys.argv[1], cfile=sys.argv[2], doraise=True)"
+
+
+def nested_source(depth: int, copies: int) -> str:
+    lines = ["def f(x, y):"]
+    for copy in range(copies):
+        indent = "    "
+        for level in range(depth):
+            if level % 3 == 0:
+                lines.append(f"{indent}for i{level} in x:")
+            elif level % 3 == 1:
+                lines.append(f"{indent}while i{level - 1} < y:")
+            else:
+                lines.append(f"{indent}try:")
+            indent += "    "
+        lines.append(f"{indent}y = y + {copy}")
+        for level in reversed(range(depth)):
+            indent = indent[:-4]
+            if level % 3 == 2:
+                lines.append(f"{indent}except ValueError:")
+                lines.append(f"{indent}    break")
+            elif level % 3 == 1:
+                lines.append(f"{indent}    i{level - 1} += 1")
+    lines.append("    return y")
+    return "\n".join(lines) + "\n"
+
+
+def compile_function(python: str, source: str):
+    """Return the code object of f in `source`, as compiled by `python`."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source_path = osp.join(tmpdir, "nested.py")
+        bytecode_path = osp.join(tmpdir, "nested.pyc")
+        with open(source_path, "w") as f:
+            f.write(source)
+        subprocess.run([python, "-c", COMPILE, source_path, bytecode_path], check=True)
+        version, _, _, co = load_module(bytecode_path)[:4]
+    code = next(const for const in co.co_consts if iscode(const))
+    return version, code
+
+
+def time_runs(version, code, runs: int) -> list:
+    times = []
+    for _ in range(runs):
+        scanner = get_scanner(version)
+        scanner.build_instructions(code)
+        start = time.process_time()
+        scanner.find_jump_targets(False)
+        times.append(time.process_time() - start)
+    return times, len(scanner.structs)
+
+
+def main(args: list):
+    python, runs = sys.executable, 3
+    while args[:1] in (["--python"], ["--runs"]):
+        if args[0] == "--python":
+            python = args[1]
+        else:
+            runs = int(args[1])
+        args = args[2:]
+    depth, copies = (int(arg) for arg in args) if args else (12, 200)
+
+    version, code = compile_function(python, nested_source(depth, copies))
+    times, structs = time_runs(version, code, runs)
+    print(
+        f"depth {depth}, {copies} copies: {len(code.co_code)} bytes of "
+        f"{'.'.join(map(str, version[:2]))} bytecode, {structs} structures"
+    )
+    print(f"  find_jump_targets() min {min(times):.3f}s over {runs} runs")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
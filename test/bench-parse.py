@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# Mode: -*- python -*-
+#
+# Copyright (c) 2024 by Rocky Bernstein
+#
+"""
+Usage: bench-parse.py [--runs N] [--no-pool] [DIRECTORY...]
+
+Time decompiling every bytecode file in DIRECTORY... in one process, and
+count the parsers and parser states built. The default is the 3.7, 3.8 and 3.8 PyPy
+test bytecode. Each run is a fresh interpreter; CPU time is reported,
+since wall time on a busy machine says little. With --no-pool, parsers
+are not handed back for reuse; see decompyle3.parsers.main.acquire_parser().
+Run this before and after a change to see what it does to parsing.
+"""
+
+import glob
+import json
+import os.path as osp
+import statistics
+import subprocess
+import sys
+import time
+from io import StringIO
+
+TEST_DIR = osp.dirname(osp.abspath(__file__))
+DEFAULT_DIRS = [
+    osp.join(TEST_DIR, f"bytecode_{version}", kind)
+    for version in ("3.7", "3.8", "3.8pypy")
+    for kind in ("exec", "run")
+]
+
+
+def run_once(dirs: list, pool: bool) -> dict:
+    from spark_parser.spark import GenericParser
+
+    import decompyle3.parsers.main
+    from decompyle3.main import decompile_file
+
+    if not pool:
+        decompyle3.parsers.main.PARSER_POOL_SIZE = 0
+
+    parsers = states = 0
+    get_python_parser = decompyle3.parsers.main.get_python_parser
+    make_state = GenericParser.makeState
+
+    def counting_get_python_parser(*args, **kwargs):
+        nonlocal parsers
+        parsers += 1
+        return get_python_parser(*args, **kwargs)
+
+    def counting_make_state(self, *args):
+        nonlocal states
+        states += 1
+        return make_state(self, *args)
+
+    decompyle3.parsers.main.get_python_parser = counting_get_python_parser
+    GenericParser.makeState = counting_make_state
+
+    files = sorted(path for d in dirs for path in glob.glob(osp.join(d, "*.pyc")))
+    failed = 0
+    start = time.process_time()
+    for path in files:
+        try:
+            decompile_file(path, StringIO())
+        except Exception:
+            failed += 1
+    return {
+        "cpu": time.process_time() - start,
+        "files": len(files),
+        "failed": failed,
+        "parsers": parsers,
+        "states": states,
+    }
+
+
+def main(args: list):
+    runs = 3
+    pool = True
+    if args[:1] == ["--once"]:
+        pool = args[1] == "pool"
+        print(json.dumps(run_once(args[2:], pool)))
+        return
+    while args[:1] in (["--runs"], ["--no-pool"]):
+        if args[0] == "--runs":
+            runs = int(args[1])
+            args = args[2:]
+        else:
+            pool = False
+            args = args[1:]
+    dirs = [osp.abspath(d) for d in args] or DEFAULT_DIRS
+
+    results = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, __file__, "--once", "pool" if pool else "no-pool"] + dirs,
+            check=True,
+            stdout=subprocess.PIPE,
+            cwd=osp.dirname(TEST_DIR),
+            universal_newlines=True,
+        )
+        results.append(json.loads(result.stdout.splitlines()[-1]))
+    times = [result["cpu"] for result in results]
+    last = results[-1]
+    print(
+        f"{runs} runs decompiling {last['files']} files, {last['failed']} failed"
+        f"{'' if pool else ', parser pool off'}"
+    )
+    print(f"  CPU min {min(times):.2f}s  median {statistics.median(times):.2f}s")
+    print(f"  {last['parsers']} parsers and {last['states']} parser states built")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# Mode: -*- python -*-
+#
+# Copyright (c) 2024 by Rocky Bernstein
+#
+"""
+Usage: bench-startup.py [--runs N] [BYTECODE-FILE]
+
+Time decompiling a single small bytecode file from the command line,
+start-up included, and list the parser modules that got imported.
+Each run is a fresh interpreter. Run this before and after a change
+to see what it does to start-up time.
+"""
+
+import os.path as osp
+import statistics
+import subprocess
+import sys
+import time
+
+TEST_DIR = osp.dirname(osp.abspath(__file__))
+DEFAULT_FILE = osp.join(TEST_DIR, "bytecode_3.8", "run", "01_boolean.pyc")
+
+
+def time_runs(path: str, runs: int) -> list:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "decompyle3.bin.decompile", path],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            cwd=osp.dirname(TEST_DIR),
+        )
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def parser_modules_imported(path: str) -> list:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "decompyle3.bin.decompile", path],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        cwd=osp.dirname(TEST_DIR),
+        universal_newlines=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        name = line.split("|")[-1].strip()
+        if name.startswith("decompyle3.parsers.p"):
+            modules.append(name)
+    return sorted(modules)
+
+
+def main(args: list):
+    runs = 10
+    if args[:1] == ["--runs"]:
+        runs = int(args[1])
+        args = args[2:]
+    path = osp.abspath(args[0]) if args else DEFAULT_FILE
+
+    times = time_runs(path, runs)
+    print(f"{runs} runs decompiling {path}")
+    print(f"  min {min(times):.3f}s  median {statistics.median(times):.3f}s")
+    modules = parser_modules_imported(path)
+    print(f"{len(modules)} parser modules imported:")
+    for name in modules:
+        print(f"  {name}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])